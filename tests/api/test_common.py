@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
+import pandas as pd
+
 from zvt.contract import IntervalLevel
+from zvt.contract.trading_calendar import TradingCalendar
 from zvt.api.quote import get_kdata
 from zvt.api.quote import to_high_level_kdata, get_recent_report_date
 from ..context import init_test_context
@@ -16,6 +19,86 @@ def test_to_high_level_kdata():
     print(df)
 
 
+def gen_kdata(timestamps, level):
+    size = len(timestamps)
+    return pd.DataFrame({'entity_id': 'stock_sz_000001', 'provider': 'joinquant', 'code': '000001', 'name': 'test',
+                         'timestamp': timestamps, 'level': level, 'open': range(size), 'close': range(1, size + 1),
+                         'high': range(2, size + 2), 'low': range(size), 'volume': 1.0, 'turnover': 1.0})
+
+
+def test_to_high_level_kdata_intraday():
+    calendar = TradingCalendar()
+    timestamps = calendar.get_interval_timestamps('2020-01-06', '2020-01-06', IntervalLevel.LEVEL_1MIN)
+    # the 1m kdata labeled by end time:09:31-11:30,13:01-15:00
+    timestamps = [t for t in timestamps if
+                  pd.Timestamp('2020-01-06 09:30') < t <= pd.Timestamp('2020-01-06 11:30') or
+                  pd.Timestamp('2020-01-06 13:00') < t <= pd.Timestamp('2020-01-06 15:00')]
+
+    df = to_high_level_kdata(gen_kdata(timestamps, '1m'), IntervalLevel.LEVEL_1HOUR, trading_calendar=calendar)
+    assert df.index.tolist() == [pd.Timestamp('2020-01-06 10:30'), pd.Timestamp('2020-01-06 11:30'),
+                                 pd.Timestamp('2020-01-06 14:00'), pd.Timestamp('2020-01-06 15:00')]
+    assert df['volume'].tolist() == [60, 60, 60, 60]
+    assert df['open'].tolist() == [0, 60, 120, 180]
+    assert df['close'].tolist() == [60, 120, 180, 240]
+    assert df['id'].iloc[0] == 'stock_sz_000001_2020-01-06T10:30:00.000'
+
+
+def test_to_high_level_kdata_session_start():
+    calendar = TradingCalendar()
+    # the opening bars at 09:30 and 13:00
+    timestamps = pd.to_datetime(['2020-01-06 09:30', '2020-01-06 09:31', '2020-01-06 09:35', '2020-01-06 09:36',
+                                 '2020-01-06 13:00', '2020-01-06 13:01', '2020-01-06 13:05'])
+
+    df = to_high_level_kdata(gen_kdata(timestamps, '1m'), IntervalLevel.LEVEL_5MIN, trading_calendar=calendar)
+    assert df.index.tolist() == [pd.Timestamp('2020-01-06 09:35'), pd.Timestamp('2020-01-06 09:40'),
+                                 pd.Timestamp('2020-01-06 13:05')]
+    assert df['volume'].tolist() == [3, 1, 3]
+
+    # labeled by begin time,the bar at the session end belongs to the last interval
+    timestamps = pd.to_datetime(['2020-01-06 11:25', '2020-01-06 11:29', '2020-01-06 11:30', '2020-01-06 13:00'])
+    df = to_high_level_kdata(gen_kdata(timestamps, '1m'), IntervalLevel.LEVEL_5MIN, trading_calendar=calendar,
+                             use_begin_time=True)
+    assert df.index.tolist() == [pd.Timestamp('2020-01-06 11:25'), pd.Timestamp('2020-01-06 13:00')]
+    assert df['volume'].tolist() == [3, 1]
+
+
+def test_to_high_level_kdata_week():
+    # 2020-01-10(friday) is not trading date
+    calendar = TradingCalendar(trading_days=['2020-01-06', '2020-01-07', '2020-01-08', '2020-01-09', '2020-01-13'])
+    df = to_high_level_kdata(gen_kdata(pd.to_datetime(['2020-01-06', '2020-01-07', '2020-01-08', '2020-01-09',
+                                                       '2020-01-13']), '1d'),
+                             IntervalLevel.LEVEL_1WEEK, trading_calendar=calendar)
+    assert df.index.tolist() == [pd.Timestamp('2020-01-10'), pd.Timestamp('2020-01-17')]
+    assert df['close'].tolist() == [4, 5]
+    assert df['volume'].tolist() == [4, 1]
+    assert df['change_pct'].iloc[1] == 0.25
+
+
+def test_to_high_level_kdata_out_of_calendar():
+    # the calendar doesn't cover the data
+    calendar = TradingCalendar(trading_days=['2019-01-02', '2019-01-03'])
+    timestamps = pd.to_datetime(['2020-02-03', '2020-02-04', '2020-02-05', '2020-02-26', '2020-02-27'])
+
+    # the id of the unfinished bar is the same as the finished one
+    for size in range(1, len(timestamps) + 1):
+        kdata_df = gen_kdata(timestamps[:size], '1d')
+        df = to_high_level_kdata(kdata_df, IntervalLevel.LEVEL_1WEEK, trading_calendar=calendar)
+        assert df['id'].iloc[0] == 'stock_sz_000001_2020-02-07'
+        assert df['id'].is_unique
+
+        df = to_high_level_kdata(kdata_df, IntervalLevel.LEVEL_1MON, trading_calendar=calendar)
+        assert df['id'].tolist() == ['stock_sz_000001_2020-02-28']
+
+    df = to_high_level_kdata(gen_kdata(timestamps, '1d'), IntervalLevel.LEVEL_1WEEK, trading_calendar=calendar)
+    assert df.index.tolist() == [pd.Timestamp('2020-02-07'), pd.Timestamp('2020-02-28')]
+    assert df['volume'].tolist() == [3, 2]
+
+    # the month ends on sunday
+    df = to_high_level_kdata(gen_kdata(pd.to_datetime(['2020-05-28', '2020-05-29']), '1d'),
+                             IntervalLevel.LEVEL_1MON, trading_calendar=calendar)
+    assert df.index.tolist() == [pd.Timestamp('2020-05-29')]
+
+
 def test_get_recent_report_date():
     assert '2018-12-31' == get_recent_report_date('2019-01-01', 0)
     assert '2018-09-30' == get_recent_report_date('2019-01-01', 1)
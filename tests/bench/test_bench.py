@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from ..context import init_test_context
+
+init_test_context()
+
+import json
+import os
+
+import pandas as pd
+
+from zvt import zvt_env
+from zvt.bench import main, init_bench_env, gen_kdata
+from zvt.contract.data_cache import data_cache, enable_data_cache, disable_data_cache
+from zvt.contract.storage import ParquetStorage
+from zvt.domain import Stock
+
+
+def test_gen_kdata():
+    timestamps = pd.date_range('2020-01-01', periods=10, freq='B')
+    df1 = gen_kdata(['stock_sz_000001', 'stock_sz_000002'], timestamps, seed=1)
+    df2 = gen_kdata(['stock_sz_000001', 'stock_sz_000002'], timestamps, seed=1)
+    assert len(df1) == 20
+    assert df1.equals(df2)
+    assert (df1['high'] >= df1['low']).all()
+
+
+def test_bench(tmp_path):
+    data_path = zvt_env['data_path']
+    try:
+        # not existed
+        bench_path = str(tmp_path / 'bench')
+        main(['--stocks', '3', '--start', '2019-06-01', '--end', '2019-12-31', '--data-path', bench_path])
+        with open(os.path.join(bench_path, 'bench.json')) as f:
+            result = json.load(f)
+        assert [item['name'] for item in result['results']] == ['df_to_db', 'get_data', 'get_data', 'get_data',
+                                                                'move_on', 'ma_factor', 'ma_state_stats_factor',
+                                                                'target_selector', 'trader', 'trader']
+        for item in result['results']:
+            assert item['seconds'] >= 0
+    finally:
+        init_bench_env(data_path)
+
+
+def test_init_bench_env(tmp_path):
+    data_path = zvt_env['data_path']
+    try:
+        calendar = Stock.get_trading_calendar()
+        enable_data_cache(max_size=2)
+        data_cache.put((('joinquant', 'stock_1d_kdata'), 'Stock1dKdata', ()), pd.DataFrame({'a': [1]}), 0)
+
+        init_bench_env(str(tmp_path))
+        assert Stock.get_trading_calendar() is not calendar
+        assert len(data_cache.entries) == 0
+        assert ParquetStorage().root_path == os.path.join(str(tmp_path), 'parquet')
+    finally:
+        disable_data_cache()
+        init_bench_env(data_path)
@@ -1,7 +1,94 @@
 # -*- coding: utf-8 -*-
+from contextlib import contextmanager
+
 
 def init_test_context():
     import os
     import sys
 
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def use_data_path(data_path: str):
+    """
+    use data_path to store the dbs,the engines,sessions,cached query results and trading calendars are dropped
+    """
+    import os
+
+    from zvt import zvt_env
+    from zvt.contract import zvt_context
+    from zvt.contract.data_cache import data_cache
+
+    os.makedirs(data_path, exist_ok=True)
+    zvt_env['data_path'] = data_path
+    zvt_context.db_engine_map.clear()
+    zvt_context.db_session_map.clear()
+    zvt_context.sessions.clear()
+    data_cache.clear()
+    for entity_schema in zvt_context.entity_schema_map.values():
+        if '_trading_calendar' in entity_schema.__dict__:
+            delattr(entity_schema, '_trading_calendar')
+
+
+@contextmanager
+def switch_data_path(data_path: str):
+    """
+    run the test with the dbs in data_path,the original data path is restored after it
+    """
+    from zvt import zvt_env
+
+    original = zvt_env['data_path']
+    use_data_path(data_path)
+    try:
+        yield data_path
+    finally:
+        use_data_path(original)
+
+
+def gen_test_stocks(codes):
+    import pandas as pd
+
+    entity_ids = [f'stock_sz_{code}' for code in codes]
+    return pd.DataFrame({'id': entity_ids,
+                         'entity_id': entity_ids,
+                         'entity_type': 'stock',
+                         'exchange': 'sz',
+                         'code': codes,
+                         'name': codes,
+                         'timestamp': pd.Timestamp('2000-01-01'),
+                         'list_date': pd.Timestamp('2000-01-01')})
+
+
+def gen_test_kdata(entity_ids, timestamps, seed: int = 0):
+    """
+    the deterministic 1d kdata by random walk
+    """
+    import numpy as np
+    import pandas as pd
+
+    random_state = np.random.RandomState(seed)
+    size = len(timestamps)
+    dfs = []
+    for entity_id in entity_ids:
+        change_pct = random_state.normal(0, 0.02, size)
+        close = 10 * np.cumprod(1 + change_pct)
+        open = close / (1 + change_pct)
+        high = np.maximum(open, close) * (1 + np.abs(random_state.normal(0, 0.01, size)))
+        low = np.minimum(open, close) * (1 - np.abs(random_state.normal(0, 0.01, size)))
+        volume = random_state.randint(10000, 1000000, size).astype(float)
+        dfs.append(pd.DataFrame({'id': [f'{entity_id}_{t}' for t in timestamps.strftime('%Y-%m-%d')],
+                                 'entity_id': entity_id,
+                                 'provider': 'joinquant',
+                                 'code': entity_id.split('_')[2],
+                                 'name': entity_id.split('_')[2],
+                                 'timestamp': timestamps,
+                                 'level': '1d',
+                                 'open': open,
+                                 'close': close,
+                                 'high': high,
+                                 'low': low,
+                                 'volume': volume,
+                                 'turnover': volume * close,
+                                 'change_pct': change_pct,
+                                 'turnover_rate': volume / 1e8}))
+    return pd.concat(dfs, ignore_index=True)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+from ..context import init_test_context
+
+init_test_context()
+
+import pandas as pd
+
+from zvt.contract import api
+from zvt.contract.api import df_to_db, get_db_session, read_sql_typed, in_filter, MAX_IN_VALUES, \
+    get_window_data, get_latest_timestamps
+from zvt.domain import Stock1dKdata
+
+test_entity_id = 'stock_sz_test'
+
+
+def clear_test_kdata():
+    session = get_db_session(provider='joinquant', data_schema=Stock1dKdata)
+    session.query(Stock1dKdata).filter(Stock1dKdata.entity_id == test_entity_id).delete()
+    session.commit()
+
+
+def gen_test_kdata(size=10, close=1.0):
+    timestamps = pd.date_range('2000-01-01', periods=size)
+    return pd.DataFrame({'id': [f'{test_entity_id}_{t.date()}' for t in timestamps],
+                         'entity_id': test_entity_id,
+                         'timestamp': timestamps,
+                         'level': '1d',
+                         'close': close,
+                         'not_in_schema': 1})
+
+
+def test_df_to_db():
+    clear_test_kdata()
+
+    df_to_db(df=gen_test_kdata(size=10, close=1.0), data_schema=Stock1dKdata, provider='joinquant', sub_size=3)
+    df = Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id)
+    assert len(df) == 10
+    assert (df['close'] == 1.0).all()
+
+    # ignore the existing ids
+    df_to_db(df=gen_test_kdata(size=12, close=2.0), data_schema=Stock1dKdata, provider='joinquant')
+    df = Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id)
+    assert len(df) == 12
+    assert (df['close'].iloc[:10] == 1.0).all()
+    assert (df['close'].iloc[10:] == 2.0).all()
+
+    # replace the existing ids
+    df_to_db(df=gen_test_kdata(size=12, close=3.0), data_schema=Stock1dKdata, provider='joinquant',
+             force_update=True)
+    df = Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id)
+    assert len(df) == 12
+    assert (df['close'] == 3.0).all()
+
+    clear_test_kdata()
+
+
+def test_df_to_db_force_update_keep_other_cols(monkeypatch):
+    for sqlite_version_info in [(3, 24, 0), (3, 23, 0)]:
+        monkeypatch.setattr(api.sqlite3, 'sqlite_version_info', sqlite_version_info)
+        clear_test_kdata()
+
+        df = gen_test_kdata(size=10, close=1.0)
+        df['open'] = 0.5
+        df_to_db(df=df, data_schema=Stock1dKdata, provider='joinquant')
+
+        # the df without open
+        df_to_db(df=gen_test_kdata(size=12, close=3.0), data_schema=Stock1dKdata, provider='joinquant',
+                 force_update=True)
+        df = Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id)
+        assert len(df) == 12
+        assert (df['close'] == 3.0).all()
+        assert (df['open'].iloc[:10] == 0.5).all()
+        assert df['open'].iloc[10:].isnull().all()
+
+    clear_test_kdata()
+
+
+def test_get_data_iter():
+    clear_test_kdata()
+    df_to_db(df=gen_test_kdata(size=70), data_schema=Stock1dKdata, provider='joinquant')
+
+    df = Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id)
+
+    chunks = list(Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id, return_type='iter',
+                                          chunk_size=30))
+    assert [len(chunk) for chunk in chunks] == [30, 30, 10]
+    assert pd.concat(chunks, ignore_index=True).equals(df)
+
+    # 2000-01-01 -> 2000-03-10 by month
+    chunks = list(Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id, return_type='iter',
+                                          time_slice='MS'))
+    assert [len(chunk) for chunk in chunks] == [31, 29, 10]
+    assert pd.concat(chunks, ignore_index=True).equals(df)
+
+    clear_test_kdata()
+
+
+def test_read_sql_typed():
+    clear_test_kdata()
+    df_to_db(df=gen_test_kdata(size=10), data_schema=Stock1dKdata, provider='joinquant')
+
+    session = get_db_session(provider='joinquant', data_schema=Stock1dKdata)
+    query = session.query(Stock1dKdata).filter(Stock1dKdata.entity_id == test_entity_id)
+    df = read_sql_typed(query.statement, session.bind)
+    assert len(df) == 10
+    assert str(df['timestamp'].dtype) == 'datetime64[ns]'
+    # the null float column is still float
+    assert str(df['open'].dtype) == 'float64'
+    assert df['open'].isna().all()
+    assert (df['close'] == 1.0).all()
+
+    expected = pd.read_sql(query.statement, session.bind)
+    expected['timestamp'] = pd.to_datetime(expected['timestamp'])
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+    # the labeled columns and empty result
+    query = session.query(Stock1dKdata.timestamp, Stock1dKdata.close.label('price')).filter(
+        Stock1dKdata.entity_id == 'stock_sz_not_exist')
+    df = read_sql_typed(query.statement, session.bind)
+    assert df.empty
+    assert list(df.columns) == ['timestamp', 'price']
+
+    clear_test_kdata()
+
+
+def test_get_data_with_big_entity_ids():
+    clear_test_kdata()
+    df_to_db(df=gen_test_kdata(size=10), data_schema=Stock1dKdata, provider='joinquant')
+
+    # more than the old sqlite bound parameters limit 999
+    entity_ids = [f'stock_sz_not_exist_{i}' for i in range(2000)] + [test_entity_id]
+    assert len(in_filter(Stock1dKdata.entity_id, entity_ids).compile().params) == 1
+    assert len(in_filter(Stock1dKdata.entity_id, entity_ids[:MAX_IN_VALUES]).compile().params) == MAX_IN_VALUES
+
+    df = Stock1dKdata.query_data(provider='joinquant', entity_ids=entity_ids)
+    assert len(df) == 10
+    assert (df['entity_id'] == test_entity_id).all()
+
+    ids = [f'{test_entity_id}_{i}' for i in range(2000)] + df['id'].tolist()[:3]
+    df = Stock1dKdata.query_data(provider='joinquant', ids=ids)
+    assert len(df) == 3
+
+    clear_test_kdata()
+
+
+def test_get_window_data():
+    clear_test_kdata()
+    df_to_db(df=gen_test_kdata(size=10), data_schema=Stock1dKdata, provider='joinquant')
+
+    df = get_window_data(data_schema=Stock1dKdata, provider='joinquant', window=3, entity_ids=[test_entity_id],
+                         index=['entity_id', 'timestamp'])
+    assert len(df) == 3
+    assert df['timestamp'].tolist() == list(pd.date_range('2000-01-08', periods=3))
+
+    latest = get_latest_timestamps(data_schema=Stock1dKdata, provider='joinquant',
+                                   entity_ids=[test_entity_id, 'stock_sz_not_exist'])
+    assert latest.to_dict() == {test_entity_id: pd.Timestamp('2000-01-10')}
+
+    clear_test_kdata()
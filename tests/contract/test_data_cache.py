@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from ..context import init_test_context
+
+init_test_context()
+
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from zvt.contract.api import df_to_db, get_db_session, get_db_engine
+from zvt.contract.data_cache import data_cache, enable_data_cache, disable_data_cache
+from zvt.domain import Stock1dKdata
+
+test_entity_id = 'stock_sz_cache'
+
+
+def clear_test_kdata():
+    session = get_db_session(provider='joinquant', data_schema=Stock1dKdata)
+    session.query(Stock1dKdata).filter(Stock1dKdata.entity_id == test_entity_id).delete()
+    session.commit()
+
+
+def save_test_kdata(size=5, close=1.0, force_update=False):
+    timestamps = pd.date_range('2000-01-01', periods=size)
+    df = pd.DataFrame({'id': [f'{test_entity_id}_{t.date()}' for t in timestamps],
+                       'entity_id': test_entity_id,
+                       'timestamp': timestamps,
+                       'level': '1d',
+                       'close': close})
+    df_to_db(df=df, data_schema=Stock1dKdata, provider='joinquant', force_update=force_update)
+
+
+def query_test_kdata(use_cache=True):
+    return Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id,
+                                   filters=[Stock1dKdata.close > 0], columns=['id', 'close'], use_cache=use_cache)
+
+
+def test_data_cache():
+    enable_data_cache(max_size=2)
+    try:
+        clear_test_kdata()
+        save_test_kdata(size=5)
+
+        df = query_test_kdata()
+        assert len(df) == 5
+        assert len(data_cache.entries) == 1
+
+        # hit and changing the result never pollute the cache
+        df['close'] = 100
+        df = query_test_kdata()
+        assert (df['close'] == 1.0).all()
+        assert len(data_cache.entries) == 1
+
+        # invalidated by df_to_db
+        save_test_kdata(size=6, close=2.0, force_update=True)
+        assert len(data_cache.entries) == 0
+        df = query_test_kdata()
+        assert len(df) == 6
+        assert (df['close'] == 2.0).all()
+
+        # invalidated by session writing
+        clear_test_kdata()
+        assert query_test_kdata().empty
+
+        # bounded
+        for i in range(3):
+            Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id, limit=i + 1, use_cache=True)
+        assert len(data_cache.entries) == 2
+    finally:
+        disable_data_cache()
+        clear_test_kdata()
+
+
+def test_data_cache_not_used_by_default():
+    enable_data_cache(max_size=2)
+    try:
+        clear_test_kdata()
+        save_test_kdata(size=5)
+
+        assert len(query_test_kdata(use_cache=False)) == 5
+        assert len(data_cache.entries) == 0
+
+        # the cached one doesn't see the writes of other processes
+        assert len(query_test_kdata()) == 5
+        db_path = get_db_engine(provider='joinquant', data_schema=Stock1dKdata).url.database
+        with closing(sqlite3.connect(db_path)) as con:
+            con.execute("INSERT INTO stock_1d_kdata (id, entity_id, timestamp, level, close) VALUES "
+                        "('{}_x', '{}', '2001-01-01 00:00:00.000000', '1d', 1.0)".format(test_entity_id,
+                                                                                         test_entity_id))
+            con.commit()
+        assert len(query_test_kdata()) == 5
+        assert len(query_test_kdata(use_cache=False)) == 6
+    finally:
+        disable_data_cache()
+        clear_test_kdata()
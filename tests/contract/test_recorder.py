@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+from ..context import init_test_context
+
+init_test_context()
+
+import random
+import time
+
+import pandas as pd
+
+from zvt.contract.api import df_to_db, get_db_session
+from zvt.contract import IntervalLevel
+from zvt.contract.recorder import TimeSeriesDataRecorder, FixedCycleDataRecorder
+from zvt.domain import Stock, Stock1dKdata
+
+test_codes = ['900001', '900002', '900003', '900004', '900005']
+test_entity_ids = [f'stock_sz_{code}' for code in test_codes]
+
+
+class LocalKdataRecorder(TimeSeriesDataRecorder):
+    """
+    local stand-in for the network recorder
+    """
+    provider = 'joinquant'
+    data_schema = Stock1dKdata
+
+    entity_provider = 'joinquant'
+    entity_schema = Stock
+
+    def __init__(self, codes=None, max_workers=1) -> None:
+        super().__init__(entity_type='stock', exchanges=['sz'], codes=codes, sleeping_time=0,
+                         fix_duplicate_way='ignore')
+        self.max_workers = max_workers
+        self.persisted = []
+
+    def record(self, entity, start, end, size, timestamps):
+        # disorder the finishing of the workers
+        time.sleep(random.random() / 10)
+        return [{'timestamp': pd.Timestamp('2020-01-02'), 'close': 1.0},
+                {'timestamp': pd.Timestamp('2020-01-03'), 'close': 2.0},
+                # duplicated
+                {'timestamp': pd.Timestamp('2020-01-03'), 'close': 2.0}]
+
+    def generate_domain(self, entity, original_data):
+        got_new_data, domain_item = super().generate_domain(entity, original_data)
+        if domain_item:
+            domain_item.level = '1d'
+        return got_new_data, domain_item
+
+    def persist(self, entity, domain_list):
+        self.persisted.append((entity.id, [item.id for item in domain_list]))
+        super().persist(entity, domain_list)
+
+
+def init_test_entities():
+    df = pd.DataFrame({'id': test_entity_ids,
+                       'entity_id': test_entity_ids,
+                       'entity_type': 'stock',
+                       'exchange': 'sz',
+                       'code': test_codes,
+                       'name': test_codes,
+                       'timestamp': pd.Timestamp('2020-01-01')})
+    df_to_db(df=df, data_schema=Stock, provider='joinquant', force_update=True)
+
+
+def clear_test_data():
+    session = get_db_session(provider='joinquant', data_schema=Stock1dKdata)
+    session.query(Stock1dKdata).filter(Stock1dKdata.entity_id.in_(test_entity_ids)).delete(synchronize_session=False)
+    session.commit()
+
+    session = get_db_session(provider='joinquant', data_schema=Stock)
+    session.query(Stock).filter(Stock.id.in_(test_entity_ids)).delete(synchronize_session=False)
+    session.commit()
+
+
+def run_recorder(max_workers):
+    clear_test_data()
+    init_test_entities()
+
+    recorder = LocalKdataRecorder(codes=test_codes, max_workers=max_workers)
+    recorder.run()
+
+    df = Stock1dKdata.query_data(provider='joinquant', entity_ids=test_entity_ids, columns=['id', 'close'])
+    clear_test_data()
+    return recorder.persisted, df
+
+
+def test_concurrent_recorder():
+    persisted, df = run_recorder(max_workers=1)
+    concurrent_persisted, concurrent_df = run_recorder(max_workers=4)
+
+    # persisted in the entity order and the duplicated items are ignored
+    assert [item[0] for item in concurrent_persisted] == test_entity_ids
+    assert concurrent_persisted == persisted
+    for _, ids in concurrent_persisted:
+        assert len(ids) == 2
+
+    assert len(concurrent_df) == 10
+    assert sorted(concurrent_df['id'].tolist()) == sorted(df['id'].tolist())
+
+
+class BoundedKdataRecorder(LocalKdataRecorder):
+    max_pending_factor = 1
+
+    def __init__(self, codes=None, max_workers=1) -> None:
+        super().__init__(codes=codes, max_workers=max_workers)
+        self.evaluated = 0
+        self.handled = 0
+        self.max_unhandled = 0
+
+    def evaluate_entity(self, entity_item):
+        result = super().evaluate_entity(entity_item)
+        self.evaluated += 1
+        self.max_unhandled = max(self.max_unhandled, self.evaluated - self.handled)
+        return result
+
+    def handle_original_list(self, entity_item, original_list, start_timestamp):
+        self.handled += 1
+        return super().handle_original_list(entity_item, original_list, start_timestamp)
+
+
+def test_concurrent_recorder_bounded():
+    clear_test_data()
+    init_test_entities()
+
+    recorder = BoundedKdataRecorder(codes=test_codes, max_workers=2)
+    recorder.run()
+
+    assert [item[0] for item in recorder.persisted] == test_entity_ids
+    # the results are persisted as going,not after fetching all the entities
+    assert recorder.max_unhandled <= 2
+
+    df = Stock1dKdata.query_data(provider='joinquant', entity_ids=test_entity_ids, columns=['id'])
+    assert len(df) == 10
+
+    clear_test_data()
+
+
+class LocalFixedCycleRecorder(FixedCycleDataRecorder):
+    provider = 'joinquant'
+    data_schema = Stock1dKdata
+
+    entity_provider = 'joinquant'
+    entity_schema = Stock
+
+    def __init__(self, codes=None) -> None:
+        super().__init__(entity_type='stock', exchanges=['sz'], codes=codes, sleeping_time=0,
+                         level=IntervalLevel.LEVEL_1DAY)
+
+
+def save_test_kdata(timestamps):
+    df = pd.DataFrame({'id': [f'{test_entity_ids[0]}_{t}' for t in timestamps],
+                       'entity_id': test_entity_ids[0],
+                       'timestamp': pd.to_datetime(timestamps),
+                       'level': '1d',
+                       'close': 1.0})
+    df_to_db(df=df, data_schema=Stock1dKdata, provider='joinquant')
+
+
+def test_recorder_plan():
+    clear_test_data()
+    init_test_entities()
+    save_test_kdata(['2020-01-02', '2020-01-03'])
+
+    recorder = LocalKdataRecorder(codes=test_codes)
+    recorder.plan()
+    assert recorder.planned_latest_timestamps == {test_entity_ids[0]: pd.Timestamp('2020-01-03'),
+                                                  test_entity_ids[1]: None, test_entity_ids[2]: None,
+                                                  test_entity_ids[3]: None, test_entity_ids[4]: None}
+
+    start, _, size, _ = recorder.evaluate_start_end_size_timestamps(recorder.entities[0])
+    assert start == pd.Timestamp('2020-01-03')
+    # only used once
+    assert test_entity_ids[0] not in recorder.planned_latest_timestamps
+    assert recorder.get_latest_saved_timestamp(recorder.entities[0]) == pd.Timestamp('2020-01-03')
+
+    clear_test_data()
+
+
+def test_fixed_cycle_recorder_plan():
+    clear_test_data()
+    init_test_entities()
+    # the unfinished kdata of 2020-01-03
+    save_test_kdata(['2020-01-02', '2020-01-03', '2020-01-03 10:00'])
+
+    recorder = LocalFixedCycleRecorder(codes=test_codes)
+    recorder.plan()
+    assert recorder.planned_latest_timestamps[test_entity_ids[0]] == pd.Timestamp('2020-01-03')
+    assert recorder.planned_latest_timestamps[test_entity_ids[1]] is None
+
+    df = Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_ids[0])
+    assert df['timestamp'].tolist() == [pd.Timestamp('2020-01-02'), pd.Timestamp('2020-01-03')]
+
+    clear_test_data()
+
+
+def test_recorder_ignore_saved():
+    clear_test_data()
+    init_test_entities()
+    save_test_kdata(['2020-01-02'])
+
+    recorder = LocalKdataRecorder(codes=test_codes)
+    recorder.run()
+
+    persisted = dict(recorder.persisted)
+    # the saved one and the duplicated one are ignored
+    assert persisted[test_entity_ids[0]] == [f'{test_entity_ids[0]}_2020-01-03']
+    assert persisted[test_entity_ids[1]] == [f'{test_entity_ids[1]}_2020-01-02', f'{test_entity_ids[1]}_2020-01-03']
+
+    clear_test_data()
+
+
+class LocalKdataDfRecorder(LocalKdataRecorder):
+    def record(self, entity, start, end, size, timestamps):
+        return pd.DataFrame(super().record(entity, start, end, size, timestamps)).assign(level='1d')
+
+
+def test_df_recorder():
+    clear_test_data()
+    init_test_entities()
+    save_test_kdata(['2020-01-02'])
+
+    recorder = LocalKdataDfRecorder(codes=test_codes)
+    recorder.run()
+
+    # the saved one and the duplicated one are ignored,the saved one is not updated
+    df = Stock1dKdata.query_data(provider='joinquant', entity_ids=test_entity_ids, index=None)
+    assert len(df) == 10
+    assert df[df['entity_id'] == test_entity_ids[0]]['close'].tolist() == [1.0, 2.0]
+    assert df[df['entity_id'] == test_entity_ids[1]]['close'].tolist() == [1.0, 2.0]
+    assert (df['level'] == '1d').all()
+    assert df[df['entity_id'] == test_entity_ids[1]]['code'].tolist() == [test_codes[1], test_codes[1]]
+
+    clear_test_data()
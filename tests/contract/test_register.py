@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from ..context import init_test_context
+
+init_test_context()
+
+import os
+
+from sqlalchemy import Column, String
+from sqlalchemy.ext.declarative import declarative_base
+
+from zvt import zvt_env
+from zvt.contract import Mixin
+from zvt.contract.api import get_db_engine, get_schemas
+from zvt.contract.register import register_schema
+from zvt.domain import Stock1dKdata, BalanceSheet
+
+LazyTestBase = declarative_base()
+
+
+class LazyTestSchema(LazyTestBase, Mixin):
+    __tablename__ = 'lazy_test_schema'
+
+    code = Column(String(length=32))
+
+
+def test_lazy_register_schema():
+    db_path = os.path.join(zvt_env['data_path'], 'lazytest_lazy_test.db')
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    register_schema(providers=['lazytest'], db_name='lazy_test', schema_base=LazyTestBase)
+    # the db is not created when registering
+    assert not os.path.exists(db_path)
+
+    df = LazyTestSchema.query_data(provider='lazytest')
+    assert df.empty
+    assert os.path.exists(db_path)
+
+    with get_db_engine('lazytest', db_name='lazy_test').connect() as con:
+        index_list = [row[1] for row in con.execute("PRAGMA INDEX_LIST('lazy_test_schema')")]
+    for col in ['timestamp', 'entity_id', 'code']:
+        assert f'lazy_test_schema_{col}_index' in index_list
+
+
+def test_get_schemas():
+    assert Stock1dKdata in get_schemas(provider='joinquant')
+    assert BalanceSheet in get_schemas(provider='eastmoney')
+    assert BalanceSheet not in get_schemas(provider='joinquant')
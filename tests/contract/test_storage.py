@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+from ..context import init_test_context
+
+init_test_context()
+
+import types
+
+import pandas as pd
+import pytest
+
+from zvt.contract import zvt_context, IntervalLevel
+from zvt.contract.api import df_to_db, get_db_session, get_window_data, get_latest_timestamps, MAX_IN_VALUES
+from zvt.contract.recorder import FixedCycleDataRecorder
+from zvt.contract.register import register_storage
+from zvt.contract.storage import ParquetStorage, Storage
+from zvt.domain import Stock, Stock1dKdata, Stock1mKdata
+
+
+def gen_test_kdata(close=1.0):
+    timestamps = pd.date_range('2019-12-31 23:58', periods=5, freq='1min')
+    dfs = []
+    for entity_id in ['stock_sz_000001', 'stock_sz_000002']:
+        dfs.append(pd.DataFrame({'id': [f'{entity_id}_{t}' for t in timestamps],
+                                 'entity_id': entity_id,
+                                 'code': entity_id[-6:],
+                                 'timestamp': timestamps,
+                                 'level': '1m',
+                                 'close': close}))
+    return pd.concat(dfs)
+
+
+def test_parquet_storage(tmp_path):
+    register_storage([Stock1mKdata], ParquetStorage(root_path=str(tmp_path)))
+    try:
+        df_to_db(df=gen_test_kdata(close=1.0), data_schema=Stock1mKdata, provider='joinquant')
+        # partitioned by level and year
+        assert (tmp_path / 'joinquant' / 'stock_1m_kdata' / 'level=1m' / 'year=2019').exists()
+        assert (tmp_path / 'joinquant' / 'stock_1m_kdata' / 'level=1m' / 'year=2020').exists()
+
+        df = Stock1mKdata.query_data(provider='joinquant')
+        assert len(df) == 10
+        assert df['timestamp'].is_monotonic_increasing
+
+        # ignore the existing ids
+        df_to_db(df=gen_test_kdata(close=2.0), data_schema=Stock1mKdata, provider='joinquant')
+        df = Stock1mKdata.query_data(provider='joinquant')
+        assert len(df) == 10
+        assert (df['close'] == 1.0).all()
+
+        # replace the existing ids
+        df_to_db(df=gen_test_kdata(close=2.0).iloc[:3], data_schema=Stock1mKdata, provider='joinquant',
+                 force_update=True)
+        df = Stock1mKdata.query_data(provider='joinquant')
+        assert len(df) == 10
+        assert (df['close'] == 2.0).sum() == 3
+
+        df = Stock1mKdata.query_data(provider='joinquant', entity_id='stock_sz_000002', columns=['close'],
+                                     start_timestamp='2020-01-01')
+        assert df.columns.tolist() == ['close', 'timestamp']
+        assert len(df) == 3
+
+        domains = Stock1mKdata.query_data(provider='joinquant', filters=[Stock1mKdata.code.in_(['000001'])],
+                                          order=Stock1mKdata.timestamp.desc(), limit=1, return_type='domain')
+        assert domains[0].id == 'stock_sz_000001_2020-01-01 00:02:00'
+    finally:
+        zvt_context.schema_map_storage.pop(Stock1mKdata)
+
+
+def test_parquet_storage_iter(tmp_path):
+    register_storage([Stock1mKdata], ParquetStorage(root_path=str(tmp_path)))
+    try:
+        df_to_db(df=gen_test_kdata(close=1.0), data_schema=Stock1mKdata, provider='joinquant')
+
+        chunks = Stock1mKdata.query_data(provider='joinquant', return_type='iter', chunk_size=2)
+        # lazy
+        assert isinstance(chunks, types.GeneratorType)
+        chunks = list(chunks)
+        assert all(len(chunk) <= 2 for chunk in chunks)
+        df = pd.concat(chunks)
+        assert len(df) == 10
+        assert df['id'].is_unique
+
+        chunks = Stock1mKdata.query_data(provider='joinquant', entity_id='stock_sz_000001', return_type='iter',
+                                         chunk_size=2, limit=3, index='timestamp')
+        assert sum(len(chunk) for chunk in chunks) == 3
+
+        # no data
+        register_storage([Stock1mKdata], ParquetStorage(root_path=str(tmp_path / 'empty')))
+        assert list(Stock1mKdata.query_data(provider='joinquant', return_type='iter')) == []
+    finally:
+        zvt_context.schema_map_storage.pop(Stock1mKdata)
+
+
+def test_storage_abstract():
+    with pytest.raises(TypeError):
+        Storage()
+
+
+def test_parquet_storage_with_big_entity_ids(tmp_path):
+    register_storage([Stock1mKdata], ParquetStorage(root_path=str(tmp_path)))
+    try:
+        df_to_db(df=gen_test_kdata(close=1.0), data_schema=Stock1mKdata, provider='joinquant')
+        entity_ids = ['stock_sz_000001', 'stock_sz_000002'] + [f'stock_sz_not_exist_{i}' for i in
+                                                               range(MAX_IN_VALUES + 100)]
+
+        df = get_window_data(data_schema=Stock1mKdata, provider='joinquant', window=2, entity_ids=entity_ids)
+        assert len(df) == 4
+        df = df.sort_values(['entity_id', 'timestamp'])
+        assert df['timestamp'].tolist() == [pd.Timestamp('2020-01-01 00:01'), pd.Timestamp('2020-01-01 00:02')] * 2
+
+        latest_timestamps = get_latest_timestamps(data_schema=Stock1mKdata, provider='joinquant',
+                                                  entity_ids=entity_ids)
+        assert latest_timestamps.to_dict() == {'stock_sz_000001': pd.Timestamp('2020-01-01 00:02'),
+                                               'stock_sz_000002': pd.Timestamp('2020-01-01 00:02')}
+    finally:
+        zvt_context.schema_map_storage.pop(Stock1mKdata)
+
+
+test_entity_id = 'stock_sz_900021'
+
+
+class LocalParquetKdataRecorder(FixedCycleDataRecorder):
+    provider = 'joinquant'
+    data_schema = Stock1dKdata
+
+    entity_provider = 'joinquant'
+    entity_schema = Stock
+
+    def __init__(self) -> None:
+        super().__init__(entity_type='stock', exchanges=['sz'], codes=[test_entity_id[-6:]], sleeping_time=0,
+                         level=IntervalLevel.LEVEL_1DAY)
+
+    def record(self, entity, start, end, size, timestamps):
+        return [{'timestamp': pd.Timestamp('2020-01-02'), 'close': 1.0},
+                {'timestamp': pd.Timestamp('2020-01-03'), 'close': 2.0}]
+
+    def generate_domain(self, entity, original_data):
+        got_new_data, domain_item = super().generate_domain(entity, original_data)
+        if domain_item:
+            domain_item.level = '1d'
+        return got_new_data, domain_item
+
+
+def clear_test_data():
+    for schema in [Stock, Stock1dKdata]:
+        session = get_db_session(provider='joinquant', data_schema=schema)
+        session.query(schema).filter(schema.entity_id == test_entity_id).delete(synchronize_session=False)
+        session.commit()
+
+
+def test_parquet_storage_recorder(tmp_path):
+    clear_test_data()
+    df_to_db(df=pd.DataFrame({'id': [test_entity_id], 'entity_id': [test_entity_id], 'entity_type': 'stock',
+                              'exchange': 'sz', 'code': test_entity_id[-6:], 'name': 'test',
+                              'timestamp': pd.Timestamp('2020-01-01')}),
+             data_schema=Stock, provider='joinquant', force_update=True)
+
+    register_storage([Stock1dKdata], ParquetStorage(root_path=str(tmp_path)))
+    try:
+        # the unfinished kdata of 2020-01-03
+        df_to_db(df=pd.DataFrame({'id': [f'{test_entity_id}_2020-01-02', f'{test_entity_id}_2020-01-03',
+                                         f'{test_entity_id}_2020-01-03 10:00'],
+                                  'entity_id': test_entity_id, 'level': '1d', 'close': 1.0,
+                                  'timestamp': pd.to_datetime(['2020-01-02', '2020-01-03', '2020-01-03 10:00'])}),
+                 data_schema=Stock1dKdata, provider='joinquant')
+
+        recorder = LocalParquetKdataRecorder()
+        recorder.plan()
+        assert recorder.planned_latest_timestamps[test_entity_id] == pd.Timestamp('2020-01-03')
+        df = Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id)
+        assert df['timestamp'].tolist() == [pd.Timestamp('2020-01-02'), pd.Timestamp('2020-01-03')]
+
+        # deleted by get_latest_saved_record
+        df_to_db(df=pd.DataFrame({'id': [f'{test_entity_id}_2020-01-03 11:00'], 'entity_id': test_entity_id,
+                                  'level': '1d', 'close': 1.0, 'timestamp': [pd.Timestamp('2020-01-03 11:00')]}),
+                 data_schema=Stock1dKdata, provider='joinquant')
+        assert recorder.get_latest_saved_record(recorder.entities[0]).timestamp == pd.Timestamp('2020-01-03')
+        assert len(Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id)) == 2
+
+        # the domains are persisted to the storage
+        recorder = LocalParquetKdataRecorder()
+        recorder.run()
+        df = Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id)
+        assert df['close'].tolist() == [1.0, 2.0]
+    finally:
+        zvt_context.schema_map_storage.pop(Stock1dKdata)
+
+    # nothing in the db
+    assert len(Stock1dKdata.query_data(provider='joinquant', entity_id=test_entity_id)) == 0
+    clear_test_data()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from zvt.contract import IntervalLevel
+from zvt.contract.trading_calendar import TradingCalendar
+
+
+def test_business_days_calendar():
+    calendar = TradingCalendar()
+
+    assert calendar.get_trading_dates('2020-01-01', '2020-01-07').strftime('%Y-%m-%d').tolist() == [
+        '2020-01-01', '2020-01-02', '2020-01-03', '2020-01-06', '2020-01-07']
+
+    timestamps = calendar.get_interval_timestamps('2020-01-03', '2020-01-04', level=IntervalLevel.LEVEL_30MIN)
+    assert timestamps[0] == pd.Timestamp('2020-01-03 09:30')
+    assert timestamps[4] == pd.Timestamp('2020-01-03 11:30')
+    assert timestamps[5] == pd.Timestamp('2020-01-03 13:00')
+    assert timestamps[-1] == pd.Timestamp('2020-01-03 15:00')
+    assert len(timestamps) == 10
+
+    assert calendar.is_finished_kdata_timestamp('2020-01-03 10:00', level=IntervalLevel.LEVEL_30MIN)
+    assert not calendar.is_finished_kdata_timestamp('2020-01-03 10:05', level=IntervalLevel.LEVEL_30MIN)
+    assert not calendar.is_finished_kdata_timestamp('2020-01-04 10:00', level=IntervalLevel.LEVEL_30MIN)
+    assert calendar.is_finished_kdata_timestamp('2020-01-03', level=IntervalLevel.LEVEL_1DAY)
+    assert not calendar.is_finished_kdata_timestamp('2020-01-03 15:00', level=IntervalLevel.LEVEL_1DAY)
+
+
+def test_trading_days_calendar():
+    # 2020-10-01 is holiday
+    days = pd.bdate_range('2020-01-01', '2020-12-31').drop(pd.Timestamp('2020-10-01'))
+    calendar = TradingCalendar(trading_days=days)
+
+    assert not calendar.is_trading_date('2020-10-01')
+    assert calendar.is_trading_date('2020-10-02')
+    assert not calendar.is_finished_kdata_timestamp('2020-10-01', level=IntervalLevel.LEVEL_1DAY)
+    assert pd.Timestamp('2020-10-01') not in calendar.get_trading_dates('2020-09-28', '2020-10-05')
+
+    assert calendar.next_trading_date('2020-09-30') == pd.Timestamp('2020-10-02')
+    assert calendar.prev_trading_date('2020-10-02') == pd.Timestamp('2020-09-30')
+
+    # business days out of the range
+    assert calendar.is_trading_date('2021-01-04')
+    assert calendar.get_trading_dates('2020-12-30', '2021-01-05').strftime('%Y-%m-%d').tolist() == [
+        '2020-12-30', '2020-12-31', '2021-01-01', '2021-01-04', '2021-01-05']
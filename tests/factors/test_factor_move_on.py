@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from ..context import init_test_context, switch_data_path, gen_test_stocks, gen_test_kdata
+
+init_test_context()
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from zvt.contract.api import df_to_db
+from zvt.domain import Stock, Stock1dKdata
+from zvt.factors.ma.ma_factor import MaFactor
+from zvt.factors.ma.ma_stats import MaStateStatsFactor
+from zvt.factors.technical_factor import BullFactor
+
+timestamps = pd.date_range('2019-01-01', periods=80, freq='B')
+
+
+@pytest.fixture()
+def kdata_env(tmp_path):
+    with switch_data_path(str(tmp_path)):
+        stocks = gen_test_stocks(['000001', '000002', '000003'])
+        df_to_db(df=stocks, data_schema=Stock, provider='joinquant', force_update=True)
+        df_to_db(df=gen_test_kdata(stocks['entity_id'].tolist(), timestamps, seed=1), data_schema=Stock1dKdata,
+                 provider='joinquant')
+        yield stocks['entity_id'].tolist()
+
+
+def assert_df_equal(df1, df2, cols):
+    assert df1.index.equals(df2.index)
+    for col in cols:
+        s1, s2 = df1[col], df2[col]
+        if s1.dtype == object or s1.dtype == bool:
+            assert s1.tolist() == s2.tolist()
+        else:
+            assert np.allclose(s1.astype(float), s2.astype(float), equal_nan=True)
+
+
+def move_on_and_compute(factor_cls, entity_ids, **kwargs):
+    # the last 5 bars are added one by one
+    factor = factor_cls(entity_ids=entity_ids, provider='joinquant', start_timestamp=timestamps[0],
+                        end_timestamp=timestamps[-6], **kwargs)
+    for timestamp in timestamps[-5:]:
+        factor.move_on(to_timestamp=timestamp, timeout=0)
+
+    full_factor = factor_cls(entity_ids=entity_ids, provider='joinquant', start_timestamp=timestamps[0],
+                             end_timestamp=timestamps[-1], **kwargs)
+    return factor, full_factor
+
+
+def test_ma_factor_move_on(kdata_env):
+    factor, full_factor = move_on_and_compute(MaFactor, kdata_env, windows=[5, 10])
+    assert len(factor.factor_df) == 3 * len(timestamps)
+    assert_df_equal(factor.factor_df, full_factor.factor_df, ['close', 'ma5', 'ma10'])
+
+
+def test_macd_factor_move_on(kdata_env):
+    factor, full_factor = move_on_and_compute(BullFactor, kdata_env)
+    assert len(factor.factor_df) == 3 * len(timestamps)
+    assert_df_equal(factor.factor_df, full_factor.factor_df, ['close', 'diff', 'dea', 'macd'])
+    assert_df_equal(factor.result_df, full_factor.result_df, ['score'])
+
+
+def test_ma_state_stats_factor_move_on(kdata_env):
+    factor, full_factor = move_on_and_compute(MaStateStatsFactor, kdata_env, computing_window=None,
+                                              need_persist=False)
+    assert len(factor.factor_df) == 3 * len(timestamps)
+    assert_df_equal(factor.factor_df, full_factor.factor_df,
+                    ['ma5', 'ma10', 'current_count', 'current_pct', 'total_count'])
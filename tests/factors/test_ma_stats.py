@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from zvt.factors.ma.ma_stats import MaAccumulator
+from zvt.utils.pd_utils import normal_index_df
+
+
+def gen_pipe_df():
+    timestamps = pd.date_range('2020-01-01', periods=7)
+    dfs = []
+    for entity_id in ['stock_sz_000001', 'stock_sz_000002']:
+        dfs.append(pd.DataFrame({'entity_id': entity_id,
+                                 'timestamp': timestamps,
+                                 'ma5': [np.nan, 2, 2, 2, 0, 0, 2],
+                                 'ma10': [np.nan, 1, 1, 1, 1, 1, 1],
+                                 'change_pct': [np.nan, 0.1, 0.1, 0.1, -0.1, -0.1, 0.1]}))
+    return normal_index_df(pd.concat(dfs), drop=False)
+
+
+def test_ma_accumulator():
+    df = MaAccumulator(short_window=5, long_window=10).acc(gen_pipe_df(), None)
+
+    for entity_id in ['stock_sz_000001', 'stock_sz_000002']:
+        entity_df = df.loc[(entity_id,)]
+        assert np.isnan(entity_df['current_count'][0])
+        assert entity_df['current_count'][1:].tolist() == [1, 2, 3, -1, -2, 1]
+        assert np.allclose(entity_df['current_pct'][1:].tolist(), [0, 0.1, 0.21, 0, -0.1, 0])
+        assert entity_df['total_count'].fillna(0).tolist() == [0, 0, 0, 3, 0, -2, 0]
+
+
+def test_ma_accumulator_incrementally():
+    pipe_df = gen_pipe_df()
+    acc = MaAccumulator(short_window=5, long_window=10)
+
+    # acc the first 5 rows and then acc the rest on it
+    acc_df = acc.acc(pipe_df[pipe_df.index.get_level_values(1) < '2020-01-06'].copy(), None)
+    acc_df = acc.acc(pipe_df.copy(), acc_df)
+
+    df = MaAccumulator(short_window=5, long_window=10).acc(gen_pipe_df(), None)
+
+    for col in ['current_count', 'current_pct', 'total_count']:
+        assert np.allclose(acc_df[col].fillna(0), df[col].fillna(0))
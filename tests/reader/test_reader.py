@@ -5,7 +5,11 @@ init_test_context()
 
 import time
 
+import pandas as pd
+
+from zvt.contract.api import df_to_db, get_db_session
 from zvt.domain import Stock1dKdata, Stock
+from zvt.utils.pd_utils import pd_is_not_null
 
 from zvt.utils.time_utils import to_time_str
 
@@ -53,3 +57,67 @@ def test_reader_move_on():
     start_time = time.time()
     data_reader.move_on(to_timestamp='2019-06-20', timeout=5)
     assert time.time() - start_time < 5
+
+
+def save_test_kdata(entity_id, timestamps):
+    df = pd.DataFrame({'id': [f'{entity_id}_{t}' for t in timestamps],
+                       'entity_id': entity_id,
+                       'code': entity_id[-6:],
+                       'timestamp': pd.to_datetime(timestamps),
+                       'level': '1d',
+                       'close': 1.0})
+    df_to_db(df=df, data_schema=Stock1dKdata, provider='joinquant', force_update=True)
+
+
+def clear_test_kdata(entity_ids):
+    session = get_db_session(provider='joinquant', data_schema=Stock1dKdata)
+    session.query(Stock1dKdata).filter(Stock1dKdata.entity_id.in_(entity_ids)).delete(synchronize_session=False)
+    session.commit()
+
+
+class AddedDataReader(DataReader):
+    def __init__(self, *args, **kwargs) -> None:
+        self.added_dfs = []
+        super().__init__(*args, **kwargs)
+
+    def query_added_data(self, watermarks, to_timestamp=None):
+        df = super().query_added_data(watermarks=watermarks, to_timestamp=to_timestamp)
+        self.added_dfs.append(df)
+        return df
+
+
+def test_reader_move_on_with_watermarks():
+    entity_ids = ['stock_sz_900011', 'stock_sz_900012']
+    clear_test_kdata(entity_ids)
+    # the second one is lagging
+    save_test_kdata(entity_ids[0], ['2020-01-02', '2020-01-10'])
+    save_test_kdata(entity_ids[1], ['2020-01-02', '2020-01-03'])
+
+    data_reader = AddedDataReader(entity_ids=entity_ids, data_schema=Stock1dKdata, entity_schema=Stock,
+                                  provider='joinquant', start_timestamp='2020-01-01', end_timestamp='2020-01-10')
+    assert len(data_reader.data_df) == 4
+
+    # the late one before the watermark of the first entity should not be read
+    save_test_kdata(entity_ids[0], ['2020-01-06', '2020-01-13'])
+    save_test_kdata(entity_ids[1], ['2020-01-06'])
+
+    data_reader.move_on(to_timestamp='2020-01-13', timeout=1)
+    added_df = data_reader.added_dfs[0]
+    assert added_df.index.tolist() == [(entity_ids[0], pd.Timestamp('2020-01-13')),
+                                       (entity_ids[1], pd.Timestamp('2020-01-06'))]
+    assert (entity_ids[0], pd.Timestamp('2020-01-13')) in data_reader.data_df.index
+    assert (entity_ids[1], pd.Timestamp('2020-01-06')) in data_reader.data_df.index
+
+    # only the first one got new data,waiting the second one until timeout
+    save_test_kdata(entity_ids[0], ['2020-01-14'])
+    data_reader.added_dfs = []
+    start_time = time.time()
+    data_reader.move_on(to_timestamp='2020-01-14', timeout=1)
+    assert 1 <= time.time() - start_time < 3
+    assert (entity_ids[0], pd.Timestamp('2020-01-14')) in data_reader.data_df.index
+    assert len(data_reader.data_df.loc[entity_ids[1]]) == 3
+    # the polls after the first entity got data only query the waiting one
+    for df in data_reader.added_dfs[1:]:
+        assert not pd_is_not_null(df)
+
+    clear_test_kdata(entity_ids)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from zvt.recorders.eastmoney.common import is_cache_expired, EastmoneyCache
+
+
+def test_is_cache_expired():
+    # same day
+    assert not is_cache_expired('2020-04-10 08:00', now='2020-04-10 20:00')
+    # in the season
+    assert is_cache_expired('2020-04-09', now='2020-04-10')
+    assert is_cache_expired('2020-10-30', now='2020-10-31')
+    # out of the season
+    assert not is_cache_expired('2020-05-01', now='2020-06-30')
+    assert is_cache_expired('2020-04-30', now='2020-06-30')
+    assert not is_cache_expired('2020-11-02', now='2020-12-31')
+    assert is_cache_expired('2020-08-31', now='2020-09-01')
+
+
+def test_eastmoney_cache(tmp_path):
+    cache = EastmoneyCache(path=str(tmp_path / 'cache.db'))
+    assert cache.get('company_type:00033802') is None
+
+    cache.put('company_type:00033802', '4')
+    cache.put('report_timestamps:1', ['2019-12-31 00:00:00', '2019-09-30 00:00:00'])
+    assert cache.get('company_type:00033802') == '4'
+    assert cache.get('report_timestamps:1') == ['2019-12-31 00:00:00', '2019-09-30 00:00:00']
+
+    # reopen it
+    assert EastmoneyCache(path=str(tmp_path / 'cache.db')).get('company_type:00033802') == '4'
+
+    cache.clear()
+    assert cache.get('company_type:00033802') is None
@@ -1,14 +1,23 @@
 # -*- coding: utf-8 -*-
-from ...context import init_test_context
+from ...context import init_test_context, switch_data_path
 
 init_test_context()
 
+import pandas as pd
+import pytest
+from sqlalchemy import event
+
+from zvt.contract.api import df_to_db
+from zvt.domain import StockDetail, FinanceFactor, BalanceSheet, IncomeStatement, CashFlowStatement
+from zvt.recorders.eastmoney.finance import base_china_stock_finance_recorder
+from zvt.recorders.eastmoney.finance.base_china_stock_finance_recorder import BaseChinaStockFinanceRecorder
 from zvt.settings import SAMPLE_STOCK_CODES
 
 from zvt.recorders.eastmoney.finance.china_stock_finance_factor_recorder import ChinaStockFinanceFactorRecorder
 from zvt.recorders.eastmoney.finance.china_stock_cash_flow_recorder import ChinaStockCashFlowRecorder
 from zvt.recorders.eastmoney.finance.china_stock_balance_sheet_recorder import ChinaStockBalanceSheetRecorder
 from zvt.recorders.eastmoney.finance.china_stock_income_statement_recorder import ChinaStockIncomeStatementRecorder
+from zvt.recorders.eastmoney.finance.china_stock_finance_recorder import ChinaStockFinanceRecorder
 
 
 def test_finance_factor_recorder():
@@ -41,3 +50,111 @@ def test_income_statement_recorder():
         recorder.run()
     except:
         assert False
+
+
+def test_finance_recorder():
+    recorder = ChinaStockFinanceRecorder(codes=SAMPLE_STOCK_CODES)
+    try:
+        recorder.run()
+    except:
+        assert False
+
+
+report_dates = ['2019-03-31', '2019-06-30', '2019-09-30', '2019-12-31']
+publish_dates = ['2019-04-20', '2019-08-20', '2019-10-20']
+
+
+@pytest.fixture()
+def finance_env(tmp_path, monkeypatch):
+    with switch_data_path(str(tmp_path)):
+        yield from init_finance_env(monkeypatch)
+
+
+def init_finance_env(monkeypatch):
+    codes = ['000338', '000778']
+    entity_ids = [f'stock_sz_{code}' for code in codes]
+    df_to_db(df=pd.DataFrame({'id': entity_ids, 'entity_id': entity_ids, 'entity_type': 'stock', 'exchange': 'sz',
+                              'code': codes, 'name': codes, 'timestamp': pd.Timestamp('2000-01-01'),
+                              'industries': '机械'}),
+             data_schema=StockDetail, provider='joinquant', force_update=True)
+
+    # the report dates and the statements from eastmoney
+    report_calls = []
+
+    def get_report_timestamps(**kwargs):
+        report_calls.append(kwargs)
+        return [pd.Timestamp(report_date) for report_date in report_dates]
+
+    monkeypatch.setattr(base_china_stock_finance_recorder, 'get_report_timestamps', get_report_timestamps)
+    monkeypatch.setattr(BaseChinaStockFinanceRecorder, 'record',
+                        lambda self, entity, start, end, size, timestamps: [{'ReportDate': report_date} for
+                                                                            report_date in report_dates])
+    # the publish dates from jq,the last report date is not published
+    calls = []
+
+    def get_fundamentals(**kwargs):
+        calls.append(kwargs)
+        return pd.DataFrame({'statDate': pd.to_datetime(report_dates[:3]), 'pubDate': pd.to_datetime(publish_dates)})
+
+    monkeypatch.setattr(base_china_stock_finance_recorder, 'get_fundamentals', get_fundamentals)
+
+    yield codes, calls, report_calls
+
+
+def test_finance_recorder_commit_by_entity(finance_env):
+    codes, _, report_calls = finance_env
+    schemas = [FinanceFactor, BalanceSheet, IncomeStatement, CashFlowStatement]
+
+    recorder = ChinaStockFinanceRecorder(codes=codes, sleeping_time=0)
+    session = recorder.session
+
+    # the saved entities of the statements after every commit
+    committed = []
+
+    def after_commit(session):
+        committed.append([set(schema.query_data(provider='eastmoney', columns=['entity_id'])['entity_id']) for
+                          schema in schemas])
+
+    event.listen(session, 'after_commit', after_commit)
+
+    finished = []
+    for r in recorder.recorders:
+        r.on_finish = lambda r=r: finished.append(r)
+
+    try:
+        recorder.run()
+    finally:
+        event.remove(session, 'after_commit', after_commit)
+
+    entity_ids = [f'stock_sz_{code}' for code in codes]
+    # the report dates are fetched once for the statements of the entity
+    assert len(report_calls) == len(codes)
+    assert committed == [[{entity_ids[0]}] * 4, [set(entity_ids)] * 4]
+    assert finished == recorder.recorders
+
+    for schema in schemas:
+        df = schema.query_data(provider='eastmoney', entity_id=entity_ids[1], order=schema.report_date.asc())
+        assert df['timestamp'].tolist() == pd.to_datetime(publish_dates + report_dates[3:]).tolist()
+
+
+def test_fetch_jq_publish_dates_by_entity(finance_env):
+    codes, calls, _ = finance_env
+
+    recorder = ChinaStockFinanceFactorRecorder(codes=codes, sleeping_time=0)
+    recorder.run()
+
+    # one request for all the report dates of the entity
+    assert len(calls) == len(codes)
+    for code, call in zip(codes, sorted(calls, key=lambda call: call['code'])):
+        assert call['table'] == 'indicator'
+        assert call['code'] == f'{code}.XSHE'
+        # the quarters from 2019q1 to 2019q4
+        assert call['date'] == '2019q4'
+        assert call['count'] == 4
+
+    for code in codes:
+        df = FinanceFactor.query_data(provider='eastmoney', entity_id=f'stock_sz_{code}',
+                                      order=FinanceFactor.report_date.asc())
+        assert df['report_date'].tolist() == pd.to_datetime(report_dates).tolist()
+        # the unpublished one keeps the report date
+        assert df['timestamp'].tolist() == pd.to_datetime(publish_dates + report_dates[3:]).tolist()
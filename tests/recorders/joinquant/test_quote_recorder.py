@@ -3,8 +3,12 @@ from ...context import init_test_context
 
 init_test_context()
 
-from zvt.contract import IntervalLevel
+import pandas as pd
 
+from zvt.contract import IntervalLevel
+from zvt.contract.api import df_to_db, get_db_session
+from zvt.domain import Stock, Stock1dKdata
+from zvt.recorders.joinquant.quotes import jq_stock_kdata_recorder
 from zvt.settings import SAMPLE_STOCK_CODES
 from zvt.recorders.joinquant.quotes.jq_stock_kdata_recorder import JqChinaStockKdataRecorder
 
@@ -61,3 +65,43 @@ def test_5m_kdata_recorder():
         recorder.run()
     except:
         assert False
+
+
+def test_recompute_qfq(monkeypatch):
+    monkeypatch.setattr(jq_stock_kdata_recorder, 'get_token', lambda *args, **kwargs: None)
+
+    entity = Stock(id='stock_sz_900031', entity_id='stock_sz_900031', entity_type='stock', exchange='sz',
+                   code='900031', name='900031')
+    session = get_db_session(provider='joinquant', data_schema=Stock1dKdata)
+    session.query(Stock1dKdata).filter(Stock1dKdata.entity_id == entity.id).delete()
+    session.commit()
+
+    timestamps = pd.date_range('2020-01-01', periods=6)
+    df_to_db(df=pd.DataFrame({'id': [f'{entity.id}_{t.date()}' for t in timestamps],
+                              'entity_id': entity.id,
+                              'code': entity.code,
+                              'timestamp': timestamps,
+                              'level': '1d',
+                              'open': 10.0,
+                              'close': 11.0,
+                              'high': 12.0,
+                              'low': 9.0,
+                              'volume': 100.0}),
+             data_schema=Stock1dKdata, provider='joinquant')
+
+    recorder = JqChinaStockKdataRecorder(entity_ids=[entity.id], level=IntervalLevel.LEVEL_1DAY)
+    recorder.recompute_qfq(entity, qfq_factor=0.5, last_timestamp=timestamps[3])
+
+    df = Stock1dKdata.query_data(provider='joinquant', entity_id=entity.id, order=Stock1dKdata.timestamp.asc())
+    assert len(df) == 6
+    before = df[df['timestamp'] < timestamps[3]]
+    assert len(before) == 3
+    assert (before[['open', 'close', 'high', 'low']].values == [5.0, 5.5, 6.0, 4.5]).all()
+    assert (before['volume'] == 100.0).all()
+    # the rows from the cutoff are unchanged
+    after = df[df['timestamp'] >= timestamps[3]]
+    assert len(after) == 3
+    assert (after[['open', 'close', 'high', 'low']].values == [10.0, 11.0, 12.0, 9.0]).all()
+
+    session.query(Stock1dKdata).filter(Stock1dKdata.entity_id == entity.id).delete()
+    session.commit()
@@ -1 +1,27 @@
 # -*- coding: utf-8 -*-
+from ...context import init_test_context
+
+init_test_context()
+
+from zvt.domain import Stock, Block
+from zvt.recorders.sina.money_flow import sina_block_money_flow_recorder, sina_stock_money_flow_recorder
+from zvt.recorders.sina.money_flow import SinaBlockMoneyFlowRecorder, SinaStockMoneyFlowRecorder
+
+
+class BadResponse(object):
+    text = '<html>limited</html>'
+    encoding = None
+
+
+def test_money_flow_recorder_bad_response(monkeypatch):
+    monkeypatch.setattr(sina_stock_money_flow_recorder, 'http_get', lambda *args, **kwargs: BadResponse())
+    monkeypatch.setattr(sina_block_money_flow_recorder, 'http_get', lambda *args, **kwargs: BadResponse())
+
+    recorder = SinaStockMoneyFlowRecorder(entity_ids=['stock_sz_900041'])
+    entity = Stock(id='stock_sz_900041', entity_id='stock_sz_900041', exchange='sz', code='900041', name='900041')
+    assert recorder.record(entity, start=None, end=None, size=10, timestamps=None) is None
+
+    recorder = SinaBlockMoneyFlowRecorder(entity_ids=['block_cn_900041'])
+    entity = Block(id='block_cn_900041', entity_id='block_cn_900041', code='900041', name='900041',
+                   category='industry')
+    assert recorder.record(entity, start=None, end=None, size=10, timestamps=None) is None
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from ..context import init_test_context
+
+init_test_context()
+
+import pandas as pd
+
+from zvt.contract.api import df_to_db, get_db_session
+from zvt.domain import Stock1dKdata
+from zvt.trader.account import PriceOracle
+
+test_entity_id = 'stock_sz_test'
+
+
+def clear_test_kdata():
+    session = get_db_session(provider='joinquant', data_schema=Stock1dKdata)
+    session.query(Stock1dKdata).filter(Stock1dKdata.entity_id == test_entity_id).delete()
+    session.commit()
+
+
+def save_test_kdata(timestamps, closes):
+    df = pd.DataFrame({'id': [f'{test_entity_id}_{pd.Timestamp(t).date()}' for t in timestamps],
+                       'entity_id': test_entity_id,
+                       'timestamp': pd.to_datetime(timestamps),
+                       'level': '1d',
+                       'close': closes})
+    df_to_db(df=df, data_schema=Stock1dKdata, provider='joinquant')
+
+
+def test_price_oracle():
+    clear_test_kdata()
+    save_test_kdata(['2000-01-03', '2000-01-04', '2000-01-06'], [1.0, 2.0, 3.0])
+
+    oracle = PriceOracle(start_timestamp='2000-01-01', end_timestamp='2000-01-31', provider='joinquant')
+    oracle.load([test_entity_id])
+
+    assert oracle.get_price(test_entity_id, '2000-01-04') == 2.0
+    assert oracle.get_price(test_entity_id, '2000-01-05') is None
+    assert oracle.get_latest_price(test_entity_id, '2000-01-05') == 2.0
+    assert oracle.get_latest_price(test_entity_id, '2000-01-10') == 3.0
+    assert oracle.get_latest_price(test_entity_id, '2000-01-01') is None
+
+    # backtest never touch db after loading
+    save_test_kdata(['2000-01-07'], [4.0])
+    assert oracle.get_price(test_entity_id, '2000-01-07') is None
+
+    # real time mode top up the new kdata
+    oracle = PriceOracle(start_timestamp='2000-01-01', provider='joinquant', real_time=True)
+    clear_test_kdata()
+    save_test_kdata(['2000-01-03', '2000-01-04'], [1.0, 2.0])
+    assert oracle.get_latest_price(test_entity_id, '2000-01-04') == 2.0
+    save_test_kdata(['2000-01-05'], [3.0])
+    assert oracle.get_price(test_entity_id, '2000-01-05') == 3.0
+    assert oracle.get_latest_price(test_entity_id, '2000-01-10') == 3.0
+
+    clear_test_kdata()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from zvt.utils.http_utils import RateLimiter, http_get, http_post, set_rate_limit, http_fixture, FixtureNotFoundError
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    # 2 burst,4 waiting 1/20s
+    assert 0.15 <= time.monotonic() - start < 1
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    calls = 0
+
+    def do_GET(self):
+        FlakyHandler.calls += 1
+        # fail the first 2 calls
+        status = 503 if FlakyHandler.calls <= 2 else 200
+        self.send_response(status)
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_http_get_retry():
+    server = HTTPServer(('127.0.0.1', 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = '127.0.0.1:{}'.format(server.server_port)
+    set_rate_limit(host, rate=0)
+
+    try:
+        resp = http_get('http://{}/'.format(host), backoff=0.01)
+        assert resp.status_code == 200
+        assert resp.text == 'ok'
+        assert FlakyHandler.calls == 3
+
+        FlakyHandler.calls = 0
+        resp = http_get('http://{}/'.format(host), retry=1, backoff=0.01)
+        assert resp.status_code == 503
+    finally:
+        server.shutdown()
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    calls = 0
+
+    def do_POST(self):
+        EchoHandler.calls += 1
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_http_fixture(tmp_path):
+    server = HTTPServer(('127.0.0.1', 0), EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:{}/'.format(server.server_port)
+
+    try:
+        with http_fixture(str(tmp_path), mode='record'):
+            assert http_post(url, json={'code': '000338'}).json() == {'code': '000338'}
+        assert EchoHandler.calls == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # the server is down,replay it
+    with http_fixture(str(tmp_path), mode='replay', latency=0.05):
+        start = time.monotonic()
+        resp = http_post(url, json={'code': '000338'})
+        assert time.monotonic() - start >= 0.05
+        assert resp.status_code == 200
+        assert resp.json() == {'code': '000338'}
+        assert resp.headers['Content-Type'] == 'application/json; charset=utf-8'
+
+        with pytest.raises(FixtureNotFoundError):
+            http_post(url, json={'code': '000001'})
@@ -110,6 +110,6 @@ else:
     init_env(zvt_home=ZVT_HOME)
 
 import zvt.domain as domain
-import zvt.recorders as recorders
 
-__all__ = ['domain', 'recorders', 'zvt_env', 'init_log', 'init_env']
+# zvt.recorders(and the network clients) is not imported here,import it as need
+__all__ = ['domain', 'zvt_env', 'init_log', 'init_env']
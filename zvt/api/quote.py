@@ -7,10 +7,12 @@ import pandas as pd
 from sqlalchemy import exists, and_
 
 from zvt.api import AdjustType
-from zvt.contract import IntervalLevel
-from zvt.contract.api import decode_entity_id, get_schema_by_name
+from zvt.contract import IntervalLevel, zvt_context
+from zvt.contract.api import decode_entity_id, get_schema_by_name, get_window_data, get_data, \
+    get_latest_timestamps, df_to_db
+from zvt.contract.trading_calendar import TradingCalendar
 from zvt.domain import *
-from zvt.utils.pd_utils import pd_is_not_null
+from zvt.utils.pd_utils import pd_is_not_null, index_df
 from zvt.utils.time_utils import to_pd_timestamp, now_pd_timestamp, to_time_str, TIME_FORMAT_DAY, TIME_FORMAT_ISO8601
 
 
@@ -130,59 +132,173 @@ def to_jq_report_period(timestamp):
     assert False
 
 
-def to_high_level_kdata(kdata_df: pd.DataFrame, to_level: IntervalLevel):
-    def to_close(s):
-        if pd_is_not_null(s):
-            return s[-1]
-
-    def to_open(s):
-        if pd_is_not_null(s):
-            return s[0]
+def get_high_level_timestamps(timestamps: pd.Series,
+                              to_level: IntervalLevel,
+                              trading_calendar: TradingCalendar = None,
+                              use_begin_time: bool = False) -> pd.Series:
+    """
+    map the kdata timestamps to the timestamps of the to_level kdata which they belong to
+
+    the intraday kdata are split by the trading intervals(the session boundaries) of the calendar,
+    the bar at the session start(e.g. 09:30,13:00) belongs to the first interval of the session.
+    the week and month kdata are labeled by the last weekday of the period,it doesn't depend on the coverage
+    of the calendar or the data,so the id of the bar is stable
+
+    :param timestamps:
+    :param to_level:
+    :param trading_calendar:
+    :param use_begin_time: the kdata timestamp is the begin time of it,default is the end time
+    :return:
+    """
+    to_level = IntervalLevel(to_level)
+    if trading_calendar is None:
+        trading_calendar = TradingCalendar()
+
+    timestamps = pd.to_datetime(timestamps)
+    days = timestamps.dt.normalize()
+
+    if to_level < IntervalLevel.LEVEL_1DAY:
+        offsets = trading_calendar.get_offsets(to_level)
+        # end label can't be the session start and begin label can't be the session end
+        bounds = [start if not use_begin_time else end for start, end in trading_calendar.trading_intervals]
+        offsets = offsets[~np.isin(offsets, pd.to_timedelta([bound + ':00' for bound in bounds]).values)]
+
+        day_offsets = (timestamps - days).values
+        if use_begin_time:
+            index = np.searchsorted(offsets, day_offsets, side='right') - 1
+        else:
+            index = np.searchsorted(offsets, day_offsets, side='left')
+        index = np.clip(index, 0, len(offsets) - 1)
+        return pd.Series(days.values + offsets[index], index=timestamps.index)
 
-    def to_high(s):
-        return np.max(s)
+    if to_level == IntervalLevel.LEVEL_1DAY:
+        return days
 
-    def to_low(s):
-        return np.min(s)
+    if to_level == IntervalLevel.LEVEL_1WEEK:
+        freq = 'W'
+    elif to_level == IntervalLevel.LEVEL_1MON:
+        freq = 'M'
+    else:
+        raise ValueError('not support level:{}'.format(to_level))
+
+    ends = days.dt.to_period(freq).dt.end_time.dt.normalize()
+    # roll the weekend back to friday
+    return ends - pd.to_timedelta((ends.dt.weekday - 4).clip(lower=0), unit='D')
+
+
+def to_high_level_kdata(kdata_df: pd.DataFrame,
+                        to_level: IntervalLevel,
+                        trading_calendar: TradingCalendar = None,
+                        use_begin_time: bool = False) -> pd.DataFrame:
+    """
+    aggregate the kdata of the entities to higher level,e.g,1m->5m/15m/30m/1h/1d,1d->1wk/1mon
+
+    :param kdata_df: the kdata of one or more entities
+    :param to_level:
+    :param trading_calendar: the calendar of the entity type is used if not set
+    :param use_begin_time: the kdata timestamp is the begin time of it,default is the end time
+    :return: the df with index timestamp
+    """
+    to_level = IntervalLevel(to_level)
+
+    if 'timestamp' in kdata_df.columns:
+        df = kdata_df.reset_index(drop=True)
+    else:
+        df = kdata_df.reset_index()
 
-    def to_sum(s):
-        return np.sum(s)
+    original_level = IntervalLevel(df['level'].iloc[0])
+    assert original_level < to_level
 
-    original_level = kdata_df['level'][0]
-    entity_id = kdata_df['entity_id'][0]
-    provider = kdata_df['provider'][0]
-    name = kdata_df['name'][0]
-    code = kdata_df['code'][0]
+    entity_type, _, _ = decode_entity_id(entity_id=df['entity_id'].iloc[0])
+    if trading_calendar is None:
+        entity_schema = zvt_context.entity_schema_map.get(entity_type)
+        trading_calendar = entity_schema.get_trading_calendar() if entity_schema else TradingCalendar()
 
-    entity_type, _, _ = decode_entity_id(entity_id=entity_id)
+    df = df.sort_values(['entity_id', 'timestamp'])
+    df['timestamp'] = get_high_level_timestamps(df['timestamp'], to_level=to_level,
+                                                trading_calendar=trading_calendar, use_begin_time=use_begin_time)
 
-    assert IntervalLevel(original_level) <= IntervalLevel.LEVEL_1DAY
-    assert IntervalLevel(original_level) < IntervalLevel(to_level)
+    agg = {'provider': 'first', 'code': 'first', 'name': 'first',
+           'open': 'first', 'close': 'last', 'high': 'max', 'low': 'min'}
+    for col in ['volume', 'turnover', 'turnover_rate']:
+        if col in df.columns:
+            agg[col] = 'sum'
+    agg = {col: func for col, func in agg.items() if col in df.columns}
 
-    df: pd.DataFrame = None
-    if to_level == IntervalLevel.LEVEL_1WEEK:
-        # loffset='-2'　用周五作为时间标签
-        if entity_type == 'stock':
-            df = kdata_df.resample('W', loffset=pd.DateOffset(days=-2)).apply({'close': to_close,
-                                                                               'open': to_open,
-                                                                               'high': to_high,
-                                                                               'low': to_low,
-                                                                               'volume': to_sum,
-                                                                               'turnover': to_sum})
-        else:
-            df = kdata_df.resample('W', loffset=pd.DateOffset(days=-2)).apply({'close': to_close,
-                                                                               'open': to_open,
-                                                                               'high': to_high,
-                                                                               'low': to_low,
-                                                                               'volume': to_sum,
-                                                                               'turnover': to_sum})
-    df = df.dropna()
-    # id        entity_id  timestamp   provider    code  name level
-    df['entity_id'] = entity_id
-    df['provider'] = provider
-    df['code'] = code
-    df['name'] = name
+    df = df.groupby(['entity_id', 'timestamp'], sort=False).agg(agg).reset_index()
+    df = df.dropna(subset=['close'])
 
+    df['level'] = to_level.value
+    if to_level >= IntervalLevel.LEVEL_1DAY:
+        time_str = df['timestamp'].dt.strftime('%Y-%m-%d')
+    else:
+        time_str = df['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.000')
+    # the same as generate_kdata_id
+    df['id'] = df['entity_id'] + '_' + time_str
+    df['change_pct'] = df['close'] / df.groupby('entity_id')['close'].shift(1) - 1
+
+    return index_df(df, index='timestamp', drop=False)
+
+
+def derive_high_level_kdata(provider: str,
+                            to_level: IntervalLevel,
+                            from_level: IntervalLevel = IntervalLevel.LEVEL_1DAY,
+                            entity_type: str = 'stock',
+                            entity_ids: List[str] = None,
+                            adjust_type: AdjustType = None) -> pd.DataFrame:
+    """
+    compute the to_level kdata from the saved from_level kdata and save them,
+    only the bars from the latest saved one(which may be incomplete) are recomputed
+
+    :param provider:
+    :param to_level:
+    :param from_level:
+    :param entity_type:
+    :param entity_ids:
+    :param adjust_type:
+    :return: the saved df
+    """
+    from_schema = get_kdata_schema(entity_type, level=from_level, adjust_type=adjust_type)
+    to_schema = get_kdata_schema(entity_type, level=to_level, adjust_type=adjust_type)
+
+    if not entity_ids:
+        entity_ids = get_latest_timestamps(data_schema=from_schema, provider=provider).index.tolist()
+        if not entity_ids:
+            return None
+
+    # the latest 2 saved bars:the last one is recomputed,the one before is the pre close of it
+    saved_df = get_window_data(data_schema=to_schema, provider=provider, window=2, entity_ids=entity_ids)
+
+    start_timestamp = None
+    latest_timestamps = pd.Series(dtype='datetime64[ns]')
+    pre_closes = pd.Series(dtype=float)
+    if pd_is_not_null(saved_df):
+        grouped = saved_df.groupby('entity_id')
+        latest_timestamps = grouped['timestamp'].last()
+        pre_closes = saved_df[saved_df['timestamp'] < saved_df['entity_id'].map(latest_timestamps)].groupby(
+            'entity_id')['close'].last()
+
+        # all the entities have the bar before the latest one
+        saved_entity_ids = set(latest_timestamps.index)
+        if set(entity_ids) <= saved_entity_ids and len(pre_closes) == len(latest_timestamps):
+            start_timestamp = grouped['timestamp'].first().min()
+
+    filters = [from_schema.timestamp > start_timestamp] if start_timestamp is not None else None
+    kdata_df = get_data(data_schema=from_schema, provider=provider, entity_ids=entity_ids, filters=filters)
+    if not pd_is_not_null(kdata_df):
+        return None
+
+    df = to_high_level_kdata(kdata_df, to_level=to_level).reset_index(drop=True)
+
+    # keep the bars from the latest saved one
+    latest = df['entity_id'].map(latest_timestamps)
+    df = df[latest.isna() | (df['timestamp'] >= latest)]
+
+    first = ~df['entity_id'].duplicated()
+    df.loc[first, 'change_pct'] = df.loc[first, 'change_pct'].fillna(
+        df.loc[first, 'close'] / df.loc[first, 'entity_id'].map(pre_closes) - 1)
+
+    df_to_db(df=df, data_schema=to_schema, provider=provider, force_update=True)
     return df
 
 
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from zvt.bench.data import *
+from zvt.bench.runner import *
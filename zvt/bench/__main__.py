@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+from zvt.bench.runner import main
+
+if __name__ == '__main__':
+    main()
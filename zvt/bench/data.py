@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from zvt.contract import IntervalLevel
+from zvt.domain import Stock
+
+
+def gen_stocks(size: int) -> pd.DataFrame:
+    """
+    generate the synthetic stocks,the codes are 000000,000001...
+
+    :param size: stock count
+    :return:
+    """
+    codes = ['{:06d}'.format(i) for i in range(size)]
+    entity_ids = [f'stock_sz_{code}' for code in codes]
+    return pd.DataFrame({'id': entity_ids,
+                         'entity_id': entity_ids,
+                         'entity_type': 'stock',
+                         'exchange': 'sz',
+                         'code': codes,
+                         'name': codes,
+                         'timestamp': pd.Timestamp('2000-01-01'),
+                         'list_date': pd.Timestamp('2000-01-01')})
+
+
+def gen_kdata(entity_ids: List[str],
+              timestamps: pd.DatetimeIndex,
+              level: IntervalLevel = IntervalLevel.LEVEL_1DAY,
+              seed: int = 0) -> pd.DataFrame:
+    """
+    generate the deterministic kdata by random walk,the same (entity_ids,timestamps,seed) always get the same result
+
+    :param entity_ids:
+    :param timestamps:
+    :param level:
+    :param seed:
+    :return:
+    """
+    level = IntervalLevel(level)
+    random_state = np.random.RandomState(seed)
+
+    size = len(timestamps)
+    dfs = []
+    for entity_id in entity_ids:
+        change_pct = random_state.normal(0, 0.02, size)
+        close = 10 * np.cumprod(1 + change_pct)
+        open = close / (1 + change_pct)
+        high = np.maximum(open, close) * (1 + np.abs(random_state.normal(0, 0.01, size)))
+        low = np.minimum(open, close) * (1 - np.abs(random_state.normal(0, 0.01, size)))
+        volume = random_state.randint(10000, 1000000, size).astype(float)
+
+        # the same id format as generate_kdata_id
+        if level >= IntervalLevel.LEVEL_1DAY:
+            time_str = timestamps.strftime('%Y-%m-%d')
+        else:
+            time_str = timestamps.strftime('%Y-%m-%dT%H:%M:%S.000')
+        dfs.append(pd.DataFrame({'id': [f'{entity_id}_{t}' for t in time_str],
+                                 'entity_id': entity_id,
+                                 'provider': 'joinquant',
+                                 'code': entity_id.split('_')[2],
+                                 'name': entity_id.split('_')[2],
+                                 'timestamp': timestamps,
+                                 'level': level.value,
+                                 'open': open,
+                                 'close': close,
+                                 'high': high,
+                                 'low': low,
+                                 'volume': volume,
+                                 'turnover': volume * close,
+                                 'change_pct': change_pct,
+                                 'turnover_rate': volume / 1e8}))
+    return pd.concat(dfs, ignore_index=True)
+
+
+def get_timestamps(start_timestamp, end_timestamp, level: IntervalLevel = IntervalLevel.LEVEL_1DAY):
+    level = IntervalLevel(level)
+    return pd.DatetimeIndex(list(Stock.get_interval_timestamps(start_date=start_timestamp, end_date=end_timestamp,
+                                                                level=level)))
+
+
+__all__ = ['gen_stocks', 'gen_kdata', 'get_timestamps']
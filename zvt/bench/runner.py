@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import List
+
+import pandas as pd
+
+from zvt import zvt_env
+from zvt.api.quote import get_kdata_schema
+from zvt.bench.data import gen_stocks, gen_kdata, get_timestamps
+from zvt.contract import IntervalLevel, zvt_context
+from zvt.contract.api import df_to_db
+from zvt.contract.data_cache import data_cache
+from zvt.contract.reader import DataReader
+from zvt.domain import Stock
+from zvt.factors.ma.ma_factor import MaFactor
+from zvt.factors.ma.ma_stats import MaStateStatsFactor
+from zvt.factors.target_selector import TargetSelector
+from zvt.factors.technical_factor import BullFactor
+from zvt.trader.trader import StockTrader
+
+logger = logging.getLogger(__name__)
+
+ALL_CASES = ['df_to_db', 'get_data', 'move_on', 'ma_factor', 'ma_state_stats_factor', 'target_selector', 'trader']
+
+
+def init_bench_env(data_path: str):
+    """
+    use data_path to store the dbs,the state of the old data path are dropped:
+    the engines,sessions,cached query results and trading calendars(the default parquet root follows data_path)
+    """
+    os.makedirs(data_path, exist_ok=True)
+    zvt_env['data_path'] = data_path
+    zvt_context.db_engine_map.clear()
+    zvt_context.db_session_map.clear()
+    zvt_context.sessions.clear()
+    data_cache.clear()
+    for entity_schema in zvt_context.entity_schema_map.values():
+        if '_trading_calendar' in entity_schema.__dict__:
+            delattr(entity_schema, '_trading_calendar')
+
+
+class BenchTrader(StockTrader):
+    def init_selectors(self, entity_ids, entity_schema, exchanges, codes, start_timestamp, end_timestamp):
+        selector = TargetSelector(entity_ids=entity_ids, entity_schema=entity_schema, exchanges=exchanges,
+                                  codes=codes, start_timestamp=start_timestamp, end_timestamp=end_timestamp,
+                                  provider='joinquant', level=self.level)
+        selector.add_filter_factor(
+            BullFactor(entity_ids=entity_ids, entity_schema=entity_schema, exchanges=exchanges, codes=codes,
+                       start_timestamp=start_timestamp, end_timestamp=end_timestamp, provider='joinquant',
+                       level=self.level))
+        self.selectors.append(selector)
+
+
+class Bench(object):
+    """
+    time the hot paths on the synthetic data,the results are like:
+
+    [{'name': 'get_data', 'seconds': 1.2, 'rows': 1000}...]
+    """
+
+    def __init__(self,
+                 stock_size: int = 100,
+                 start_timestamp='2018-01-01',
+                 end_timestamp='2019-12-31',
+                 level: IntervalLevel = IntervalLevel.LEVEL_1DAY,
+                 cases: List[str] = None,
+                 seed: int = 0) -> None:
+        self.stock_size = stock_size
+        self.start_timestamp = pd.Timestamp(start_timestamp)
+        self.end_timestamp = pd.Timestamp(end_timestamp)
+        self.level = IntervalLevel(level)
+        self.cases = cases if cases else ALL_CASES
+        self.seed = seed
+
+        self.kdata_schema = get_kdata_schema('stock', level=self.level)
+        self.entity_ids = None
+        self.timestamps = None
+        self.results = []
+
+    @contextmanager
+    def timing(self, name, **kwargs):
+        start = time.perf_counter()
+        result = dict(name=name, **kwargs)
+        yield result
+        result['seconds'] = round(time.perf_counter() - start, 4)
+        self.results.append(result)
+        logger.info('bench:{}'.format(result))
+
+    def prepare(self):
+        stocks = gen_stocks(self.stock_size)
+        df_to_db(df=stocks, data_schema=Stock, provider='joinquant', force_update=True)
+        self.entity_ids = stocks['entity_id'].tolist()
+
+        self.timestamps = get_timestamps(self.start_timestamp, self.end_timestamp, level=self.level)
+        kdata = gen_kdata(self.entity_ids, self.timestamps, level=self.level, seed=self.seed)
+
+        # the kdata is always saved,time it only if want
+        if 'df_to_db' in self.cases:
+            with self.timing('df_to_db', rows=len(kdata)):
+                df_to_db(df=kdata, data_schema=self.kdata_schema, provider='joinquant')
+        else:
+            df_to_db(df=kdata, data_schema=self.kdata_schema, provider='joinquant')
+
+    def bench_get_data(self):
+        with self.timing('get_data', case='all') as result:
+            df = self.kdata_schema.query_data(provider='joinquant', entity_ids=self.entity_ids)
+            result['rows'] = len(df)
+
+        with self.timing('get_data', case='columns') as result:
+            df = self.kdata_schema.query_data(provider='joinquant', entity_ids=self.entity_ids,
+                                              columns=['entity_id', 'timestamp', 'close'])
+            result['rows'] = len(df)
+
+        with self.timing('get_data', case='one_entity') as result:
+            df = self.kdata_schema.query_data(provider='joinquant', entity_id=self.entity_ids[0])
+            result['rows'] = len(df)
+
+    def bench_move_on(self):
+        reader = DataReader(data_schema=self.kdata_schema, entity_schema=Stock, provider='joinquant',
+                            entity_ids=self.entity_ids, start_timestamp=self.start_timestamp,
+                            end_timestamp=self.timestamps[-2], level=self.level)
+
+        with self.timing('move_on') as result:
+            reader.move_on(to_timestamp=self.timestamps[-1], timeout=0)
+            result['rows'] = len(reader.data_df)
+
+    def bench_ma_factor(self):
+        with self.timing('ma_factor') as result:
+            factor = MaFactor(entity_ids=self.entity_ids, provider='joinquant', start_timestamp=self.start_timestamp,
+                              end_timestamp=self.end_timestamp, level=self.level)
+            result['rows'] = len(factor.factor_df)
+
+    def bench_ma_state_stats_factor(self):
+        with self.timing('ma_state_stats_factor') as result:
+            factor = MaStateStatsFactor(entity_ids=self.entity_ids, provider='joinquant',
+                                        start_timestamp=self.start_timestamp, end_timestamp=self.end_timestamp,
+                                        level=self.level, need_persist=False)
+            result['rows'] = len(factor.factor_df)
+
+    def bench_target_selector(self):
+        selector = TargetSelector(entity_ids=self.entity_ids, entity_schema=Stock, provider='joinquant',
+                                  start_timestamp=self.start_timestamp, end_timestamp=self.end_timestamp,
+                                  level=self.level)
+        selector.add_filter_factor(
+            BullFactor(entity_ids=self.entity_ids, provider='joinquant', start_timestamp=self.start_timestamp,
+                       end_timestamp=self.end_timestamp, level=self.level))
+
+        with self.timing('target_selector') as result:
+            selector.run()
+            result['rows'] = len(selector.open_long_df) if selector.open_long_df is not None else 0
+
+    def bench_trader(self):
+        with self.timing('trader', case='init'):
+            trader = BenchTrader(entity_ids=self.entity_ids, start_timestamp=self.start_timestamp,
+                                 end_timestamp=self.end_timestamp, provider='joinquant', level=self.level,
+                                 trader_name='bench_trader', draw_result=False)
+        with self.timing('trader', case='run'):
+            trader.run()
+
+    def run(self) -> dict:
+        self.prepare()
+
+        for case in self.cases:
+            if case != 'df_to_db':
+                getattr(self, 'bench_{}'.format(case))()
+
+        return {
+            'params': {
+                'stock_size': self.stock_size,
+                'start_timestamp': str(self.start_timestamp),
+                'end_timestamp': str(self.end_timestamp),
+                'level': self.level.value,
+                'seed': self.seed,
+                'python': platform.python_version(),
+                'pandas': pd.__version__
+            },
+            'results': self.results
+        }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='benchmark zvt on the synthetic data,e.g. '
+                                                 '--stocks 5000 --start 2000-01-01 --end 2019-12-31 or '
+                                                 '--stocks 500 --level 1m --start 2019-01-01 --end 2019-12-31')
+    parser.add_argument('--stocks', help='stock count', type=int, default=100)
+    parser.add_argument('--start', help='start timestamp', default='2018-01-01')
+    parser.add_argument('--end', help='end timestamp', default='2019-12-31')
+    parser.add_argument('--level', help='kdata level', default='1d', choices=[item.value for item in IntervalLevel])
+    parser.add_argument('--cases', help='the cases to run', nargs='+', default=ALL_CASES, choices=ALL_CASES)
+    parser.add_argument('--seed', help='random seed', type=int, default=0)
+    parser.add_argument('--data-path', help='the data path,a temporary one would be used if not set')
+    parser.add_argument('--output', help='the json file for the results,{data path}/bench.json if not set')
+
+    args = parser.parse_args(args)
+
+    data_path = args.data_path
+    if not data_path:
+        data_path = tempfile.mkdtemp(prefix='zvt-bench-')
+    init_bench_env(data_path)
+
+    result = Bench(stock_size=args.stocks, start_timestamp=args.start, end_timestamp=args.end, level=args.level,
+                   cases=args.cases, seed=args.seed).run()
+    result['params']['data_path'] = data_path
+
+    # the stdout is mixed with the other outputs,e.g. the config printed by zvt
+    output = args.output if args.output else os.path.join(data_path, 'bench.json')
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    logger.info('bench result is saved to {}'.format(output))
+
+    return result
+
+
+__all__ = ['Bench', 'init_bench_env', 'main']
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,17 @@
 # -*- coding: utf-8 -*-
+import json
+import logging
 import os
+import sqlite3
+import threading
 from typing import List, Union
-import platform
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy import func, exists, and_
+import sqlalchemy
+from pandas.api.types import is_datetime64_any_dtype
+from sqlalchemy import create_engine, DateTime, event, Float, Integer, String, Boolean, Enum
+from sqlalchemy import func, exists, and_, select, literal_column, text, bindparam
 from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import DeclarativeMeta
 from sqlalchemy.orm import Query
@@ -14,9 +20,30 @@ from sqlalchemy.orm import sessionmaker, Session
 from zvt import zvt_env
 from zvt.contract import IntervalLevel, EntityMixin
 from zvt.contract import zvt_context
+from zvt.contract.data_cache import data_cache, to_key
 from zvt.utils.pd_utils import pd_is_not_null, index_df
 from zvt.utils.time_utils import to_pd_timestamp
 
+logger = logging.getLogger(__name__)
+
+# guard the lazy creating of the engines,recorders could fetch and persist in threads
+_db_engine_lock = threading.RLock()
+
+# the values more than it in one IN clause are passed as one json array,sqlite limits the bound parameters count(999
+# before 3.32) and the planner is slow for the big IN list
+MAX_IN_VALUES = 500
+
+
+def _is_json_each_supported():
+    try:
+        sqlite3.connect(':memory:').execute("SELECT * FROM json_each('[]')")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+_json_each_supported = _is_json_each_supported()
+
 
 def get_db_name(data_schema: DeclarativeMeta) -> str:
     """
@@ -35,7 +62,7 @@ def get_db_name(data_schema: DeclarativeMeta) -> str:
 def get_db_engine(provider: str,
                   db_name: str = None,
                   data_schema: object = None,
-                  data_path: str = zvt_env['data_path']) -> Engine:
+                  data_path: str = None) -> Engine:
     """
     get db engine of the (provider,db_name) or (provider,data_schema)
 
@@ -53,19 +80,83 @@ def get_db_engine(provider: str,
     if data_schema:
         db_name = get_db_name(data_schema=data_schema)
 
+    if not data_path:
+        data_path = zvt_env['data_path']
+
     db_path = os.path.join(data_path, '{}_{}.db?check_same_thread=False'.format(provider, db_name))
 
     engine_key = '{}_{}'.format(provider, db_name)
     db_engine = zvt_context.db_engine_map.get(engine_key)
     if not db_engine:
-        db_engine = create_engine('sqlite:///' + db_path, echo=False)
-        zvt_context.db_engine_map[engine_key] = db_engine
+        with _db_engine_lock:
+            db_engine = zvt_context.db_engine_map.get(engine_key)
+            if not db_engine:
+                db_engine = create_engine('sqlite:///' + db_path, echo=False)
+                listen_db_changed(db_engine, provider=provider, db_name=db_name)
+                # the db & tables & indexes are created on first access rather than registering
+                schema_base = zvt_context.dbname_map_base.get(db_name)
+                if schema_base:
+                    init_db(db_engine, schema_base)
+                zvt_context.db_engine_map[engine_key] = db_engine
     return db_engine
 
 
+def listen_db_changed(engine: Engine, provider: str, db_name: str):
+    """
+    drop the cached query result of the db once any statement(except select/pragma) executed
+
+    :param engine:
+    :param provider:
+    :param db_name:
+    """
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip()[:6].upper() in ('SELECT', 'PRAGMA'):
+            data_cache.invalidate(provider, db_name)
+
+    event.listen(engine, 'after_cursor_execute', on_execute)
+
+
+def init_db(engine: Engine, schema_base: DeclarativeMeta):
+    """
+    create the tables and indexes of the schema_base in the db of the engine
+
+    :param engine:
+    :param schema_base:
+    """
+    schema_base.metadata.create_all(engine)
+
+    # create index for 'timestamp','entity_id','code','report_period','updated_timestamp
+    for table_name, table in iter(schema_base.metadata.tables.items()):
+        index_list = []
+        with engine.connect() as con:
+            rs = con.execute("PRAGMA INDEX_LIST('{}')".format(table_name))
+            for row in rs:
+                index_list.append(row[1])
+
+        logger.debug('engine:{},table:{},index:{}'.format(engine, table_name, index_list))
+
+        for col in ['timestamp', 'entity_id', 'code', 'report_period', 'created_timestamp', 'updated_timestamp']:
+            if col in table.c:
+                column = eval('table.c.{}'.format(col))
+                index_name = '{}_{}_index'.format(table_name, col)
+                if index_name not in index_list:
+                    index = sqlalchemy.schema.Index(index_name, column)
+                    index.create(engine)
+        for cols in [('timestamp', 'entity_id'), ('timestamp', 'code')]:
+            if (cols[0] in table.c) and (col[1] in table.c):
+                column0 = eval('table.c.{}'.format(col[0]))
+                column1 = eval('table.c.{}'.format(col[1]))
+                index_name = '{}_{}_{}_index'.format(table_name, col[0], col[1])
+                if index_name not in index_list:
+                    index = sqlalchemy.schema.Index(index_name, column0,
+                                                    column1)
+                    index.create(engine)
+
+
 def get_schemas(provider: str) -> List[DeclarativeMeta]:
     """
-    get domain schemas supported by the provider
+    get domain schemas supported by the provider,it only reads the registry and the dbs are not created
 
     :param provider:
     :type provider:
@@ -137,7 +228,7 @@ def get_db_session_factory(provider: str,
     session_key = '{}_{}'.format(provider, db_name)
     session = zvt_context.db_session_map.get(session_key)
     if not session:
-        session = sessionmaker()
+        session = sessionmaker(bind=get_db_engine(provider, db_name=db_name))
         zvt_context.db_session_map[session_key] = session
     return session
 
@@ -186,7 +277,7 @@ def get_entity_schema(entity_type: str) -> object:
     :return:
     :rtype:
     """
-    return zvt_context.zvt_entity_schema_map[entity_type]
+    return zvt_context.entity_schema_map[entity_type]
 
 
 def get_schema_by_name(name: str) -> DeclarativeMeta:
@@ -215,6 +306,21 @@ def get_schema_columns(schema: DeclarativeMeta) -> object:
     return schema.__table__.columns.keys()
 
 
+def in_filter(column, values):
+    """
+    the filter of column IN values,the big string list is bound as one json array and expanded by json_each in sqlite,
+    e.g,entity_id IN (SELECT value FROM json_each(?))
+
+    :param column:
+    :param values:
+    :return:
+    """
+    values = list(values)
+    if len(values) <= MAX_IN_VALUES or not _json_each_supported or not all(isinstance(v, str) for v in values):
+        return column.in_(values)
+    return column.in_(select([literal_column('value')]).select_from(func.json_each(json.dumps(values))))
+
+
 def common_filter(query: Query,
                   data_schema,
                   start_timestamp=None,
@@ -262,11 +368,58 @@ def get_data(data_schema,
              order=None,
              limit: int = None,
              index: Union[str, list] = None,
-             time_field: str = 'timestamp'):
+             time_field: str = 'timestamp',
+             use_cache: bool = False,
+             chunk_size: int = 10000,
+             time_slice: str = None):
+    """
+    query the data of the schema
+
+    :param return_type: df,domain,dict or iter.iter returns a generator of df chunks which is for scanning big data
+        in bounded memory
+    :param use_cache: serve the df from the data cache if it's enabled,the cache doesn't see the writes of other
+        processes,so don't use it for polling the data written by the recorders
+    :param chunk_size: max rows of the chunk for return_type='iter'
+    :param time_slice: pandas freq,e.g,'MS','AS',make the chunk for every time slice for return_type='iter'
+    :return:
+    """
     assert data_schema is not None
     assert provider is not None
     assert provider in zvt_context.providers
 
+    if return_type == 'iter' and time_slice:
+        return iter_data_by_time(data_schema=data_schema, ids=ids, entity_ids=entity_ids, entity_id=entity_id,
+                                 codes=codes, code=code, level=level, provider=provider, columns=columns,
+                                 col_label=col_label, start_timestamp=start_timestamp, end_timestamp=end_timestamp,
+                                 filters=filters, session=session, order=order, index=index, time_field=time_field,
+                                 time_slice=time_slice)
+
+    # only df is cached,the domain objects are bound to the session
+    if use_cache and data_cache.enabled() and return_type == 'df':
+        cache_key = ((provider, get_db_name(data_schema=data_schema)), data_schema.__name__,
+                     to_key([ids, entity_ids, entity_id, codes, code, level, columns, col_label, start_timestamp,
+                             end_timestamp, filters, order, limit, index, time_field]))
+        df = data_cache.get(cache_key)
+        if df is not None:
+            return df
+
+        version = data_cache.get_version(cache_key)
+        df = get_data(data_schema=data_schema, ids=ids, entity_ids=entity_ids, entity_id=entity_id, codes=codes,
+                      code=code, level=level, provider=provider, columns=columns, col_label=col_label,
+                      return_type=return_type, start_timestamp=start_timestamp, end_timestamp=end_timestamp,
+                      filters=filters, session=session, order=order, limit=limit, index=index,
+                      time_field=time_field, use_cache=False)
+        data_cache.put(cache_key, df, version)
+        return df
+
+    storage = zvt_context.schema_map_storage.get(data_schema)
+    if storage:
+        return storage.query(data_schema=data_schema, provider=provider, ids=ids, entity_ids=entity_ids,
+                             entity_id=entity_id, codes=codes, code=code, level=level, columns=columns,
+                             col_label=col_label, return_type=return_type, start_timestamp=start_timestamp,
+                             end_timestamp=end_timestamp, filters=filters, order=order, limit=limit, index=index,
+                             time_field=time_field, chunk_size=chunk_size)
+
     if not session:
         session = get_db_session(provider=provider, data_schema=data_schema)
 
@@ -301,13 +454,13 @@ def get_data(data_schema,
     if entity_id:
         query = query.filter(data_schema.entity_id == entity_id)
     if entity_ids:
-        query = query.filter(data_schema.entity_id.in_(entity_ids))
+        query = query.filter(in_filter(data_schema.entity_id, entity_ids))
     if code:
         query = query.filter(data_schema.code == code)
     if codes:
-        query = query.filter(data_schema.code.in_(codes))
+        query = query.filter(in_filter(data_schema.code, codes))
     if ids:
-        query = query.filter(data_schema.id.in_(ids))
+        query = query.filter(in_filter(data_schema.id, ids))
 
     # we always store different level in different schema,the level param is not useful now
     if level:
@@ -325,7 +478,7 @@ def get_data(data_schema,
                           time_field=time_field)
 
     if return_type == 'df':
-        df = pd.read_sql(query.statement, query.session.bind)
+        df = read_sql_typed(query.statement, query.session.bind)
         if pd_is_not_null(df):
             if index:
                 df = index_df(df, index=index, time_field=time_field)
@@ -334,6 +487,182 @@ def get_data(data_schema,
         return query.all()
     elif return_type == 'dict':
         return [item.__dict__ for item in query.all()]
+    elif return_type == 'iter':
+        return iter_query_df(query, chunk_size=chunk_size, index=index, time_field=time_field)
+
+
+def _to_float(values):
+    return np.array(values, dtype=float)
+
+
+def _to_int(values):
+    try:
+        return np.array(values, dtype=np.int64)
+    except TypeError:
+        # null in it
+        return np.array(values, dtype=float)
+
+
+def _to_bool(values):
+    if None in values:
+        return np.array([None if value is None else bool(value) for value in values], dtype=object)
+    return np.array(values, dtype=bool)
+
+
+def _to_datetime(values):
+    # sqlite stores the DateTime as iso string,parse them in one shot
+    return pd.to_datetime(np.array(values, dtype=object)).values
+
+
+def _to_object(values):
+    return np.array(values, dtype=object)
+
+
+def get_column_converters(statement):
+    """
+    get the converters of the selected columns from their sqlalchemy types
+
+    :param statement:
+    :return: the converter list,None if any column type has no fast converter
+    """
+    converters = []
+    for column in statement.inner_columns:
+        sql_type = getattr(column, 'type', None)
+        if isinstance(sql_type, Float) and not sql_type.asdecimal:
+            converters.append(_to_float)
+        elif isinstance(sql_type, Integer):
+            converters.append(_to_int)
+        elif isinstance(sql_type, Boolean):
+            converters.append(_to_bool)
+        elif isinstance(sql_type, DateTime):
+            converters.append(_to_datetime)
+        elif isinstance(sql_type, String) and not isinstance(sql_type, Enum):
+            converters.append(_to_object)
+        else:
+            return None
+    return converters
+
+
+def _fetch_columns(cursor, size: int = None):
+    rows = cursor.fetchmany(size) if size else cursor.fetchall()
+    if not rows:
+        return None
+    return list(zip(*rows))
+
+
+def iter_sql_typed(statement, bind, chunk_size: int = None):
+    """
+    the fast version of pd.read_sql,it fetches the raw rows from the dbapi cursor and builds the columns with the
+    dtypes known from the schema,no per value processing of sqlalchemy and type inferring of pandas.
+
+    fallback to pd.read_sql if some column type is not supported
+
+    :param statement:
+    :param bind:
+    :param chunk_size: yield the df chunk by chunk if set,otherwise yield one df(even empty)
+    """
+    converters = get_column_converters(statement)
+    if converters is not None:
+        result = bind.execute(statement)
+        try:
+            keys = result.keys()
+            # the duplicated names
+            if len(set(keys)) == len(converters):
+                while True:
+                    values_list = _fetch_columns(result.cursor, chunk_size)
+                    if values_list is None:
+                        if not chunk_size:
+                            yield pd.DataFrame({key: converter([]) for key, converter in zip(keys, converters)},
+                                               columns=keys)
+                        return
+                    yield pd.DataFrame({key: converter(values) for key, converter, values in
+                                        zip(keys, converters, values_list)}, columns=keys)
+                    if not chunk_size:
+                        return
+        finally:
+            result.close()
+
+    if chunk_size:
+        yield from pd.read_sql(statement, bind, chunksize=chunk_size)
+    else:
+        yield pd.read_sql(statement, bind)
+
+
+def read_sql_typed(statement, bind) -> pd.DataFrame:
+    return next(iter_sql_typed(statement, bind))
+
+
+def iter_query_df(query: Query, chunk_size: int = 10000, index: Union[str, list] = None,
+                  time_field: str = 'timestamp'):
+    """
+    fetch the result of the query chunk by chunk from the cursor
+
+    :param query:
+    :param chunk_size:
+    :param index:
+    :param time_field:
+    """
+    statement = query.statement.execution_options(stream_results=True)
+    for df in iter_sql_typed(statement, query.session.bind, chunk_size=chunk_size):
+        if pd_is_not_null(df) and index:
+            df = index_df(df, index=index, time_field=time_field)
+        yield df
+
+
+def iter_data_by_time(data_schema,
+                      provider: str,
+                      time_slice: str,
+                      start_timestamp: Union[pd.Timestamp, str] = None,
+                      end_timestamp: Union[pd.Timestamp, str] = None,
+                      filters: List = None,
+                      session: Session = None,
+                      time_field: str = 'timestamp',
+                      **kwargs):
+    """
+    query the data slice by slice of the time,the time range is [start_timestamp,end_timestamp] and the slices are
+    [t0,t1),[t1,t2)...[tn,end_timestamp]
+
+    :param data_schema:
+    :param provider:
+    :param time_slice: pandas freq,e.g,'MS','AS'
+    :param start_timestamp: min time of the data if not set
+    :param end_timestamp: max time of the data if not set
+    :param filters:
+    :param session:
+    :param time_field:
+    :param kwargs: other args of get_data
+    """
+    time_col = eval('data_schema.{}'.format(time_field))
+
+    if not start_timestamp or not end_timestamp:
+        df = get_data(data_schema=data_schema, provider=provider, columns=[time_field], session=session,
+                      order=time_col.asc(), limit=1, time_field=time_field)
+        if not pd_is_not_null(df):
+            return
+        if not start_timestamp:
+            start_timestamp = df[time_field][0]
+        if not end_timestamp:
+            df = get_data(data_schema=data_schema, provider=provider, columns=[time_field], session=session,
+                          order=time_col.desc(), limit=1, time_field=time_field)
+            end_timestamp = df[time_field][0]
+
+    start_timestamp = to_pd_timestamp(start_timestamp)
+    end_timestamp = to_pd_timestamp(end_timestamp)
+
+    edges = [start_timestamp] + [t for t in pd.date_range(start_timestamp, end_timestamp, freq=time_slice) if
+                                 t > start_timestamp]
+    for i, edge in enumerate(edges):
+        if i + 1 < len(edges):
+            slice_filters = (filters if filters else []) + [time_col < edges[i + 1]]
+            slice_end = None
+        else:
+            slice_filters = filters
+            slice_end = end_timestamp
+
+        df = get_data(data_schema=data_schema, provider=provider, start_timestamp=edge, end_timestamp=slice_end,
+                      filters=slice_filters, session=session, time_field=time_field, return_type='df', **kwargs)
+        if pd_is_not_null(df):
+            yield df
 
 
 def data_exist(session, schema, id):
@@ -362,6 +691,128 @@ def get_group(provider, data_schema, column, group_func=func.count, session=None
     return df
 
 
+def _entity_filters(data_schema, category_field: str, entity_ids: List[str], filters: List):
+    """
+    the entity_ids for get_data if category_field is entity_id,or the filter of category_field,
+    the storage does not support the json_each of in_filter
+
+    :return: entity_ids, filters
+    """
+    if not entity_ids:
+        return None, filters
+    if category_field == 'entity_id':
+        return entity_ids, filters
+
+    category_col = eval('data_schema.{}'.format(category_field))
+    if zvt_context.schema_map_storage.get(data_schema):
+        return None, (filters or []) + [category_col.in_(entity_ids)]
+    return None, (filters or []) + [in_filter(category_col, entity_ids)]
+
+
+def get_window_data(data_schema,
+                    provider: str,
+                    window: int,
+                    entity_ids: List[str] = None,
+                    filters: List = None,
+                    category_field: str = 'entity_id',
+                    time_field: str = 'timestamp',
+                    index: Union[str, list] = None,
+                    session: Session = None) -> pd.DataFrame:
+    """
+    get the latest window rows of every entity in one query,
+    i.e,ROW_NUMBER() OVER (PARTITION BY entity_id ORDER BY timestamp DESC) <= window
+
+    :param data_schema:
+    :param provider:
+    :param window: rows count of every entity
+    :param entity_ids:
+    :param filters:
+    :param category_field:
+    :param time_field:
+    :param index:
+    :param session:
+    :return:
+    """
+    category_col = eval('data_schema.{}'.format(category_field))
+    time_col = eval('data_schema.{}'.format(time_field))
+
+    # sqlite supports window function since 3.25
+    if zvt_context.schema_map_storage.get(data_schema) or sqlite3.sqlite_version_info < (3, 25, 0):
+        query_entity_ids, filters = _entity_filters(data_schema, category_field, entity_ids, filters)
+        df = get_data(data_schema=data_schema, provider=provider, entity_ids=query_entity_ids, filters=filters,
+                      time_field=time_field)
+        if pd_is_not_null(df):
+            df = df.groupby(category_field, sort=False).tail(window).reset_index(drop=True)
+            if index:
+                df = index_df(df, index=index, time_field=time_field)
+        return df
+
+    if not session:
+        session = get_db_session(provider=provider, data_schema=data_schema)
+
+    columns = list(data_schema.__table__.columns)
+    row_number = func.row_number().over(partition_by=category_col, order_by=time_col.desc()).label('row_number')
+    inner = select(columns + [row_number])
+    if entity_ids:
+        inner = inner.where(in_filter(category_col, entity_ids))
+    if filters:
+        for filter in filters:
+            inner = inner.where(filter)
+    inner = inner.alias('window_data')
+
+    statement = select([inner.c[col.name] for col in columns]).where(inner.c.row_number <= window).order_by(
+        inner.c[category_col.name], inner.c[time_col.name])
+    df = read_sql_typed(statement, session.bind)
+    if pd_is_not_null(df) and index:
+        df = index_df(df, index=index, time_field=time_field)
+    return df
+
+
+def get_latest_timestamps(data_schema,
+                          provider: str,
+                          entity_ids: List[str] = None,
+                          filters: List = None,
+                          category_field: str = 'entity_id',
+                          time_field: str = 'timestamp',
+                          session: Session = None) -> pd.Series:
+    """
+    get the latest timestamp of the entities in one GROUP BY query
+
+    :param data_schema:
+    :param provider:
+    :param entity_ids:
+    :param filters:
+    :param category_field:
+    :param time_field:
+    :param session:
+    :return: series of entity -> latest timestamp,the entities without data are not included
+    """
+    category_col = eval('data_schema.{}'.format(category_field))
+    time_col = eval('data_schema.{}'.format(time_field))
+
+    if zvt_context.schema_map_storage.get(data_schema):
+        query_entity_ids, filters = _entity_filters(data_schema, category_field, entity_ids, filters)
+        df = get_data(data_schema=data_schema, provider=provider, entity_ids=query_entity_ids,
+                      columns=[category_col, time_col], filters=filters, time_field=time_field)
+        if not pd_is_not_null(df):
+            return pd.Series(dtype='datetime64[ns]', name=time_field)
+        return df.groupby(category_field)[time_field].max()
+
+    if not session:
+        session = get_db_session(provider=provider, data_schema=data_schema)
+
+    statement = select([category_col, func.max(time_col).label(time_field)]).group_by(category_col)
+    if entity_ids:
+        statement = statement.where(in_filter(category_col, entity_ids))
+    if filters:
+        for filter in filters:
+            statement = statement.where(filter)
+
+    # the type of max() is the same as the column
+    df = read_sql_typed(statement, session.bind)
+    return df.set_index(category_field)[time_field]
+
+
 def decode_entity_id(entity_id: str):
     result = entity_id.split('_')
     entity_type = result[0]
@@ -385,14 +836,42 @@ def get_entity_code(entity_id: str):
     return code
 
 
+def _upsert_statements(data_schema, cols: List[str]) -> list:
+    """
+    the statements which insert the new rows and only update the cols of the existing rows,
+    OR REPLACE would delete the existing row and null the columns not in cols
+
+    :param data_schema:
+    :param cols: the columns to insert/update
+    :return: the statements executed in order with the same records
+    """
+    table = data_schema.__tablename__
+    # bind with the column types to keep the type processing of the orm insert
+    params = [bindparam(col, type_=data_schema.__table__.columns[col].type) for col in cols]
+    insert_ignore = data_schema.__table__.insert().prefix_with('OR IGNORE')
+    updates = [col for col in cols if col != 'id']
+    if not updates or 'id' not in cols:
+        return [insert_ignore]
+
+    # UPSERT needs sqlite 3.24+
+    if sqlite3.sqlite_version_info >= (3, 24, 0):
+        return [text('INSERT INTO {} ({}) VALUES ({}) ON CONFLICT(id) DO UPDATE SET {}'.format(
+            table,
+            ', '.join(cols),
+            ', '.join(':{}'.format(col) for col in cols),
+            ', '.join('{col}=excluded.{col}'.format(col=col) for col in updates))).bindparams(*params)]
+
+    update = text('UPDATE {} SET {} WHERE id=:id'.format(table, ', '.join('{col}=:{col}'.format(col=col) for col in updates)))
+    return [update.bindparams(*params), insert_ignore]
+
+
 def df_to_db(df: pd.DataFrame,
              data_schema: DeclarativeMeta,
              provider: str,
              force_update: bool = False,
              sub_size: int = 5000) -> object:
     """
-    FIXME:improve
-    store the df to db
+    store the df to db,every chunk is written by one native upsert statement through executemany
 
     :param df:
     :type df:
@@ -400,19 +879,25 @@ def df_to_db(df: pd.DataFrame,
     :type data_schema:
     :param provider:
     :type provider:
-    :param force_update:
+    :param force_update: True for updating the df columns of the existing rows with the same id,False for ignoring them
     :type force_update:
-    :param sub_size:
+    :param sub_size: rows count of one chunk
     :return:
     :rtype:
     """
     if not pd_is_not_null(df):
         return
 
+    storage = zvt_context.schema_map_storage.get(data_schema)
+    if storage:
+        storage.write(df=df, data_schema=data_schema, provider=provider, force_update=force_update)
+        data_cache.invalidate(provider, get_db_name(data_schema=data_schema))
+        return
+
     db_engine = get_db_engine(provider, data_schema=data_schema)
 
     schema_cols = get_schema_columns(data_schema)
-    cols = set(df.columns.tolist()) & set(schema_cols)
+    cols = [col for col in df.columns.tolist() if col in schema_cols]
 
     if not cols:
         print('wrong cols')
@@ -420,38 +905,62 @@ def df_to_db(df: pd.DataFrame,
 
     df = df[cols]
 
+    # the db api only accepts datetime for DateTime column
+    for col in cols:
+        if isinstance(data_schema.__table__.columns[col].type, DateTime) and not is_datetime64_any_dtype(df[col]):
+            df = df.assign(**{col: pd.to_datetime(df[col])})
+
+    if force_update:
+        stmts = _upsert_statements(data_schema, cols)
+    else:
+        stmts = [data_schema.__table__.insert().prefix_with('OR IGNORE')]
+
     size = len(df)
 
-    if platform.system() == "Windows":
-        sub_size = 900
+    for start in range(0, size, sub_size):
+        df_current = df.iloc[start:start + sub_size]
+        records = df_to_records(df_current)
 
-    if size >= sub_size:
-        step_size = int(size / sub_size)
-        if size % sub_size:
-            step_size = step_size + 1
-    else:
-        step_size = 1
+        with db_engine.begin() as con:
+            for stmt in stmts:
+                con.execute(stmt, records)
 
-    for step in range(step_size):
-        df_current = df.iloc[sub_size * step:sub_size * (step + 1)]
-        if force_update:
-            session = get_db_session(provider=provider, data_schema=data_schema)
-            ids = df_current["id"].tolist()
-            if len(ids) == 1:
-                sql = f'delete from {data_schema.__tablename__} where id = "{ids[0]}"'
-            else:
-                sql = f'delete from {data_schema.__tablename__} where id in {tuple(ids)}'
 
-            session.execute(sql)
-            session.commit()
+def delete_data(data_schema, provider: str, ids: List[str], session: Session = None):
+    """
+    delete the data by ids,the registered storage of the schema is used if any
+
+    :param data_schema:
+    :param provider:
+    :param ids:
+    :param session: the session for the db,it's committed after deleting
+    """
+    if not ids:
+        return
+
+    storage = zvt_context.schema_map_storage.get(data_schema)
+    if storage:
+        storage.delete(data_schema=data_schema, provider=provider, ids=ids)
+        return
+
+    if not session:
+        session = get_db_session(provider=provider, data_schema=data_schema)
+    session.query(data_schema).filter(in_filter(data_schema.id, ids)).delete(synchronize_session=False)
+    session.commit()
 
-        else:
-            current = get_data(data_schema=data_schema, columns=[data_schema.id], provider=provider,
-                               ids=df_current['id'].tolist())
-            if pd_is_not_null(current):
-                df_current = df_current[~df_current['id'].isin(current['id'])]
 
-        df_current.to_sql(data_schema.__tablename__, db_engine, index=False, if_exists='append')
+def df_to_records(df: pd.DataFrame) -> List[dict]:
+    """
+    convert the df to records which could be bound to the db api directly,NaN/NaT -> None,numpy type -> python type
+
+    :param df:
+    :type df:
+    :return:
+    :rtype:
+    """
+    df = df.astype(object)
+    df = df.where(pd.notnull(df), None)
+    return df.to_dict(orient='records')
 
 
 def get_entities(
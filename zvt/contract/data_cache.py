@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from zvt import zvt_env
+from zvt.contract import IntervalLevel
+
+
+def to_key(value):
+    """
+    normalize the query arg to hashable key,the sqlalchemy clause is compiled to (sql,params)
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, IntervalLevel):
+        return value.value
+    if isinstance(value, pd.Timestamp):
+        return str(value)
+    if isinstance(value, dict):
+        return tuple((k, to_key(v)) for k, v in sorted(value.items()))
+    if isinstance(value, (list, tuple, set, pd.Index, pd.Series)):
+        return tuple(to_key(item) for item in value)
+    if hasattr(value, 'compile'):
+        compiled = value.compile()
+        return str(compiled), tuple((k, repr(v)) for k, v in sorted(compiled.params.items()))
+    return repr(value)
+
+
+class DataCache(object):
+    """
+    size bounded LRU cache for the query result of get_data(use_cache=True),it's disabled by default.
+
+    the entries of the (provider,db_name) are dropped when writing the db in this process,df_to_db and the
+    sessions(e.g,recorder persist) included.the writes of other processes are not seen
+    """
+
+    def __init__(self, max_size: int = 0) -> None:
+        self.max_size = max_size
+        self.lock = threading.RLock()
+        # key -> df,key[0] is (provider,db_name)
+        self.entries = OrderedDict()
+        # (provider,db_name) -> version,increased by every change of the db
+        self.versions = {}
+
+    def enabled(self):
+        return self.max_size > 0
+
+    def enable(self, max_size=128):
+        with self.lock:
+            self.max_size = max_size
+            self._shrink()
+
+    def disable(self):
+        with self.lock:
+            self.max_size = 0
+            self.entries.clear()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get(self, key):
+        with self.lock:
+            df = self.entries.get(key)
+            if df is None:
+                return None
+            self.entries.move_to_end(key)
+        # the cached one should never be changed by the caller
+        return df.copy()
+
+    def get_version(self, key):
+        return self.versions.get(key[0], 0)
+
+    def put(self, key, df: pd.DataFrame, version: int):
+        if not self.enabled() or df is None:
+            return
+        with self.lock:
+            # the db changed while querying
+            if version != self.get_version(key):
+                return
+            self.entries[key] = df.copy()
+            self.entries.move_to_end(key)
+            self._shrink()
+
+    def invalidate(self, provider: str, db_name: str):
+        with self.lock:
+            self.versions[(provider, db_name)] = self.versions.get((provider, db_name), 0) + 1
+            for key in [key for key in self.entries if key[0] == (provider, db_name)]:
+                del self.entries[key]
+
+    def _shrink(self):
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+# set "data_cache_size" in config.json to enable it for all the processes,
+# it only serves the queries with use_cache=True
+data_cache = DataCache(max_size=int(zvt_env.get('data_cache_size', 0)))
+
+
+def enable_data_cache(max_size: int = 128):
+    """
+    enable the query result cache of get_data
+
+    :param max_size: max entries count
+    """
+    data_cache.enable(max_size=max_size)
+
+
+def disable_data_cache():
+    data_cache.disable()
+
+
+__all__ = ['DataCache', 'data_cache', 'enable_data_cache', 'disable_data_cache']
@@ -4,10 +4,12 @@ import logging
 import time
 from typing import List, Union
 
+import numpy as np
 import pandas as pd
+from sqlalchemy import and_, or_
 
-from zvt.contract import IntervalLevel, Mixin, EntityMixin
-from zvt.contract.api import get_entities
+from zvt.contract import IntervalLevel, Mixin, EntityMixin, zvt_context
+from zvt.contract.api import get_entities, in_filter, get_window_data
 from zvt.utils.pd_utils import pd_is_not_null
 from zvt.utils.time_utils import to_pd_timestamp, now_pd_timestamp
 
@@ -45,6 +47,9 @@ class DataListener(object):
 class DataReader(object):
     logger = logging.getLogger(__name__)
 
+    # max count of the (entities,watermark) predicates in one poll query of move_on
+    max_watermark_groups: int = 64
+
     def __init__(self,
                  data_schema: Mixin,
                  entity_schema: EntityMixin,
@@ -139,21 +144,12 @@ class DataReader(object):
         self.load_data()
 
     def load_window_df(self, provider, data_schema, window):
-        window_df = None
-
-        dfs = []
-        for entity_id in self.entity_ids:
-            df = data_schema.query_data(provider=provider,
-                                        index=[self.category_field, self.time_field],
-                                        order=data_schema.timestamp.desc(),
-                                        entity_id=entity_id,
-                                        limit=window)
-            if pd_is_not_null(df):
-                dfs.append(df)
-        if dfs:
-            window_df = pd.concat(dfs)
-            window_df = window_df.sort_index(level=[0, 1])
-        return window_df
+        window_df = get_window_data(data_schema=data_schema, provider=provider, window=window,
+                                    entity_ids=self.entity_ids, category_field=self.category_field,
+                                    time_field=self.time_field, index=[self.category_field, self.time_field])
+        if pd_is_not_null(window_df):
+            return window_df
+        return None
 
     def load_data(self):
         self.logger.info('load_data start')
@@ -182,6 +178,8 @@ class DataReader(object):
         1)get the data happened before to_timestamp,if not set,get all the data which means to now
         2)if computing_window set,the data_df would be cut for saving memory
 
+        every poll is one query for all the waiting entities,the entity which got new data would stop waiting,
+        the others would wait with bounded backoff until timeout.
 
         :param to_timestamp:
         :type to_timestamp:
@@ -197,64 +195,109 @@ class DataReader(object):
         start_time = time.time()
 
         # FIXME:we suppose history data should be there at first
-        has_got = []
-        dfs = []
-        changed = False
+        # the latest timestamp of every entity
+        watermarks = pd.Series(self.data_df.index.get_level_values(1),
+                               index=self.data_df.index.get_level_values(0)).groupby(level=0).max()
+        waiting = set(watermarks.index)
+
+        added_dfs = []
+        # seconds to wait for next poll,doubled every time until max_wait_seconds
+        wait_seconds = 0.1
+        max_wait_seconds = 2
         while True:
-            for entity_id, df in self.data_df.groupby(level=0):
-                if entity_id in has_got:
-                    continue
-
-                recorded_timestamp = df.index.levels[1].max()
-
-                # move_on读取数据，表明之前的数据已经处理完毕，只需要保留computing_window的数据
-                if self.computing_window:
-                    df = df.iloc[-self.computing_window:]
+            added_df = self.query_added_data(watermarks=watermarks[list(waiting)], to_timestamp=to_timestamp)
 
-                added_filter = [self.category_col == entity_id, self.time_col > recorded_timestamp]
-                if self.filters:
-                    filters = self.filters + added_filter
-                else:
-                    filters = added_filter
-
-                added_df = self.data_schema.query_data(provider=self.provider,
-                                                       columns=self.columns,
-                                                       end_timestamp=to_timestamp, filters=filters, level=self.level,
-                                                       index=[self.category_field, self.time_field])
+            if pd_is_not_null(added_df):
+                for entity_id, df in added_df.groupby(level=0):
+                    if entity_id not in waiting:
+                        continue
+                    df = df[df.index.get_level_values(1) > watermarks[entity_id]]
+                    if not pd_is_not_null(df):
+                        continue
 
-                if pd_is_not_null(added_df):
                     self.logger.info(f'got new data:{df.to_json(orient="records", force_ascii=False)}')
 
                     for listener in self.data_listeners:
-                        listener.on_entity_data_changed(entity=entity_id, added_data=added_df)
-                    # if got data,just move to another entity_id
-                    changed = True
-                    has_got.append(entity_id)
-                    df = df.append(added_df, sort=False)
-                    dfs.append(df)
-                else:
-                    cost_time = time.time() - start_time
-                    if cost_time > timeout:
-                        # if timeout,just add the old data
-                        has_got.append(entity_id)
-                        dfs.append(df)
-                        self.logger.warning(
-                            'category:{} level:{} getting data timeout,to_timestamp:{},now:{}'.format(entity_id,
-                                                                                                      self.level,
-                                                                                                      to_timestamp,
-                                                                                                      now_pd_timestamp()))
-                        continue
+                        listener.on_entity_data_changed(entity=entity_id, added_data=df)
+                    # if got data,the entity would not wait anymore
+                    waiting.remove(entity_id)
+                    added_dfs.append(df)
 
-            if len(has_got) == len(self.data_df.index.levels[0]):
+            if not waiting:
                 break
 
-        if dfs:
-            self.data_df = pd.concat(dfs, sort=False)
-            self.data_df.sort_index(level=[0, 1])
+            cost_time = time.time() - start_time
+            if cost_time > timeout:
+                # if timeout,just keep the old data
+                self.logger.warning(
+                    'categories:{} level:{} getting data timeout,to_timestamp:{},now:{}'.format(waiting,
+                                                                                              self.level,
+                                                                                              to_timestamp,
+                                                                                              now_pd_timestamp()))
+                break
+
+            time.sleep(min(wait_seconds, timeout - cost_time))
+            wait_seconds = min(wait_seconds * 2, max_wait_seconds)
+
+        # move_on读取数据，表明之前的数据已经处理完毕，只需要保留computing_window的数据
+        if self.computing_window:
+            self.data_df = self.data_df.groupby(level=0).tail(self.computing_window)
+
+        if added_dfs:
+            self.data_df = pd.concat([self.data_df] + added_dfs, sort=False)
+            self.data_df = self.data_df.sort_index(level=[0, 1])
+
+            for listener in self.data_listeners:
+                listener.on_data_changed(self.data_df)
+
+    def get_added_filter(self, watermarks: pd.Series):
+        """
+        (category in entities_1 and time > watermark_1) or (category in entities_2 and time > watermark_2)...
+
+        the entities are grouped by their own watermarks,a lagging entity does not make the others read the old data.
+        if too many different watermarks,the neighbour ones share the lowest of them and the extra rows are dropped
+        by the caller
+
+        :param watermarks: entity -> the latest timestamp
+        """
+        if watermarks.nunique() <= self.max_watermark_groups:
+            groups = [(watermark, ids.tolist()) for watermark, ids in watermarks.groupby(watermarks).groups.items()]
+        else:
+            ordered = watermarks.sort_values()
+            groups = [(chunk.iloc[0], chunk.index.tolist()) for chunk in
+                      np.array_split(ordered, self.max_watermark_groups) if len(chunk) > 0]
+
+        # the storage does not support the json_each of in_filter
+        storage = zvt_context.schema_map_storage.get(self.data_schema)
+        clauses = []
+        for watermark, entity_ids in groups:
+            if storage:
+                category_filter = self.category_col.in_(entity_ids)
+            else:
+                category_filter = in_filter(self.category_col, entity_ids)
+            clauses.append(and_(category_filter, self.time_col > watermark))
+        return or_(*clauses)
+
+    def query_added_data(self, watermarks: pd.Series, to_timestamp: Union[str, pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        query the data after their own watermarks for the entities in one query
+
+        :param watermarks: entity -> the latest timestamp
+        :param to_timestamp:
+        :return:
+        """
+        added_filter = [self.get_added_filter(watermarks)]
+
+        if self.filters:
+            filters = self.filters + added_filter
+        else:
+            filters = added_filter
 
-            if changed:
-                for listener in self.data_listeners:
-                    listener.on_data_changed(self.data_df)
+        return self.data_schema.query_data(provider=self.provider,
+                                           columns=self.columns,
+                                           end_timestamp=to_timestamp, filters=filters, level=self.level,
+                                           index=[self.category_field, self.time_field],
+                                           time_field=self.time_field)
 
     def register_data_listener(self, listener):
         if listener not in self.data_listeners:
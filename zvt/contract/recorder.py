@@ -2,17 +2,20 @@
 import logging
 import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import pandas as pd
 from sqlalchemy.orm import Session
 
-from zvt.contract import IntervalLevel, Mixin, EntityMixin
+from zvt.contract import IntervalLevel, Mixin, EntityMixin, zvt_context
 from zvt.contract.api import get_db_session, get_schema_columns
-from zvt.contract.api import get_entities, get_data
+from zvt.contract.api import get_entities, get_data, get_latest_timestamps, get_window_data, df_to_db, delete_data
 from zvt.utils.time_utils import to_pd_timestamp, TIME_FORMAT_DAY, to_time_str, \
     evaluate_size_from_timestamp, is_in_same_interval, now_pd_timestamp
-from zvt.utils.utils import fill_domain_from_dict
+from zvt.utils.pd_utils import pd_is_not_null
+from zvt.utils.utils import fill_domain_from_dict, none_values
 
 
 class Meta(type):
@@ -141,6 +144,14 @@ class RecorderForEntities(Recorder):
 
 
 class TimeSeriesDataRecorder(RecorderForEntities):
+    # overwrite it(or set it for the instance) to call record for max_workers entities concurrently
+    max_workers: int = 1
+    # at most max_workers * max_pending_factor results are fetched but not persisted in concurrent mode
+    max_pending_factor: int = 2
+
+    # commit in persist,the recorder driving several ones on the same session could set it False and commit once
+    auto_commit: bool = True
+
     def __init__(self,
                  entity_type='stock',
                  exchanges=['sh', 'sz'],
@@ -170,6 +181,58 @@ class TimeSeriesDataRecorder(RecorderForEntities):
 
         super().__init__(entity_type, exchanges, entity_ids, codes, batch_size, force_update, sleeping_time)
 
+        # entity_id -> latest saved timestamp(None for no data),used by the first evaluating of the entities
+        self.planned_latest_timestamps = {}
+
+        # id -> saved domain of the handling batch,loaded by one query in handle_original_list
+        self.saved_domains: dict = None
+
+    def is_planning_supported(self):
+        # the customized get_latest_saved_record could not be replaced by the bulk query
+        return type(self).get_latest_saved_record in (TimeSeriesDataRecorder.get_latest_saved_record,
+                                                      FixedCycleDataRecorder.get_latest_saved_record)
+
+    def load_latest_timestamps(self) -> dict:
+        """
+        get the latest saved timestamps of the entities in one GROUP BY query
+
+        :return: entity_id -> latest saved timestamp
+        """
+        time_field = self.get_evaluated_time_field()
+        latest_timestamps = get_latest_timestamps(data_schema=self.data_schema, provider=self.provider,
+                                                  entity_ids=[entity.id for entity in self.entities],
+                                                  time_field=time_field, session=self.session)
+        return latest_timestamps.to_dict()
+
+    def plan(self):
+        """
+        the planning phase before recording,load the latest saved timestamps of all the entities at once instead of
+        querying them one by one in evaluate_start_end_size_timestamps
+        """
+        self.planned_latest_timestamps = {}
+        if not self.entities or not self.is_planning_supported():
+            return
+
+        start_time = time.time()
+        latest_timestamps = self.load_latest_timestamps()
+        self.planned_latest_timestamps = {entity.id: latest_timestamps.get(entity.id) for entity in self.entities}
+        self.logger.info('plan {} entities,cost_time:{}'.format(len(self.entities), time.time() - start_time))
+
+    def get_latest_saved_timestamp(self, entity):
+        """
+        the planned one is only used once,the entity would be evaluated again after recording
+
+        :param entity:
+        :return:
+        """
+        if entity.id in self.planned_latest_timestamps:
+            return self.planned_latest_timestamps.pop(entity.id)
+
+        latest_saved_record = self.get_latest_saved_record(entity=entity)
+        if latest_saved_record:
+            return eval('latest_saved_record.{}'.format(self.get_evaluated_time_field()))
+        return None
+
     def get_latest_saved_record(self, entity):
         order = eval('self.data_schema.{}.desc()'.format(self.get_evaluated_time_field()))
 
@@ -189,11 +252,9 @@ class TimeSeriesDataRecorder(RecorderForEntities):
         if entity.timestamp and (entity.timestamp >= now_pd_timestamp()):
             return entity.timestamp, None, 0, None
 
-        latest_saved_record = self.get_latest_saved_record(entity=entity)
+        latest_timestamp = self.get_latest_saved_timestamp(entity=entity)
 
-        if latest_saved_record:
-            latest_timestamp = eval('latest_saved_record.{}'.format(self.get_evaluated_time_field()))
-        else:
+        if not latest_timestamp:
             latest_timestamp = entity.timestamp
 
         if not latest_timestamp:
@@ -276,11 +337,11 @@ class TimeSeriesDataRecorder(RecorderForEntities):
 
         the_id = self.generate_domain_id(entity, original_data)
 
-        # optional way
-        # item = self.session.query(self.data_schema).get(the_id)
-
-        items = get_data(data_schema=self.data_schema, session=self.session, provider=self.provider,
-                         entity_id=entity.id, filters=[self.data_schema.id == the_id], return_type='domain')
+        if self.saved_domains is not None:
+            items = [self.saved_domains[the_id]] if the_id in self.saved_domains else []
+        else:
+            items = get_data(data_schema=self.data_schema, session=self.session, provider=self.provider,
+                             entity_id=entity.id, filters=[self.data_schema.id == the_id], return_type='domain')
 
         if items and not self.force_update:
             self.logger.info('ignore the data {}:{} saved before'.format(self.data_schema, the_id))
@@ -312,6 +373,121 @@ class TimeSeriesDataRecorder(RecorderForEntities):
         fill_domain_from_dict(domain_item, original_data, self.get_data_map())
         return got_new_data, domain_item
 
+    def generate_df_ids(self, entity, df: pd.DataFrame) -> pd.Series:
+        """
+        the df version of generate_domain_id
+
+        :param entity:
+        :param df: the record result
+        :return:
+        """
+        # the default id format:entity + day
+        if type(self).generate_domain_id is TimeSeriesDataRecorder.generate_domain_id:
+            timestamps = pd.to_datetime(df[self.get_original_time_field()])
+            return entity.id + '_' + timestamps.dt.strftime('%Y-%m-%d')
+
+        return pd.Series([self.generate_domain_id(entity, item) for item in df.to_dict(orient='records')],
+                         index=df.index)
+
+    def generate_df(self, entity, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        the df version of generate_domain,map the record result to the columns of data_schema
+
+        :param entity:
+        :param df: the record result
+        :return:
+        """
+        the_map = self.get_data_map()
+        if the_map:
+            domain_df = pd.DataFrame(index=df.index)
+            for k, v in the_map.items():
+                if isinstance(v, tuple):
+                    field_in_df, the_func = v
+                else:
+                    field_in_df, the_func = v, None
+                if field_in_df in df.columns:
+                    domain_df[k] = df[field_in_df].map(
+                        lambda x: None if x is None or x in none_values else (the_func(x) if the_func else x))
+        else:
+            domain_df = df.copy()
+
+        domain_df['id'] = self.generate_df_ids(entity, df)
+        if 'timestamp' not in domain_df.columns:
+            domain_df['timestamp'] = pd.to_datetime(df[self.get_original_time_field()])
+        domain_df['entity_id'] = entity.id
+        domain_df['code'] = entity.code
+        if 'name' in get_schema_columns(self.data_schema) and 'name' not in domain_df.columns:
+            domain_df['name'] = entity.name
+        return domain_df
+
+    def handle_original_df(self, entity, df: pd.DataFrame) -> bool:
+        """
+        dedupe the record result in memory and with one IN query for the saved ones,then persist it
+
+        :param entity:
+        :param df: the record result
+        :return: whether all the record result are saved before
+        """
+        df = self.generate_df(entity, df)
+
+        # handle the case  generate_domain_id generate duplicate id
+        duplicated = df['id'].duplicated()
+        if duplicated.any():
+            if self.fix_duplicate_way == 'add':
+                df.loc[duplicated, 'id'] = [f'{the_id}_{uuid.uuid1()}' for the_id in df.loc[duplicated, 'id']]
+            else:
+                self.logger.info(f'ignore original duplicate items:{df.loc[duplicated, "id"].tolist()}')
+                df = df[~duplicated]
+
+        saved = get_data(data_schema=self.data_schema, provider=self.provider, entity_id=entity.id,
+                         ids=df['id'].tolist(), columns=['id'], session=self.session, use_cache=False)
+        if pd_is_not_null(saved):
+            is_saved = df['id'].isin(saved['id'])
+            all_duplicated = bool(is_saved.all())
+            if not self.force_update:
+                if all_duplicated:
+                    self.logger.info('ignore the data {} saved before'.format(self.data_schema))
+                df = df[~is_saved]
+        else:
+            all_duplicated = False
+
+        if pd_is_not_null(df):
+            self.persist_df(entity, df)
+        else:
+            self.logger.info('just got duplicated data in this cycle')
+
+        return all_duplicated
+
+    def persist_df(self, entity, df: pd.DataFrame):
+        """
+        persist the df to db
+
+        :param entity:
+        :param df:
+        """
+        self.logger.info(
+            "persist {} for entity_id:{},time interval:[{},{}]".format(
+                self.data_schema, entity.id, df['timestamp'].min(), df['timestamp'].max()))
+
+        df_to_db(df=df, data_schema=self.data_schema, provider=self.provider, force_update=self.force_update)
+
+    def load_saved_domains(self, entity, original_list) -> dict:
+        """
+        load the saved domains of the record result in one IN query for generate_domain
+
+        :param entity:
+        :param original_list:
+        :return: id -> saved domain
+        """
+        ids = {self.generate_domain_id(entity, original_data) for original_data in original_list if
+               not isinstance(original_data, self.data_schema)}
+        if not ids:
+            return {}
+
+        items = get_data(data_schema=self.data_schema, session=self.session, provider=self.provider,
+                         entity_id=entity.id, ids=list(ids), return_type='domain')
+        return {item.id: item for item in items}
+
     def persist(self, entity, domain_list):
         """
         persist the domain list to db
@@ -335,8 +511,16 @@ class TimeSeriesDataRecorder(RecorderForEntities):
                 "persist {} for entity_id:{},time interval:[{},{}]".format(
                     self.data_schema, entity.id, first_timestamp, last_timestamp))
 
+            if zvt_context.schema_map_storage.get(self.data_schema):
+                # the domains of the storage are not in the session
+                columns = get_schema_columns(self.data_schema)
+                df = pd.DataFrame([{col: getattr(item, col) for col in columns} for item in domain_list])
+                df_to_db(df=df, data_schema=self.data_schema, provider=self.provider, force_update=True)
+                return
+
             self.session.add_all(domain_list)
-            self.session.commit()
+            if self.auto_commit:
+                self.session.commit()
 
     def on_finish(self):
         try:
@@ -351,7 +535,143 @@ class TimeSeriesDataRecorder(RecorderForEntities):
     def on_finish_entity(self, entity):
         pass
 
+    def evaluate_entity(self, entity_item):
+        """
+        evaluate the recording range of the entity and log it
+
+        :param entity_item:
+        :return: start_timestamp, end_timestamp, size, timestamps
+        """
+        start_timestamp, end_timestamp, size, timestamps = self.evaluate_start_end_size_timestamps(entity_item)
+        size = int(size)
+
+        if timestamps:
+            self.logger.info('entity_id:{},evaluate_start_end_size_timestamps result:{},{},{},{}-{}'.format(
+                entity_item.id,
+                start_timestamp,
+                end_timestamp,
+                size,
+                timestamps[0],
+                timestamps[-1]))
+        else:
+            self.logger.info('entity_id:{},evaluate_start_end_size_timestamps result:{},{},{},{}'.format(
+                entity_item.id,
+                start_timestamp,
+                end_timestamp,
+                size,
+                timestamps))
+
+        # no more to record
+        if size == 0:
+            self.logger.info(
+                "finish recording {} for entity_id:{},latest_timestamp:{}".format(
+                    self.data_schema,
+                    entity_item.id,
+                    start_timestamp))
+            self.on_finish_entity(entity_item)
+
+        return start_timestamp, end_timestamp, size, timestamps
+
+    def fetch_entity(self, index, entity_item, start_timestamp, end_timestamp, size, timestamps):
+        """
+        call record for the entity,it's the only step running in the workers of concurrent mode
+
+        """
+        # sleep for a while to next entity
+        if index != 0:
+            self.sleep()
+
+        return self.record(entity_item, start=start_timestamp, end=end_timestamp, size=size,
+                           timestamps=timestamps)
+
+    def handle_original_list(self, entity_item, original_list, start_timestamp) -> bool:
+        """
+        generate the domains from the record result,persist them and check whether the entity is finished
+
+        :param entity_item:
+        :param original_list: the record result
+        :param start_timestamp: the evaluated start timestamp
+        :return: whether the entity is finished
+        """
+        all_duplicated = True
+
+        # the record result in columnar,persisted by df_to_db without the domain objects
+        if isinstance(original_list, pd.DataFrame):
+            if pd_is_not_null(original_list):
+                all_duplicated = self.handle_original_df(entity_item, original_list)
+            else:
+                original_list = None
+        elif original_list:
+            domain_list = []
+            domain_ids = set()
+            self.saved_domains = self.load_saved_domains(entity_item, original_list)
+            try:
+                for original_item in original_list:
+                    got_new_data, domain_item = self.generate_domain(entity_item, original_item)
+
+                    if got_new_data:
+                        all_duplicated = False
+
+                    # handle the case  generate_domain_id generate duplicate id
+                    if domain_item:
+                        if domain_item.id in domain_ids:
+                            # regenerate the id
+                            if self.fix_duplicate_way == 'add':
+                                domain_item.id = "{}_{}".format(domain_item.id, uuid.uuid1())
+                            # ignore
+                            else:
+                                self.logger.info(f'ignore original duplicate item:{domain_item.id}')
+                                continue
+
+                        domain_ids.add(domain_item.id)
+                        domain_list.append(domain_item)
+            finally:
+                self.saved_domains = None
+
+            if domain_list:
+                self.persist(entity_item, domain_list)
+            else:
+                self.logger.info('just got {} duplicated data in this cycle'.format(len(original_list)))
+
+        # could not get more data
+        entity_finished = False
+        if original_list is None or len(original_list) == 0 or all_duplicated:
+            # not realtime
+            if not self.real_time:
+                entity_finished = True
+
+            # realtime and to the close time
+            if self.real_time and \
+                    (self.close_hour is not None) and \
+                    (self.close_minute is not None):
+                current_timestamp = pd.Timestamp.now()
+                if current_timestamp.hour >= self.close_hour:
+                    if current_timestamp.minute - self.close_minute >= 5:
+                        self.logger.info(
+                            '{} now is the close time:{}'.format(entity_item.id, current_timestamp))
+
+                        entity_finished = True
+
+        if entity_finished:
+            latest_saved_record = self.get_latest_saved_record(entity=entity_item)
+            if latest_saved_record:
+                start_timestamp = eval('latest_saved_record.{}'.format(self.get_evaluated_time_field()))
+
+            self.logger.info(
+                "finish recording {} for entity_id:{},latest_timestamp:{}".format(
+                    self.data_schema,
+                    entity_item.id,
+                    start_timestamp))
+            self.on_finish_entity(entity_item)
+
+        return entity_finished
+
     def run(self):
+        if self.max_workers > 1:
+            return self.run_concurrently()
+
+        self.plan()
+
         finished_items = []
         unfinished_items = self.entities
         raising_exception = None
@@ -361,108 +681,20 @@ class TimeSeriesDataRecorder(RecorderForEntities):
                 try:
                     self.logger.info(f'run to {index + 1}/{count}')
 
-                    start_timestamp, end_timestamp, size, timestamps = self.evaluate_start_end_size_timestamps(
-                        entity_item)
-                    size = int(size)
-
-                    if timestamps:
-                        self.logger.info('entity_id:{},evaluate_start_end_size_timestamps result:{},{},{},{}-{}'.format(
-                            entity_item.id,
-                            start_timestamp,
-                            end_timestamp,
-                            size,
-                            timestamps[0],
-                            timestamps[-1]))
-                    else:
-                        self.logger.info('entity_id:{},evaluate_start_end_size_timestamps result:{},{},{},{}'.format(
-                            entity_item.id,
-                            start_timestamp,
-                            end_timestamp,
-                            size,
-                            timestamps))
+                    start_timestamp, end_timestamp, size, timestamps = self.evaluate_entity(entity_item)
 
                     # no more to record
                     if size == 0:
                         finished_items.append(entity_item)
-                        self.logger.info(
-                            "finish recording {} for entity_id:{},latest_timestamp:{}".format(
-                                self.data_schema,
-                                entity_item.id,
-                                start_timestamp))
-                        self.on_finish_entity(entity_item)
                         continue
 
-                    # sleep for a while to next entity
-                    if index != 0:
-                        self.sleep()
-
-                    original_list = self.record(entity_item, start=start_timestamp, end=end_timestamp, size=size,
-                                                timestamps=timestamps)
-
-                    all_duplicated = True
-
-                    if original_list:
-                        domain_list = []
-                        for original_item in original_list:
-                            got_new_data, domain_item = self.generate_domain(entity_item, original_item)
-
-                            if got_new_data:
-                                all_duplicated = False
-
-                            # handle the case  generate_domain_id generate duplicate id
-                            if domain_item:
-                                duplicate = [item for item in domain_list if item.id == domain_item.id]
-                                if duplicate:
-                                    # regenerate the id
-                                    if self.fix_duplicate_way == 'add':
-                                        domain_item.id = "{}_{}".format(domain_item.id, uuid.uuid1())
-                                    # ignore
-                                    else:
-                                        self.logger.info(f'ignore original duplicate item:{domain_item.id}')
-                                        continue
-
-                                domain_list.append(domain_item)
-
-                        if domain_list:
-                            self.persist(entity_item, domain_list)
-                        else:
-                            self.logger.info('just got {} duplicated data in this cycle'.format(len(original_list)))
-
-                    # could not get more data
-                    entity_finished = False
-                    if not original_list or all_duplicated:
-                        # not realtime
-                        if not self.real_time:
-                            entity_finished = True
-
-                        # realtime and to the close time
-                        if self.real_time and \
-                                (self.close_hour is not None) and \
-                                (self.close_minute is not None):
-                            current_timestamp = pd.Timestamp.now()
-                            if current_timestamp.hour >= self.close_hour:
-                                if current_timestamp.minute - self.close_minute >= 5:
-                                    self.logger.info(
-                                        '{} now is the close time:{}'.format(entity_item.id, current_timestamp))
-
-                                    entity_finished = True
+                    original_list = self.fetch_entity(index, entity_item, start_timestamp, end_timestamp, size,
+                                                      timestamps)
 
                     # add finished entity to finished_items
-                    if entity_finished:
+                    if self.handle_original_list(entity_item, original_list, start_timestamp):
                         finished_items.append(entity_item)
 
-                        latest_saved_record = self.get_latest_saved_record(entity=entity_item)
-                        if latest_saved_record:
-                            start_timestamp = eval('latest_saved_record.{}'.format(self.get_evaluated_time_field()))
-
-                        self.logger.info(
-                            "finish recording {} for entity_id:{},latest_timestamp:{}".format(
-                                self.data_schema,
-                                entity_item.id,
-                                start_timestamp))
-                        self.on_finish_entity(entity_item)
-                        continue
-
                 except Exception as e:
                     self.logger.exception(
                         "recording data for entity_id:{},{},error:{}".format(entity_item.id, self.data_schema, e))
@@ -480,6 +712,72 @@ class TimeSeriesDataRecorder(RecorderForEntities):
         if raising_exception:
             raise raising_exception
 
+    def run_concurrently(self):
+        """
+        the workers(max_workers) only call record for the entities concurrently,
+        the calling thread is the only writer:it evaluates,generates the domains and persists in the entity order,
+        so the session is never shared between threads.
+
+        make sure the record method of the recorder is thread safe(not using self.session) before using it.
+        """
+        self.plan()
+
+        finished_items = []
+        unfinished_items = self.entities
+        raising_exception = None
+
+        max_pending = max(1, self.max_workers * self.max_pending_factor)
+
+        def handle_next():
+            entity, start, future = pending.popleft()
+            if self.handle_original_list(entity, future.result(), start):
+                finished_items.append(entity)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                count = len(unfinished_items)
+                submitted_count = 0
+                pending = deque()
+                try:
+                    for index, entity_item in enumerate(unfinished_items):
+                        self.logger.info(f'run to {index + 1}/{count}')
+
+                        start_timestamp, end_timestamp, size, timestamps = self.evaluate_entity(entity_item)
+
+                        # no more to record
+                        if size == 0:
+                            finished_items.append(entity_item)
+                            continue
+
+                        future = executor.submit(self.fetch_entity, submitted_count, entity_item, start_timestamp,
+                                                 end_timestamp, size, timestamps)
+                        submitted_count = submitted_count + 1
+                        pending.append((entity_item, start_timestamp, future))
+
+                        # persist as going,the results in memory are bounded
+                        while len(pending) >= max_pending:
+                            handle_next()
+
+                    # handle the results in the submitting order
+                    while pending:
+                        handle_next()
+                except Exception as e:
+                    self.logger.exception("recording data for {},error:{}".format(self.data_schema, e))
+                    raising_exception = e
+                    finished_items = unfinished_items
+                    for _, _, future in pending:
+                        future.cancel()
+
+                unfinished_items = set(unfinished_items) - set(finished_items)
+
+                if len(unfinished_items) == 0:
+                    break
+
+        self.on_finish()
+
+        if raising_exception:
+            raise raising_exception
+
 
 class FixedCycleDataRecorder(TimeSeriesDataRecorder):
     def __init__(self,
@@ -525,24 +823,53 @@ class FixedCycleDataRecorder(TimeSeriesDataRecorder):
             # delete unfinished kdata
             if len(records) == 2:
                 if is_in_same_interval(t1=records[0].timestamp, t2=records[1].timestamp, level=self.level):
-                    self.session.delete(records[0])
-                    self.session.flush()
+                    delete_data(data_schema=self.data_schema, provider=self.provider, ids=[records[0].id],
+                                session=self.session)
                     return records[1]
             return records[0]
         return None
 
+    def load_latest_timestamps(self) -> dict:
+        """
+        the kdata version of get_latest_saved_record for all the entities:read the latest 2 kdata of every entity in
+        one query and delete the unfinished ones
+        """
+        filters = None
+        if hasattr(self.data_schema, 'level'):
+            filters = [self.data_schema.level == self.level.value]
+
+        df = get_window_data(data_schema=self.data_schema, provider=self.provider, window=2,
+                             entity_ids=[entity.id for entity in self.entities], filters=filters,
+                             session=self.session)
+        if not pd_is_not_null(df):
+            return {}
+
+        latest_timestamps = {}
+        unfinished_ids = []
+        for entity_id, df in df.groupby('entity_id', sort=False):
+            timestamps = df['timestamp'].tolist()
+            if len(timestamps) == 2 and is_in_same_interval(t1=timestamps[1], t2=timestamps[0], level=self.level):
+                unfinished_ids.append(df['id'].iloc[1])
+                latest_timestamps[entity_id] = timestamps[0]
+            else:
+                latest_timestamps[entity_id] = timestamps[-1]
+
+        # delete unfinished kdata
+        if unfinished_ids:
+            delete_data(data_schema=self.data_schema, provider=self.provider, ids=unfinished_ids,
+                        session=self.session)
+
+        return latest_timestamps
+
     def evaluate_start_end_size_timestamps(self, entity):
         # not to list date yet
         if entity.timestamp and (entity.timestamp >= now_pd_timestamp()):
             return entity.timestamp, None, 0, None
 
         # get latest record
-        latest_saved_record = self.get_latest_saved_record(entity=entity)
+        latest_saved_timestamp = self.get_latest_saved_timestamp(entity=entity)
 
-        if latest_saved_record:
-            # the latest saved timestamp
-            latest_saved_timestamp = latest_saved_record.timestamp
-        else:
+        if not latest_saved_timestamp:
             # the list date
             latest_saved_timestamp = entity.timestamp
 
@@ -600,11 +927,11 @@ class TimestampsDataRecorder(TimeSeriesDataRecorder):
         self.logger.info(
             'entity_id:{},timestamps start:{},end:{}'.format(entity.id, timestamps[0], timestamps[-1]))
 
-        latest_record = self.get_latest_saved_record(entity=entity)
+        latest_timestamp = self.get_latest_saved_timestamp(entity=entity)
 
-        if latest_record:
-            self.logger.info('latest record timestamp:{}'.format(latest_record.timestamp))
-            timestamps = [t for t in timestamps if t >= latest_record.timestamp]
+        if latest_timestamp:
+            self.logger.info('latest record timestamp:{}'.format(latest_timestamp))
+            timestamps = [t for t in timestamps if t >= latest_timestamp]
 
             if timestamps:
                 return timestamps[0], timestamps[-1], len(timestamps), timestamps
@@ -2,11 +2,10 @@
 import logging
 from typing import List
 
-import sqlalchemy
 from sqlalchemy.ext.declarative import DeclarativeMeta
 
 from zvt.contract import EntityMixin, zvt_context, Mixin
-from zvt.contract.api import get_db_engine, get_db_session_factory
+from zvt.contract.api import init_db
 from zvt.utils.utils import add_to_map_list
 
 logger = logging.getLogger(__name__)
@@ -39,6 +38,19 @@ def register_entity(entity_type: str = None):
     return register
 
 
+def register_storage(data_schemas: List[DeclarativeMeta], storage):
+    """
+    function for register storage for the schemas,get_data and df_to_db would read and write the schemas by it
+
+    :param data_schemas:
+    :type data_schemas:
+    :param storage: instance of zvt.contract.storage.Storage
+    :type storage:
+    """
+    for data_schema in data_schemas:
+        zvt_context.schema_map_storage[data_schema] = storage
+
+
 def register_schema(providers: List[str],
                     db_name: str,
                     schema_base: DeclarativeMeta,
@@ -84,39 +96,7 @@ def register_schema(providers: List[str],
         zvt_context.provider_map_dbnames[provider].append(db_name)
         zvt_context.dbname_map_base[db_name] = schema_base
 
-        # create the db & table
-        engine = get_db_engine(provider, db_name=db_name)
-        schema_base.metadata.create_all(engine)
-
-        session_fac = get_db_session_factory(provider, db_name=db_name)
-        session_fac.configure(bind=engine)
-
-    for provider in providers:
-        engine = get_db_engine(provider, db_name=db_name)
-
-        # create index for 'timestamp','entity_id','code','report_period','updated_timestamp
-        for table_name, table in iter(schema_base.metadata.tables.items()):
-            index_list = []
-            with engine.connect() as con:
-                rs = con.execute("PRAGMA INDEX_LIST('{}')".format(table_name))
-                for row in rs:
-                    index_list.append(row[1])
-
-            logger.debug('engine:{},table:{},index:{}'.format(engine, table_name, index_list))
-
-            for col in ['timestamp', 'entity_id', 'code', 'report_period', 'created_timestamp', 'updated_timestamp']:
-                if col in table.c:
-                    column = eval('table.c.{}'.format(col))
-                    index_name = '{}_{}_index'.format(table_name, col)
-                    if index_name not in index_list:
-                        index = sqlalchemy.schema.Index(index_name, column)
-                        index.create(engine)
-            for cols in [('timestamp', 'entity_id'), ('timestamp', 'code')]:
-                if (cols[0] in table.c) and (col[1] in table.c):
-                    column0 = eval('table.c.{}'.format(col[0]))
-                    column1 = eval('table.c.{}'.format(col[1]))
-                    index_name = '{}_{}_{}_index'.format(table_name, col[0], col[1])
-                    if index_name not in index_list:
-                        index = sqlalchemy.schema.Index(index_name, column0,
-                                                        column1)
-                        index.create(engine)
+        # the db & table would be created on first access(get_db_engine),init it here only if accessed before
+        engine = zvt_context.db_engine_map.get('{}_{}'.format(provider, db_name))
+        if engine:
+            init_db(engine, schema_base)
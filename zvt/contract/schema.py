@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import inspect
-from datetime import timedelta
 from typing import List, Union
 
 import pandas as pd
@@ -8,6 +7,7 @@ from sqlalchemy import Column, String, DateTime
 from sqlalchemy.orm import Session
 
 from zvt.contract import IntervalLevel
+from zvt.contract.trading_calendar import TradingCalendar
 from zvt.utils.time_utils import date_and_time, is_same_time
 
 
@@ -75,14 +75,18 @@ class Mixin(object):
                    order=None,
                    limit: int = None,
                    index: Union[str, list] = None,
-                   time_field: str = 'timestamp'):
+                   time_field: str = 'timestamp',
+                   use_cache: bool = False,
+                   chunk_size: int = 10000,
+                   time_slice: str = None):
         from .api import get_data
         if not provider:
             provider = cls.providers[provider_index]
         return get_data(data_schema=cls, ids=ids, entity_ids=entity_ids, entity_id=entity_id, codes=codes,
                         code=code, level=level, provider=provider, columns=columns, col_label=col_label,
                         return_type=return_type, start_timestamp=start_timestamp, end_timestamp=end_timestamp,
-                        filters=filters, session=session, order=order, limit=limit, index=index, time_field=time_field)
+                        filters=filters, session=session, order=order, limit=limit, index=index, time_field=time_field,
+                        use_cache=use_cache, chunk_size=chunk_size, time_slice=time_slice)
 
     @classmethod
     def record_data(cls,
@@ -102,6 +106,9 @@ class Mixin(object):
                     close_hour=None,
                     close_minute=None,
                     one_day_trading_minutes=None):
+        # the recorders register themselves to the schemas when importing
+        import zvt.recorders
+
         if cls.provider_map_recorder:
             print(f'{cls.__name__} registered recorders:{cls.provider_map_recorder}')
 
@@ -168,16 +175,42 @@ class EntityMixin(Mixin):
     code = Column(String(length=64))
     name = Column(String(length=128))
 
+    @classmethod
+    def get_trading_days(cls):
+        """
+        overwrite it to provide the real trading days of the entity,None means business days
+
+        :return: list of the trading days
+        """
+        return None
+
+    @classmethod
+    def get_trading_calendar(cls, refresh: bool = False) -> TradingCalendar:
+        """
+        the trading calendar of the entity,it's built from get_trading_days once and cached in the class
+
+        :param refresh: rebuild it,e.g,the trading days updated
+        :return:
+        """
+        if refresh or '_trading_calendar' not in cls.__dict__:
+            cls._trading_calendar = TradingCalendar(trading_days=cls.get_trading_days(),
+                                                    trading_intervals=cls.get_trading_intervals())
+        return cls._trading_calendar
+
     @classmethod
     def get_trading_dates(cls, start_date=None, end_date=None):
         """
-        overwrite it to get the trading dates of the entity
+        get the trading dates of the entity
 
         :param start_date:
         :param end_date:
         :return:
         """
-        return pd.date_range(start_date, end_date, freq='B')
+        return cls.get_trading_calendar().get_trading_dates(start_date=start_date, end_date=end_date)
+
+    @classmethod
+    def is_trading_date(cls, timestamp):
+        return cls.get_trading_calendar().is_trading_date(timestamp)
 
     @classmethod
     def get_trading_intervals(cls):
@@ -197,23 +230,8 @@ class EntityMixin(Mixin):
         :param end_date:
         :param level:
         """
-
-        for current_date in cls.get_trading_dates(start_date=start_date, end_date=end_date):
-            if level >= IntervalLevel.LEVEL_1DAY:
-                yield current_date
-            else:
-                start_end_list = cls.get_trading_intervals()
-
-                for start_end in start_end_list:
-                    start = start_end[0]
-                    end = start_end[1]
-
-                    current_timestamp = date_and_time(the_date=current_date, the_time=start)
-                    end_timestamp = date_and_time(the_date=current_date, the_time=end)
-
-                    while current_timestamp <= end_timestamp:
-                        yield current_timestamp
-                        current_timestamp = current_timestamp + timedelta(minutes=level.to_minute())
+        return cls.get_trading_calendar().get_interval_timestamps(start_date=start_date, end_date=end_date,
+                                                                  level=level)
 
     @classmethod
     def is_open_timestamp(cls, timestamp):
@@ -237,13 +255,7 @@ class EntityMixin(Mixin):
         :return:
         :rtype: bool
         """
-        timestamp = pd.Timestamp(timestamp)
-
-        for t in cls.get_interval_timestamps(timestamp.date(), timestamp.date(), level=level):
-            if is_same_time(t, timestamp):
-                return True
-
-        return False
+        return cls.get_trading_calendar().is_finished_kdata_timestamp(timestamp=timestamp, level=level)
 
     @classmethod
     def could_short(cls):
@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import List, Union
+
+import pandas as pd
+from sqlalchemy import Float, Integer, BigInteger, Boolean, DateTime, Date
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BooleanClauseList, UnaryExpression, BindParameter, \
+    Grouping, ClauseList
+from sqlalchemy.sql.schema import Column
+
+from zvt import zvt_env
+from zvt.contract import IntervalLevel
+from zvt.utils.pd_utils import pd_is_not_null, index_df
+from zvt.utils.time_utils import to_pd_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class Storage(ABC):
+    """
+    storage backend of the schema,the default one is the sqlite db and the others could be registered by
+    zvt.contract.register.register_storage
+    """
+
+    @abstractmethod
+    def query(self,
+              data_schema,
+              provider: str,
+              ids: List[str] = None,
+              entity_ids: List[str] = None,
+              entity_id: str = None,
+              codes: List[str] = None,
+              code: str = None,
+              level: Union[IntervalLevel, str] = None,
+              columns: List = None,
+              col_label: dict = None,
+              return_type: str = 'df',
+              start_timestamp: Union[pd.Timestamp, str] = None,
+              end_timestamp: Union[pd.Timestamp, str] = None,
+              filters: List = None,
+              order=None,
+              limit: int = None,
+              index: Union[str, list] = None,
+              time_field: str = 'timestamp',
+              chunk_size: int = 10000):
+        """
+        :param return_type: df,domain,dict or iter.iter returns a generator of df chunks
+        :param chunk_size: max rows of the chunk for return_type='iter'
+        """
+        pass
+
+    @abstractmethod
+    def write(self, df: pd.DataFrame, data_schema, provider: str, force_update: bool = False):
+        pass
+
+    @abstractmethod
+    def delete(self, data_schema, provider: str, ids: List[str]):
+        pass
+
+
+class ParquetStorage(Storage):
+    """
+    store the data in parquet files,the layout is:
+
+    {root_path}/{provider}/{table_name}/level={level}/year={year}/part-{uuid}.parquet
+
+    every write appends a new part file to the partitions,call compact to merge them.
+    the columns,time/entity/code/id predicates and the simple filters(column op value) are pushed down to the files.
+
+    it needs pyarrow(pip install pyarrow)
+    """
+
+    # the files are sorted by entity_id,smaller row group makes entity predicate skip more
+    row_group_size = 100000
+
+    def __init__(self, root_path: str = None) -> None:
+        self._root_path = root_path
+
+    @property
+    def root_path(self):
+        # the default one follows the current data path
+        if self._root_path:
+            return self._root_path
+        return os.path.join(zvt_env['data_path'], 'parquet')
+
+    def get_path(self, data_schema, provider):
+        return os.path.join(self.root_path, provider, data_schema.__tablename__)
+
+    @staticmethod
+    def partition_cols(data_schema):
+        if 'level' in data_schema.__table__.columns:
+            return ['level', 'year']
+        return ['year']
+
+    @staticmethod
+    def to_arrow_type(col_type):
+        import pyarrow as pa
+
+        if isinstance(col_type, (DateTime, Date)):
+            return pa.timestamp('ns')
+        if isinstance(col_type, Float):
+            return pa.float64()
+        if isinstance(col_type, (Integer, BigInteger)):
+            return pa.int64()
+        if isinstance(col_type, Boolean):
+            return pa.bool_()
+        return pa.string()
+
+    def arrow_schema(self, data_schema):
+        """
+        schema of the parquet files,the partition columns are not stored in the files
+        """
+        import pyarrow as pa
+
+        partition_cols = self.partition_cols(data_schema)
+        return pa.schema([(col.name, self.to_arrow_type(col.type)) for col in data_schema.__table__.columns if
+                          col.name not in partition_cols])
+
+    def partition_schema(self, data_schema):
+        import pyarrow as pa
+
+        fields = [('year', pa.int32())]
+        if 'level' in self.partition_cols(data_schema):
+            fields = [('level', pa.string())] + fields
+        return pa.schema(fields)
+
+    @staticmethod
+    def iter_df(batches, columns, by, ascending, limit=None, col_label=None, index=None, time_field='timestamp'):
+        """
+        the df chunks of the record batches,only the chunk is sorted by the order,
+        use time_slice of get_data for the time ordered chunks
+        """
+        count = 0
+        for df in batches:
+            if df.empty:
+                continue
+            df = df.sort_values(by=by, ascending=ascending, kind='mergesort')
+            if by not in columns:
+                df = df[columns]
+            if limit:
+                df = df.head(limit - count)
+            count = count + len(df)
+            df = df.reset_index(drop=True)
+            if col_label:
+                df = df.rename(columns=col_label)
+            if index:
+                df = index_df(df, index=index, time_field=time_field)
+            yield df
+            if limit and count >= limit:
+                return
+
+    @staticmethod
+    def id_range(file):
+        """
+        min/max id of the file from the row group statistics,None if unknown
+        """
+        import pyarrow.parquet as pq
+
+        metadata = pq.ParquetFile(file).metadata
+        index = metadata.schema.names.index('id')
+        min_id, max_id = None, None
+        for i in range(metadata.num_row_groups):
+            statistics = metadata.row_group(i).column(index).statistics
+            if statistics is None or not statistics.has_min_max:
+                return None
+            min_id = statistics.min if min_id is None else min(min_id, statistics.min)
+            max_id = statistics.max if max_id is None else max(max_id, statistics.max)
+        if min_id is None:
+            return None
+        return min_id, max_id
+
+    def write_file(self, table, path):
+        import pyarrow.parquet as pq
+
+        # write to tmp file at first to avoid broken file
+        tmp_path = path + '.tmp'
+        pq.write_table(table, tmp_path, row_group_size=self.row_group_size)
+        os.replace(tmp_path, path)
+
+    def write(self, df: pd.DataFrame, data_schema, provider: str, force_update: bool = False):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        if not pd_is_not_null(df):
+            return
+
+        time_field = data_schema.time_field()
+        arrow_schema = self.arrow_schema(data_schema)
+
+        df = df.copy()
+        df[time_field] = pd.to_datetime(df[time_field])
+        # OR REPLACE keeps the last one and OR IGNORE keeps the first one
+        df = df.drop_duplicates(subset='id', keep='last' if force_update else 'first')
+        df['year'] = df[time_field].dt.year
+
+        if 'level' in self.partition_cols(data_schema):
+            df['level'] = df['level'].apply(lambda x: x.value if isinstance(x, IntervalLevel) else x)
+
+        for col in arrow_schema.names:
+            if col not in df.columns:
+                df[col] = None
+
+        path = self.get_path(data_schema, provider)
+
+        for partition, partition_df in df.groupby(self.partition_cols(data_schema)):
+            if type(partition) != tuple:
+                partition = (partition,)
+            partition_dir = os.path.join(path, *['{}={}'.format(col, value) for col, value in
+                                                 zip(self.partition_cols(data_schema), partition)])
+            os.makedirs(partition_dir, exist_ok=True)
+
+            new_ids = pa.array(partition_df['id'].tolist(), type=pa.string())
+            min_id, max_id = partition_df['id'].min(), partition_df['id'].max()
+
+            for file_name in os.listdir(partition_dir):
+                if not file_name.endswith('.parquet'):
+                    continue
+                file = os.path.join(partition_dir, file_name)
+
+                id_range = self.id_range(file)
+                if id_range and (id_range[1] < min_id or id_range[0] > max_id):
+                    continue
+
+                if force_update:
+                    self.remove_ids(file, new_ids)
+                else:
+                    ids = pq.read_table(file, columns=['id'])['id']
+                    existing_ids = ids.filter(pc.is_in(ids, value_set=new_ids)).to_pylist()
+                    if existing_ids:
+                        partition_df = partition_df[~partition_df['id'].isin(existing_ids)]
+
+            if partition_df.empty:
+                continue
+
+            partition_df = partition_df.sort_values(by=['entity_id', time_field])
+            table = pa.Table.from_pandas(partition_df[arrow_schema.names], schema=arrow_schema,
+                                         preserve_index=False)
+            self.write_file(table, os.path.join(partition_dir, 'part-{}.parquet'.format(uuid.uuid4().hex)))
+
+    def remove_ids(self, file, value_set):
+        """
+        remove the rows of the ids(pyarrow array) from the file
+        """
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(file)
+        removed = pc.is_in(table['id'], value_set=value_set)
+        if pc.any(removed).as_py():
+            table = table.filter(pc.invert(removed))
+            if table.num_rows == 0:
+                os.remove(file)
+            else:
+                self.write_file(table, file)
+
+    def delete(self, data_schema, provider: str, ids: List[str]):
+        import pyarrow as pa
+
+        if not ids:
+            return
+
+        value_set = pa.array(list(ids), type=pa.string())
+        min_id, max_id = min(ids), max(ids)
+        for root, _, file_names in os.walk(self.get_path(data_schema, provider)):
+            for file_name in file_names:
+                if not file_name.endswith('.parquet'):
+                    continue
+                file = os.path.join(root, file_name)
+
+                id_range = self.id_range(file)
+                if id_range and (id_range[1] < min_id or id_range[0] > max_id):
+                    continue
+                self.remove_ids(file, value_set)
+
+    def compact(self, data_schema, provider: str):
+        """
+        merge the part files of every partition into one sorted file
+
+        :param data_schema:
+        :param provider:
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        time_field = data_schema.time_field()
+        arrow_schema = self.arrow_schema(data_schema)
+        for root, _, file_names in os.walk(self.get_path(data_schema, provider)):
+            files = [os.path.join(root, file_name) for file_name in file_names if file_name.endswith('.parquet')]
+            if len(files) <= 1:
+                continue
+            df = pd.concat([pq.read_table(file).to_pandas() for file in files])
+            df = df.sort_values(by=['entity_id', time_field])
+            self.write_file(pa.Table.from_pandas(df, schema=arrow_schema, preserve_index=False),
+                            os.path.join(root, 'part-{}.parquet'.format(uuid.uuid4().hex)))
+            for file in files:
+                os.remove(file)
+
+    def to_expression(self, data_schema, filter):
+        """
+        sqlalchemy filter -> pyarrow expression,only column op value and the and/or of them are supported
+        """
+        import pyarrow.dataset as ds
+
+        if isinstance(filter, BooleanClauseList):
+            expressions = [self.to_expression(data_schema, clause) for clause in filter.clauses]
+            result = expressions[0]
+            for expression in expressions[1:]:
+                if filter.operator == operators.and_:
+                    result = result & expression
+                elif filter.operator == operators.or_:
+                    result = result | expression
+                else:
+                    raise ValueError('unsupported filter for parquet storage:{}'.format(filter))
+            return result
+
+        if isinstance(filter, BinaryExpression) and isinstance(filter.left, Column):
+            field = ds.field(filter.left.name)
+
+            right = filter.right
+            if isinstance(right, Grouping):
+                right = right.element
+
+            if isinstance(right, ClauseList):
+                values = [self.to_value(filter.left, item.value) for item in right.clauses]
+            elif isinstance(right, BindParameter):
+                values = self.to_value(filter.left, right.value)
+            else:
+                raise ValueError('unsupported filter for parquet storage:{}'.format(filter))
+
+            op = filter.operator
+            if op == operators.in_op:
+                return field.isin(values)
+            if op == operators.notin_op:
+                return ~field.isin(values)
+            if op == operators.eq:
+                return field == values
+            if op == operators.ne:
+                return field != values
+            if op == operators.lt:
+                return field < values
+            if op == operators.le:
+                return field <= values
+            if op == operators.gt:
+                return field > values
+            if op == operators.ge:
+                return field >= values
+
+        raise ValueError('unsupported filter for parquet storage:{}'.format(filter))
+
+    def to_value(self, column, value):
+        import pyarrow as pa
+
+        if isinstance(column.type, (DateTime, Date)):
+            return pa.scalar(to_pd_timestamp(value).to_datetime64(), type=pa.timestamp('ns'))
+        if isinstance(value, IntervalLevel):
+            return value.value
+        return value
+
+    def query(self,
+              data_schema,
+              provider: str,
+              ids: List[str] = None,
+              entity_ids: List[str] = None,
+              entity_id: str = None,
+              codes: List[str] = None,
+              code: str = None,
+              level: Union[IntervalLevel, str] = None,
+              columns: List = None,
+              col_label: dict = None,
+              return_type: str = 'df',
+              start_timestamp: Union[pd.Timestamp, str] = None,
+              end_timestamp: Union[pd.Timestamp, str] = None,
+              filters: List = None,
+              order=None,
+              limit: int = None,
+              index: Union[str, list] = None,
+              time_field: str = 'timestamp',
+              chunk_size: int = 10000):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        time_col = eval('data_schema.{}'.format(time_field))
+
+        if columns:
+            columns = [col if isinstance(col, str) else col.name for col in columns]
+            # make sure get timestamp
+            if time_field not in columns:
+                columns.append(time_field)
+        else:
+            columns = [col.name for col in data_schema.__table__.columns]
+
+        expressions = []
+        if entity_id:
+            expressions.append(ds.field('entity_id') == entity_id)
+        if entity_ids:
+            expressions.append(ds.field('entity_id').isin(entity_ids))
+        if code:
+            expressions.append(ds.field('code') == code)
+        if codes:
+            expressions.append(ds.field('code').isin(codes))
+        if ids:
+            expressions.append(ds.field('id').isin(ids))
+        if level and 'level' in self.partition_cols(data_schema):
+            expressions.append(ds.field('level') == IntervalLevel(level).value)
+
+        # the year partitions are pruned by the time range
+        if start_timestamp:
+            start_timestamp = to_pd_timestamp(start_timestamp)
+            expressions.append(ds.field('year') >= start_timestamp.year)
+            expressions.append(ds.field(time_field) >= self.to_value(time_col, start_timestamp))
+        if end_timestamp:
+            end_timestamp = to_pd_timestamp(end_timestamp)
+            expressions.append(ds.field('year') <= end_timestamp.year)
+            expressions.append(ds.field(time_field) <= self.to_value(time_col, end_timestamp))
+
+        if filters:
+            for filter in filters:
+                expressions.append(self.to_expression(data_schema, filter))
+
+        # sort by
+        if order is not None:
+            if isinstance(order, UnaryExpression) and isinstance(order.element, Column):
+                by, ascending = order.element.name, order.modifier != operators.desc_op
+            elif isinstance(order, Column):
+                by, ascending = order.name, True
+            else:
+                raise ValueError('unsupported order for parquet storage:{}'.format(order))
+        else:
+            by, ascending = time_field, True
+
+        path = self.get_path(data_schema, provider)
+        if os.path.exists(path):
+            partition_schema = self.partition_schema(data_schema)
+            dataset = ds.dataset(path, schema=pa.unify_schemas([self.arrow_schema(data_schema), partition_schema]),
+                                 format='parquet', partitioning=ds.partitioning(partition_schema, flavor='hive'))
+            expression = None
+            for item in expressions:
+                expression = item if expression is None else expression & item
+
+            read_columns = columns if by in columns else columns + [by]
+            if return_type == 'iter':
+                batches = (batch.to_pandas() for batch in
+                           dataset.to_batches(columns=read_columns, filter=expression, batch_size=chunk_size))
+                return self.iter_df(batches, columns=columns, by=by, ascending=ascending, limit=limit,
+                                    col_label=col_label, index=index, time_field=time_field)
+
+            df = dataset.to_table(columns=read_columns, filter=expression).to_pandas()
+            df = df.sort_values(by=by, ascending=ascending, kind='mergesort')
+            if by not in columns:
+                df = df[columns]
+        else:
+            df = pd.DataFrame(columns=columns)
+            if return_type == 'iter':
+                return iter([])
+
+        if limit:
+            df = df.head(limit)
+        df = df.reset_index(drop=True)
+
+        if col_label:
+            df = df.rename(columns=col_label)
+
+        if return_type == 'df':
+            if pd_is_not_null(df):
+                if index:
+                    df = index_df(df, index=index, time_field=time_field)
+            return df
+        elif return_type == 'domain':
+            return [data_schema(**item) for item in df.to_dict(orient='records')]
+        elif return_type == 'dict':
+            return df.to_dict(orient='records')
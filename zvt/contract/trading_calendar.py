@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+from typing import List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from zvt.contract import IntervalLevel
+
+ONE_DAY = pd.Timedelta(days=1)
+
+
+class TradingCalendar(object):
+    """
+    trading days and the intraday kdata timestamps of the levels,all the lookups are binary search on sorted arrays.
+
+    the days out of the range of trading_days(or all days if not set) are regarded as business days
+    """
+
+    def __init__(self,
+                 trading_days: Union[List, pd.Series, pd.DatetimeIndex] = None,
+                 trading_intervals: List[Tuple[str, str]] = (('09:30', '11:30'), ('13:00', '15:00'))) -> None:
+        if trading_days is not None and len(trading_days) > 0:
+            days = pd.DatetimeIndex(trading_days).normalize().unique().sort_values()
+            self.days = days.values
+        else:
+            self.days = np.array([], dtype='datetime64[ns]')
+
+        self.trading_intervals = list(trading_intervals)
+        # level -> offsets of the kdata timestamps in the day
+        self.level_map_offsets = {}
+
+    def has_days(self):
+        return len(self.days) > 0
+
+    def get_trading_dates(self, start_date=None, end_date=None) -> pd.DatetimeIndex:
+        if start_date is None:
+            start_date = self.days[0] if self.has_days() else end_date
+        if end_date is None:
+            end_date = self.days[-1] if self.has_days() else start_date
+        if start_date is None:
+            return pd.DatetimeIndex([])
+
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize()
+
+        if not self.has_days():
+            return pd.bdate_range(start, end)
+
+        first, last = pd.Timestamp(self.days[0]), pd.Timestamp(self.days[-1])
+
+        parts = []
+        if start < first:
+            parts.append(pd.bdate_range(start, min(end, first - ONE_DAY)).values)
+
+        left = np.searchsorted(self.days, start.to_datetime64(), side='left')
+        right = np.searchsorted(self.days, end.to_datetime64(), side='right')
+        parts.append(self.days[left:right])
+
+        if end > last:
+            parts.append(pd.bdate_range(max(start, last + ONE_DAY), end).values)
+
+        return pd.DatetimeIndex(np.concatenate(parts))
+
+    def is_trading_date(self, timestamp) -> bool:
+        day = pd.Timestamp(timestamp).normalize()
+
+        if self.has_days() and self.days[0] <= day.to_datetime64() <= self.days[-1]:
+            index = np.searchsorted(self.days, day.to_datetime64())
+            return self.days[index] == day.to_datetime64()
+
+        return day.weekday() < 5
+
+    def next_trading_date(self, timestamp) -> pd.Timestamp:
+        """
+        the first trading date after timestamp
+        """
+        day = pd.Timestamp(timestamp).normalize()
+        if self.has_days() and day.to_datetime64() < self.days[-1]:
+            if day.to_datetime64() >= self.days[0]:
+                return pd.Timestamp(self.days[np.searchsorted(self.days, day.to_datetime64(), side='right')])
+            next_day = day + pd.offsets.BDay(1)
+            return min(next_day, pd.Timestamp(self.days[0]))
+        return day + pd.offsets.BDay(1)
+
+    def prev_trading_date(self, timestamp) -> pd.Timestamp:
+        """
+        the last trading date before timestamp
+        """
+        day = pd.Timestamp(timestamp).normalize()
+        if self.has_days() and day.to_datetime64() > self.days[0]:
+            if day.to_datetime64() <= self.days[-1]:
+                return pd.Timestamp(self.days[np.searchsorted(self.days, day.to_datetime64(), side='left') - 1])
+            prev_day = day - pd.offsets.BDay(1)
+            return max(prev_day, pd.Timestamp(self.days[-1]))
+        return day - pd.offsets.BDay(1)
+
+    def get_offsets(self, level: IntervalLevel) -> np.ndarray:
+        """
+        offsets of the kdata timestamps from the start of the day for the intraday level
+        """
+        offsets = self.level_map_offsets.get(level)
+        if offsets is None:
+            step = pd.Timedelta(minutes=level.to_minute())
+            offsets = []
+            for start, end in self.trading_intervals:
+                current = pd.Timedelta(start + ':00')
+                end = pd.Timedelta(end + ':00')
+                while current <= end:
+                    offsets.append(current)
+                    current = current + step
+            offsets = pd.TimedeltaIndex(offsets).values
+            self.level_map_offsets[level] = offsets
+        return offsets
+
+    def get_interval_timestamps(self, start_date, end_date, level: IntervalLevel) -> pd.DatetimeIndex:
+        level = IntervalLevel(level)
+        days = self.get_trading_dates(start_date=start_date, end_date=end_date)
+        if level >= IntervalLevel.LEVEL_1DAY:
+            return days
+
+        offsets = self.get_offsets(level)
+        return pd.DatetimeIndex((days.values[:, None] + offsets[None, :]).ravel())
+
+    def is_finished_kdata_timestamp(self, timestamp, level: IntervalLevel) -> bool:
+        level = IntervalLevel(level)
+        timestamp = pd.Timestamp(timestamp)
+        day = timestamp.normalize()
+
+        if not self.is_trading_date(day):
+            return False
+
+        offset = (timestamp - day).to_timedelta64()
+        if level >= IntervalLevel.LEVEL_1DAY:
+            return offset == np.timedelta64(0)
+
+        offsets = self.get_offsets(level)
+        index = np.searchsorted(offsets, offset)
+        return index < len(offsets) and offsets[index] == offset
+
+
+__all__ = ['TradingCalendar']
@@ -32,3 +32,6 @@ dbname_map_schemas = {}
 
 # entity_type -> schema
 entity_map_schemas = {}
+
+# schema -> storage,the schema without storage is stored in sqlite db
+schema_map_storage = {}
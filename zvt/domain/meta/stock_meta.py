@@ -5,6 +5,7 @@ from sqlalchemy.ext.declarative import declarative_base
 
 from zvt.contract import EntityMixin
 from zvt.contract.register import register_schema, register_entity
+from zvt.utils.pd_utils import pd_is_not_null
 from zvt.utils.time_utils import now_pd_timestamp
 
 StockMetaBase = declarative_base()
@@ -16,6 +17,16 @@ class BaseSecurity(EntityMixin):
     # 退市日
     end_date = Column(DateTime)
 
+    @classmethod
+    def get_trading_days(cls):
+        # the securities in china market share the trading days
+        from zvt.domain.quotes.trade_day import StockTradeDay
+
+        df = StockTradeDay.query_data(columns=['timestamp'])
+        if pd_is_not_null(df):
+            return df['timestamp']
+        return None
+
 
 class BasePortfolio(BaseSecurity):
     @classmethod
@@ -70,3 +70,14 @@ from zvt.domain.quotes.stock import *
 from zvt.domain.quotes.etf import *
 from zvt.domain.quotes.index import *
 from zvt.domain.quotes.trade_day import *
+
+# store the kdata in parquet files rather than sqlite db,set "kdata_storage": "parquet" in config.json to enable it
+from zvt import zvt_env
+
+if zvt_env.get('kdata_storage') == 'parquet':
+    from zvt.contract import zvt_context
+    from zvt.contract.register import register_storage
+    from zvt.contract.storage import ParquetStorage
+
+    register_storage([schema for schema in zvt_context.schemas if issubclass(schema, KdataCommon)],
+                     ParquetStorage())
@@ -54,6 +54,7 @@ class MaTransformer(Transformer):
         super().__init__()
         self.windows = windows
         self.cal_change_pct = cal_change_pct
+        self.lookback_window = max(windows)
 
     def transform(self, input_df) -> pd.DataFrame:
         if self.cal_change_pct:
@@ -102,6 +103,7 @@ class IntersectTransformer(Transformer):
     def __init__(self, kdata_overlap=0) -> None:
         super().__init__()
         self.kdata_overlap = kdata_overlap
+        self.lookback_window = kdata_overlap
 
     def transform(self, input_df) -> pd.DataFrame:
         if self.kdata_overlap > 0:
@@ -130,6 +132,7 @@ class MaAndVolumeTransformer(Transformer):
         self.windows = windows
         self.vol_windows = vol_windows
         self.kdata_overlap = kdata_overlap
+        self.lookback_window = max(windows + vol_windows + [kdata_overlap])
 
     def transform(self, input_df) -> pd.DataFrame:
         for window in self.windows:
@@ -173,6 +176,8 @@ class MacdTransformer(Transformer):
         self.fast = fast
         self.n = n
         self.normal = normal
+        # the ema converges,the error of restarting it 10 spans before is negligible
+        self.lookback_window = 10 * (slow + n)
 
         self.indicators.append('diff')
         self.indicators.append('dea')
@@ -7,7 +7,7 @@ from typing import List, Union
 import pandas as pd
 
 from zvt.contract import IntervalLevel, Mixin, EntityMixin
-from zvt.contract.api import get_data, df_to_db
+from zvt.contract.api import get_data, df_to_db, get_latest_timestamps
 from zvt.contract.normal_data import NormalData
 from zvt.contract.reader import DataReader, DataListener
 from zvt.domain import Stock
@@ -25,6 +25,8 @@ class Transformer(Indicator):
 
     def __init__(self) -> None:
         super().__init__()
+        # the bars count needed before the new bars for transforming them,None means all the history is needed
+        self.lookback_window: int = None
 
     def transform(self, input_df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -142,6 +144,9 @@ class Factor(DataReader, DataListener):
         # factor_df->result_df
         self.result_df: pd.DataFrame = None
 
+        # the data added by move_on,used for computing incrementally
+        self.added_dfs: List[pd.DataFrame] = []
+
         if self.need_persist:
             if self.dry_run:
                 # 如果只是为了计算因子，只需要读取acc_window的factor_df
@@ -159,21 +164,15 @@ class Factor(DataReader, DataListener):
             # 因为读取data_df的目的是为了计算factor_df,选股和回测只依赖factor_df
             # 所以如果有持久化的factor_df,只需保留需要用于计算的data_df即可
             if pd_is_not_null(self.data_df) and self.computing_window:
-                dfs = []
-                for entity_id, df in self.data_df.groupby(level=0):
-                    latest_laved = get_data(provider='zvt',
-                                            data_schema=self.factor_schema,
-                                            entity_id=entity_id,
-                                            order=self.factor_schema.timestamp.desc(),
-                                            limit=1,
-                                            index=[self.category_field, self.time_field], return_type='domain')
-                    if latest_laved:
-                        df1 = df[df.timestamp < latest_laved[0].timestamp].iloc[-self.computing_window:]
-                        if pd_is_not_null(df1):
-                            df = df[df.timestamp >= df1.iloc[0].timestamp]
-                    dfs.append(df)
-
-                self.data_df = pd.concat(dfs)
+                latest_saved = get_latest_timestamps(provider='zvt', data_schema=self.factor_schema,
+                                                     entity_ids=self.data_df.index.get_level_values(0).unique().tolist())
+                if pd_is_not_null(latest_saved):
+                    entity_ids = self.data_df.index.get_level_values(0)
+                    timestamps = self.data_df.index.get_level_values(1)
+                    before = pd.Series(timestamps < latest_saved.reindex(entity_ids).values, index=entity_ids)
+                    # 已计算部分的最后computing_window条
+                    before_count = before.iloc[::-1].groupby(level=0).cumsum().iloc[::-1]
+                    self.data_df = self.data_df[(~before | (before_count <= self.computing_window)).values]
 
         self.register_data_listener(self)
 
@@ -216,6 +215,81 @@ class Factor(DataReader, DataListener):
         self.logger.info('after_compute finished,cost_time:{}'.format(cost_time))
         self.logger.info('<<<<<<')
 
+    def support_incremental_compute(self) -> bool:
+        """
+        the incremental path only covers the transformer->accumulator(->scorer) pipeline,
+        so it's supported only if the lookback window of the transformer is known and the compute steps are not
+        overwritten after do_compute_incrementally
+
+        :return:
+        """
+        if self.transformer and self.transformer.lookback_window is None:
+            return False
+
+        def defining_class(name):
+            for cls in type(self).__mro__:
+                if name in cls.__dict__:
+                    return cls
+
+        incremental_cls = defining_class('do_compute_incrementally')
+        return issubclass(incremental_cls, defining_class('do_compute')) and issubclass(incremental_cls,
+                                                                                      defining_class('pre_compute'))
+
+    def do_compute_incrementally(self, added_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        only the added data(with the lookback window of the transformer) go through the pipeline,
+        the results are appended to factor_df
+
+        :param added_df: the data added to data_df
+        :return: the added factor_df
+        """
+        if self.transformer:
+            # keep the added bars and lookback_window bars before them for every changed entity
+            data_df = self.data_df[self.data_df.index.get_level_values(0).isin(added_df.index.get_level_values(0))]
+            added_count = added_df.groupby(level=0).size()
+            position = data_df.groupby(level=0).cumcount(ascending=False)
+            keep_count = added_count.reindex(data_df.index.get_level_values(0)).values + self.transformer.lookback_window
+            input_df = data_df[position.values < keep_count].copy()
+
+            pipe_df = self.transformer.transform(input_df)
+            # the accumulator would change it
+            pipe_df = pipe_df[pipe_df.index.isin(added_df.index)].copy()
+        else:
+            pipe_df = added_df.copy()
+
+        self.pipe_df = pipe_df
+
+        if pd_is_not_null(self.factor_df):
+            if self.accumulator:
+                self.factor_df = self.accumulator.acc(pipe_df, self.factor_df)
+            else:
+                self.factor_df = self.factor_df[~self.factor_df.index.isin(pipe_df.index)]
+                self.factor_df = pd.concat([self.factor_df, pipe_df], sort=False)
+                self.factor_df = self.factor_df.sort_index(level=[0, 1])
+        else:
+            if self.accumulator:
+                self.factor_df = self.accumulator.acc(pipe_df, None)
+            else:
+                self.factor_df = pipe_df
+
+        if pd_is_not_null(self.factor_df):
+            return self.factor_df[self.factor_df.index.isin(pipe_df.index)]
+
+    def compute_incrementally(self, added_df: pd.DataFrame):
+        self.logger.info('>>>>>>')
+        self.logger.info('do_compute_incrementally start')
+        start_time = time.time()
+        added_factor_df = self.do_compute_incrementally(added_df)
+        cost_time = time.time() - start_time
+        self.logger.info('do_compute_incrementally finished,cost_time:{}'.format(cost_time))
+
+        if self.keep_all_timestamp:
+            self.fill_gap()
+
+        if self.need_persist:
+            self.persist_factor(df=added_factor_df)
+        self.logger.info('<<<<<<')
+
     def factor_drawer(self) -> Drawer:
         drawer = Drawer(NormalData(df=self.factor_df))
         return drawer
@@ -257,7 +331,13 @@ class Factor(DataReader, DataListener):
         ----------
         data :
         """
-        self.compute()
+        if self.added_dfs and self.support_incremental_compute():
+            added_df = pd.concat(self.added_dfs, sort=False)
+            self.added_dfs = []
+            self.compute_incrementally(added_df)
+        else:
+            self.added_dfs = []
+            self.compute()
 
     def on_entity_data_changed(self, entity, added_data: pd.DataFrame):
         """
@@ -268,10 +348,12 @@ class Factor(DataReader, DataListener):
         entity :
         added_data :
         """
-        pass
+        self.added_dfs.append(added_data)
 
-    def persist_factor(self):
-        df_to_db(df=self.factor_df, data_schema=self.factor_schema, provider='zvt', force_update=False)
+    def persist_factor(self, df: pd.DataFrame = None):
+        if df is None:
+            df = self.factor_df
+        df_to_db(df=df, data_schema=self.factor_schema, provider='zvt', force_update=False)
 
 
 class FilterFactor(Factor):
@@ -303,6 +385,22 @@ class ScoreFactor(Factor):
         if pd_is_not_null(self.factor_df) and self.scorer:
             self.result_df = self.scorer.score(self.factor_df)
 
+    def do_compute_incrementally(self, added_df: pd.DataFrame) -> pd.DataFrame:
+        added_factor_df = super().do_compute_incrementally(added_df)
+
+        if pd_is_not_null(added_factor_df) and self.scorer:
+            # the scorers work on the cross section,so rescore all the entities at the changed timestamps
+            timestamps = added_factor_df.index.get_level_values(1).unique()
+            if pd_is_not_null(self.result_df):
+                result_df = self.result_df[~self.result_df.index.get_level_values(1).isin(timestamps)]
+            else:
+                result_df = None
+            added_result_df = self.scorer.score(
+                self.factor_df[self.factor_df.index.get_level_values(1).isin(timestamps)])
+            self.result_df = pd.concat([result_df, added_result_df], sort=False).sort_index(level=[0, 1])
+
+        return added_factor_df
+
 
 class StateFactor(Factor):
     factor_type = FactorType.state
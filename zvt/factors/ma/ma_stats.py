@@ -2,6 +2,7 @@
 import argparse
 from typing import List, Union
 
+import numpy as np
 import pandas as pd
 
 from zvt.api import Stock
@@ -33,86 +34,67 @@ class MaAccumulator(Accumulator):
 
         # 过滤掉已经计算的时间
         if pd_is_not_null(acc_df):
-            dfs = []
-            for entity_id, df in input_df.groupby(level=0):
-                if entity_id in acc_df.index.levels[0]:
-                    df = df[df.timestamp > acc_df.loc[(entity_id,)].index[-1]]
-                dfs.append(df)
-
-            input_df = pd.concat(dfs, sort=False)
-
-        for entity_id, df in input_df.groupby(level=0):
-            count = 0
-            pct = 1
-            current_state = None
-            pre_index = None
-            check_acc = False
-            for index, item in df['score'].iteritems():
-                # ５日线在１０日线之上
-                if item:
-                    state = 'up'
-                # ５日线在１０日线之下
-                elif not pd.isna(df[short_ma_col][index]) and not pd.isna(df[long_ma_col][index]):
-                    state = 'down'
-                else:
-                    continue
-
-                # 计算维持状态（'up','down'）的 次数
-                if current_state == state:
-                    if count > 0:
-                        count = count + 1
-                    else:
-                        count = count - 1
-                    if pct == 0:
-                        pct = df['change_pct'][index]
-                    else:
-                        pct = (1 + pct) * (1 + df['change_pct'][index]) - 1
-
-                else:
-                    # 状态切换，设置前一状态的总和
-                    if count != 0:
-                        input_df.loc[pre_index, self.total_col] = count
-                    current_state = state
-
-                    if current_state == 'up':
-                        count = 1
-                    else:
-                        count = -1
-                    pct = 0
-
-                    # 增量计算，需要累加之前的结果
-                    if pd_is_not_null(acc_df) and not check_acc:
-                        if entity_id in acc_df.index.levels[0]:
-                            acc_col_current = acc_df.loc[(entity_id,)].iloc[-1][self.current_col]
-                            if not pd.isna(acc_col_current):
-                                # up
-                                if acc_col_current > 0 and (current_state == 'up'):
-                                    count = acc_col_current + 1
-
-                                    pct = acc_df.loc[(entity_id,)].iloc[-1]["current_pct"]
-                                    pct = (1 + pct) * (1 + df['change_pct'][index]) - 1
-
-                                # down
-                                elif acc_col_current < 0 and (current_state == 'down'):
-                                    count = acc_col_current - 1
-
-                                    pct = acc_df.loc[(entity_id,)].iloc[-1]["current_pct"]
-                                    pct = (1 + pct) * (1 + df['change_pct'][index]) - 1
-
-                                # state has changed
-                                else:
-                                    pre_timestamp = acc_df.loc[(entity_id,), 'timestamp'][-1]
-                                    acc_df.loc[(entity_id, pre_timestamp), self.total_col] = acc_col_current
-
-                        check_acc = True
-
-                # 设置目前状态
-                input_df.loc[index, self.current_col] = count
-                input_df.loc[index, 'current_pct'] = pct
-
-                pre_index = index
-
-            self.logger.info('finish calculating :{}'.format(entity_id))
+            acc_latest = acc_df.groupby(level=0).tail(1)
+            latest_timestamp = pd.Series(acc_latest.index.get_level_values(1), index=acc_latest.index.get_level_values(0))
+            latest_timestamp = latest_timestamp.reindex(input_df.index.get_level_values(0))
+            input_df = input_df[latest_timestamp.isna().values |
+                                (input_df.index.get_level_values(1) > latest_timestamp.values)].copy()
+            acc_latest = acc_latest.reset_index(level=1, drop=True)
+
+        # ５日线在１０日线之上:1,５日线在１０日线之下:-1,均线为空的忽略
+        valid = input_df['score'] | (input_df[short_ma_col].notna() & input_df[long_ma_col].notna())
+        df = input_df.loc[valid, ['change_pct']]
+        state = np.where(input_df.loc[valid, 'score'], 1, -1)
+
+        # 维持状态（'up','down'）的区间,实体切换或状态切换即新区间
+        entity_ids = df.index.get_level_values(0)
+        entity_start = entity_ids != np.roll(entity_ids, 1)
+        run_start = entity_start | (state != np.roll(state, 1))
+        if len(df):
+            entity_start[0] = True
+            run_start[0] = True
+        run_id = run_start.cumsum()
+
+        # 区间内的次数和涨跌幅,区间首个的涨跌幅为0
+        count = state * (pd.Series(run_id).groupby(run_id).cumcount().values + 1)
+        factor = np.where(run_start, 1.0, 1 + df['change_pct'].values)
+
+        # 增量计算，需要累加之前的结果
+        if pd_is_not_null(acc_df):
+            acc_current = acc_latest[self.current_col].reindex(entity_ids).values
+            acc_pct = acc_latest['current_pct'].reindex(entity_ids).values
+            has_acc = entity_start & ~np.isnan(acc_current)
+            same_state = has_acc & (np.sign(acc_current) == state)
+
+            # 延续之前的状态
+            acc_count = pd.Series(np.where(same_state, acc_current, 0)).groupby(run_id).transform('first')
+            count = count + acc_count.values
+            factor = np.where(same_state, (1 + acc_pct) * (1 + df['change_pct'].values), factor)
+
+            # 状态切换，设置前一状态的总和
+            changed = has_acc & ~same_state
+            for entity_id, current in zip(entity_ids[changed], acc_current[changed]):
+                pre_timestamp = acc_df.loc[(entity_id,), 'timestamp'][-1]
+                acc_df.loc[(entity_id, pre_timestamp), self.total_col] = current
+
+        factor = pd.Series(factor)
+        pct = factor.groupby(run_id).cumprod() - 1
+        # nan would be kept in the interval
+        pct[factor.isna().astype(int).groupby(run_id).cummax().astype(bool)] = np.nan
+
+        # 状态切换，设置前一状态的总和
+        run_end = np.roll(run_start, -1)
+        entity_end = np.roll(entity_start, -1)
+        if len(df):
+            run_end[-1] = True
+            entity_end[-1] = True
+        total = run_end & ~entity_end
+
+        if len(df):
+            input_df.loc[valid, self.current_col] = count.astype(float)
+            input_df.loc[valid, 'current_pct'] = pct.values
+            if total.any():
+                input_df.loc[valid, self.total_col] = np.where(total, count, np.nan)
 
         if pd_is_not_null(acc_df):
             if pd_is_not_null(input_df):
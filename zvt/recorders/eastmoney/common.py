@@ -1,15 +1,93 @@
 # -*- coding: utf-8 -*-
+import json
 import logging
+import os
+import sqlite3
+import threading
+from typing import List
 
-import requests
+import pandas as pd
 
+from zvt import zvt_env
 from zvt.contract.api import get_data_count, get_data
 from zvt.contract.recorder import TimestampsDataRecorder, TimeSeriesDataRecorder
-from zvt.utils.time_utils import to_pd_timestamp
+from zvt.utils.time_utils import to_pd_timestamp, now_pd_timestamp, is_same_date, to_time_str, TIME_FORMAT_ISO8601
 from zvt.domain import CompanyType, Stock, StockDetail
+from zvt.utils.http_utils import http_post
 
 logger = logging.getLogger(__name__)
 
+# the months of publishing the reports,annual report and Q1 in 1-4,half year in 7-8,Q3 in 10
+REPORT_SEASON_MONTHS = (1, 2, 3, 4, 7, 8, 10)
+
+
+def is_cache_expired(updated_timestamp, now=None) -> bool:
+    """
+    in the reporting season,the cache is refreshed every day,out of it,the cache is valid until the next season begins
+
+    :param updated_timestamp: the time of caching
+    :param now:
+    """
+    now = to_pd_timestamp(now) if now is not None else now_pd_timestamp()
+    updated_timestamp = to_pd_timestamp(updated_timestamp)
+
+    if is_same_date(updated_timestamp, now):
+        return False
+    if now.month in REPORT_SEASON_MONTHS:
+        return True
+
+    # the start of current off-season
+    off_season_start = now.normalize().replace(day=1)
+    while (off_season_start - pd.DateOffset(months=1)).month not in REPORT_SEASON_MONTHS:
+        off_season_start = off_season_start - pd.DateOffset(months=1)
+    return updated_timestamp < off_season_start
+
+
+class EastmoneyCache(object):
+    """
+    local cache for the slowly changing data of eastmoney,e.g,company type and the report dates,shared by the
+    recorders and the runs,it's stored in {data_path}/eastmoney_cache.db
+    """
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def get_conn(self):
+        if self.conn is None:
+            path = self.path if self.path else os.path.join(zvt_env['data_path'], 'eastmoney_cache.db')
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            # it's just a cache,no need to fsync
+            self.conn.execute('PRAGMA synchronous=OFF')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, '
+                              'updated_timestamp TEXT)')
+        return self.conn
+
+    def get(self, key: str):
+        with self.lock:
+            row = self.get_conn().execute('SELECT value, updated_timestamp FROM cache WHERE key=?',
+                                          (key,)).fetchone()
+        if row and not is_cache_expired(row[1]):
+            return json.loads(row[0])
+        return None
+
+    def put(self, key: str, value):
+        with self.lock:
+            conn = self.get_conn()
+            conn.execute('REPLACE INTO cache VALUES (?, ?, ?)',
+                         (key, json.dumps(value), to_time_str(now_pd_timestamp(), fmt=TIME_FORMAT_ISO8601)))
+            conn.commit()
+
+    def clear(self):
+        with self.lock:
+            conn = self.get_conn()
+            conn.execute('DELETE FROM cache')
+            conn.commit()
+
+
+eastmoney_cache = EastmoneyCache()
+
 
 class ApiWrapper(object):
     def request(self, url=None, method='post', param=None, path_fields=None):
@@ -51,23 +129,33 @@ def company_type_flag(security_item):
     except Exception as e:
         logger.warning(e)
 
+    fc = get_fc(security_item)
+    key = 'company_type:{}'.format(fc)
+    ct = eastmoney_cache.get(key)
+    if ct:
+        return ct
+
     param = {
         "color": "w",
-        "fc": get_fc(security_item)
+        "fc": fc
     }
 
-    resp = requests.post('https://emh5.eastmoney.com/api/CaiWuFenXi/GetCompanyType', json=param)
+    resp = http_post('https://emh5.eastmoney.com/api/CaiWuFenXi/GetCompanyType', json=param)
 
     ct = resp.json().get('Result').get('CompanyType')
 
-    logger.warning("{} not catching company type:{}".format(security_item, ct))
+    if ct:
+        logger.debug("{} company type from eastmoney:{}".format(security_item, ct))
+        eastmoney_cache.put(key, ct)
+    else:
+        logger.warning("{} not catching company type".format(security_item))
 
     return ct
 
 
 def call_eastmoney_api(url=None, method='post', param=None, path_fields=None):
     if method == 'post':
-        resp = requests.post(url, json=param)
+        resp = http_post(url, json=param)
 
     resp.encoding = 'utf8'
 
@@ -99,6 +187,30 @@ def get_from_path_fields(the_json, path_fields):
     return the_data
 
 
+def get_report_timestamps(url, param, list_path_fields, timestamp_path_fields,
+                          force_update=False) -> List[pd.Timestamp]:
+    """
+    get the report timestamps from eastmoney,which are cached by url and param
+
+    :param url:
+    :param param:
+    :param list_path_fields: the path fields of the list
+    :param timestamp_path_fields: the path fields of the timestamp in the list item
+    :param force_update: ignore the cache
+    """
+    key = 'report_timestamps:{}:{}'.format(url, json.dumps(param, sort_keys=True))
+    timestamps = None if force_update else eastmoney_cache.get(key)
+
+    if timestamps is None:
+        timestamp_json_list = call_eastmoney_api(url=url, path_fields=list_path_fields, param=param)
+        if not timestamp_json_list:
+            return []
+        timestamps = [get_from_path_fields(data, timestamp_path_fields) for data in timestamp_json_list]
+        eastmoney_cache.put(key, timestamps)
+
+    return [to_pd_timestamp(t) for t in timestamps]
+
+
 class EastmoneyApiWrapper(ApiWrapper):
     def request(self, url=None, method='post', param=None, path_fields=None):
         return call_eastmoney_api(url=url, method=method, param=param, path_fields=path_fields)
@@ -152,13 +264,11 @@ class EastmoneyTimestampsDataRecorder(BaseEastmoneyRecorder, TimestampsDataRecor
             "fc": get_fc(entity)
         }
 
-        timestamp_json_list = call_eastmoney_api(url=self.timestamps_fetching_url,
-                                                 path_fields=self.timestamp_list_path_fields,
-                                                 param=param)
-
-        if self.timestamp_path_fields and timestamp_json_list:
-            timestamps = [get_from_path_fields(data, self.timestamp_path_fields) for data in timestamp_json_list]
-            return [to_pd_timestamp(t) for t in timestamps]
+        if self.timestamp_path_fields:
+            return get_report_timestamps(url=self.timestamps_fetching_url, param=param,
+                                         list_path_fields=self.timestamp_list_path_fields,
+                                         timestamp_path_fields=self.timestamp_path_fields,
+                                         force_update=self.force_update)
         return []
 
 
@@ -3,3 +3,4 @@ from zvt.recorders.eastmoney.finance.china_stock_balance_sheet_recorder import *
 from zvt.recorders.eastmoney.finance.china_stock_cash_flow_recorder import *
 from zvt.recorders.eastmoney.finance.china_stock_finance_factor_recorder import *
 from zvt.recorders.eastmoney.finance.china_stock_income_statement_recorder import *
+from zvt.recorders.eastmoney.finance.china_stock_finance_recorder import *
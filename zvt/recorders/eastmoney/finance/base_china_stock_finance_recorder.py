@@ -2,13 +2,11 @@
 import pandas as pd
 
 from jqdatapy.api import get_fundamentals
-from zvt.api.quote import to_jq_report_period
 from zvt.contract.api import get_data
 from zvt.domain import FinanceFactor
 from zvt.recorders.eastmoney.common import company_type_flag, get_fc, EastmoneyTimestampsDataRecorder, \
-    call_eastmoney_api, get_from_path_fields
+    get_report_timestamps
 from zvt.recorders.joinquant.common import to_jq_entity_id
-from zvt.utils.pd_utils import index_df
 from zvt.utils.pd_utils import pd_is_not_null
 from zvt.utils.time_utils import to_time_str, to_pd_timestamp
 
@@ -46,14 +44,10 @@ class BaseChinaStockFinanceRecorder(EastmoneyTimestampsDataRecorder):
         if self.finance_report_type == 'LiRunBiaoList' or self.finance_report_type == 'XianJinLiuLiangBiaoList':
             param['ReportType'] = 1
 
-        timestamp_json_list = call_eastmoney_api(url=self.timestamps_fetching_url,
-                                                 path_fields=self.timestamp_list_path_fields,
-                                                 param=param)
-
-        if self.timestamp_path_fields:
-            timestamps = [get_from_path_fields(data, self.timestamp_path_fields) for data in timestamp_json_list]
-
-        return [to_pd_timestamp(t) for t in timestamps]
+        return get_report_timestamps(url=self.timestamps_fetching_url, param=param,
+                                     list_path_fields=self.timestamp_list_path_fields,
+                                     timestamp_path_fields=self.timestamp_path_fields,
+                                     force_update=self.force_update)
 
     def generate_request_param(self, security_item, start, end, size, timestamps):
         if len(timestamps) <= 10:
@@ -105,20 +99,32 @@ class BaseChinaStockFinanceRecorder(EastmoneyTimestampsDataRecorder):
     def get_original_time_field(self):
         return 'ReportDate'
 
-    def fill_timestamp_with_jq(self, security_item, the_data):
-        # get report published date from jq
+    def fetch_jq_publish_dates(self, entity, report_dates) -> dict:
+        """
+        get the publish dates of the report dates from jq in one request
+
+        :param entity:
+        :param report_dates:
+        :return: report_date -> publish date
+        """
+        report_dates = sorted(to_pd_timestamp(report_date) for report_date in report_dates)
+        # jq get_fundamentals:date='YYYYqN' with count=n returns the reports of the n quarters ending at YYYYqN,
+        # e.g,date='2019q4',count=4 -> 2019q1...2019q4.the year format(date='2019') counts the annual reports instead,
+        # so the date is the last quarter and count is the quarters from the first report date(at most 1000)
+        quarters = pd.period_range(report_dates[0], report_dates[-1], freq='Q')
         try:
-            df = get_fundamentals(table='indicator', code=to_jq_entity_id(security_item), columns='pubDate',
-                                  date=to_jq_report_period(the_data.report_date), count=None, parse_dates=['pubDate'])
-            if pd_is_not_null(df):
-                the_data.timestamp = to_pd_timestamp(df['pubDate'][0])
-                self.logger.info(
-                    'jq fill {} {} timestamp:{} for report_date:{}'.format(self.data_schema, security_item.id,
-                                                                           the_data.timestamp,
-                                                                           the_data.report_date))
-                self.session.commit()
+            df = get_fundamentals(table='indicator', code=to_jq_entity_id(entity), columns='pubDate,statDate',
+                                  date='{}q{}'.format(quarters[-1].year, quarters[-1].quarter),
+                                  count=min(len(quarters), 1000),
+                                  parse_dates=['pubDate', 'statDate'])
         except Exception as e:
             self.logger.error(e)
+            return {}
+
+        if pd_is_not_null(df):
+            return {to_pd_timestamp(stat_date): to_pd_timestamp(pub_date) for stat_date, pub_date in
+                    zip(df['statDate'], df['pubDate']) if pd.notna(stat_date) and pd.notna(pub_date)}
+        return {}
 
     def on_finish_entity(self, entity):
         super().on_finish_entity(entity)
@@ -135,35 +141,41 @@ class BaseChinaStockFinanceRecorder(EastmoneyTimestampsDataRecorder):
                                  session=self.session,
                                  filters=[self.data_schema.timestamp == self.data_schema.report_date,
                                           self.data_schema.timestamp >= to_pd_timestamp('2005-01-01')])
-        if the_data_list:
-            if self.data_schema == FinanceFactor:
-                for the_data in the_data_list:
-                    self.fill_timestamp_with_jq(entity, the_data)
-            else:
-                df = FinanceFactor.query_data(entity_id=entity.id,
-                                              columns=[FinanceFactor.timestamp, FinanceFactor.report_date,
-                                                       FinanceFactor.id],
-                                              filters=[FinanceFactor.timestamp != FinanceFactor.report_date,
-                                                       FinanceFactor.timestamp >= to_pd_timestamp('2005-01-01'),
-                                                       FinanceFactor.report_date >= the_data_list[0].report_date,
-                                                       FinanceFactor.report_date <= the_data_list[-1].report_date, ])
-
-                if pd_is_not_null(df):
-                    index_df(df, index='report_date', time_field='report_date')
-
-                for the_data in the_data_list:
-                    if (df is not None) and (not df.empty) and the_data.report_date in df.index:
-                        the_data.timestamp = df.at[the_data.report_date, 'timestamp']
-                        self.logger.info(
-                            'db fill {} {} timestamp:{} for report_date:{}'.format(self.data_schema, entity.id,
-                                                                                   the_data.timestamp,
-                                                                                   the_data.report_date))
-                        self.session.commit()
-                    else:
-                        # self.logger.info(
-                        #     'waiting jq fill {} {} timestamp:{} for report_date:{}'.format(self.data_schema,
-                        #                                                                    security_item.id,
-                        #                                                                    the_data.timestamp,
-                        #                                                                    the_data.report_date))
-
-                        self.fill_timestamp_with_jq(entity, the_data)
+        if not the_data_list:
+            return
+
+        # report_date -> publish date
+        publish_dates = {}
+        if self.data_schema != FinanceFactor:
+            # in the session,the ones filled by the recorder driving them together but not committed are included
+            finance_factors = get_data(data_schema=FinanceFactor,
+                                       provider=self.provider,
+                                       entity_id=entity.id,
+                                       return_type='domain',
+                                       session=self.session,
+                                       filters=[FinanceFactor.timestamp != FinanceFactor.report_date,
+                                                FinanceFactor.timestamp >= to_pd_timestamp('2005-01-01'),
+                                                FinanceFactor.report_date >= the_data_list[0].report_date,
+                                                FinanceFactor.report_date <= the_data_list[-1].report_date, ])
+            publish_dates = {to_pd_timestamp(item.report_date): to_pd_timestamp(item.timestamp) for item in
+                             finance_factors}
+
+        # the missing ones from jq in one request
+        missing = [the_data.report_date for the_data in the_data_list if
+                   to_pd_timestamp(the_data.report_date) not in publish_dates]
+        if missing:
+            for report_date, publish_date in self.fetch_jq_publish_dates(entity, missing).items():
+                publish_dates.setdefault(report_date, publish_date)
+
+        filled = 0
+        for the_data in the_data_list:
+            publish_date = publish_dates.get(to_pd_timestamp(the_data.report_date))
+            if publish_date is not None:
+                the_data.timestamp = publish_date
+                filled = filled + 1
+
+        if filled:
+            self.logger.info('fill {} {} timestamp for {}/{} report_date'.format(self.data_schema, entity.id, filled,
+                                                                                len(the_data_list)))
+            if self.auto_commit:
+                self.session.commit()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from zvt.recorders.eastmoney.finance.china_stock_balance_sheet_recorder import ChinaStockBalanceSheetRecorder
+from zvt.recorders.eastmoney.finance.china_stock_cash_flow_recorder import ChinaStockCashFlowRecorder
+from zvt.recorders.eastmoney.finance.china_stock_finance_factor_recorder import ChinaStockFinanceFactorRecorder
+from zvt.recorders.eastmoney.finance.china_stock_income_statement_recorder import ChinaStockIncomeStatementRecorder
+
+
+class ChinaStockFinanceRecorder(object):
+    """
+    record FinanceFactor,BalanceSheet,IncomeStatement and CashFlowStatement entity by entity in one pass,
+    the report dates of the entity are fetched once and shared by the statements,
+    the statements of the entity are committed in one transaction
+    """
+    logger = logging.getLogger(__name__)
+
+    # FinanceFactor goes first,its publish dates are used to fill the others
+    recorder_classes = [ChinaStockFinanceFactorRecorder, ChinaStockBalanceSheetRecorder,
+                        ChinaStockIncomeStatementRecorder, ChinaStockCashFlowRecorder]
+
+    def __init__(self, entity_type='stock', exchanges=['sh', 'sz'], entity_ids=None, codes=None, batch_size=10,
+                 force_update=False, sleeping_time=5, default_size=2000, real_time=False,
+                 fix_duplicate_way='add', start_timestamp=None, end_timestamp=None, close_hour=0,
+                 close_minute=0) -> None:
+        self.recorders = [
+            recorder_cls(entity_type, exchanges, entity_ids, codes, batch_size, force_update, sleeping_time,
+                         default_size, real_time, fix_duplicate_way, start_timestamp, end_timestamp, close_hour,
+                         close_minute) for recorder_cls in self.recorder_classes]
+
+        # the statements are in the same db,so the recorders share the session
+        self.session = self.recorders[0].session
+        self.entities = self.recorders[0].entities
+        for recorder in self.recorders:
+            assert recorder.session is self.session
+            recorder.auto_commit = False
+
+    def init_timestamps(self, entity):
+        # the report dates of FinanceFactor(the main indicators) cover the ones of the other statements
+        return self.recorders[0].init_timestamps(entity)
+
+    def record_entity(self, index, entity):
+        timestamps = self.init_timestamps(entity)
+        if not timestamps:
+            self.logger.info('no report date for {}'.format(entity.id))
+            return
+
+        for recorder in self.recorders:
+            recorder.security_timestamps_map[entity.id] = [t for t in timestamps if
+                                                           (not recorder.start_timestamp or
+                                                            t >= recorder.start_timestamp) and
+                                                           (not recorder.end_timestamp or
+                                                            t <= recorder.end_timestamp)]
+
+        for recorder in self.recorders:
+            while True:
+                start_timestamp, end_timestamp, size, timestamps = recorder.evaluate_entity(entity)
+
+                # no more to record
+                if size == 0:
+                    break
+
+                original_list = recorder.fetch_entity(index, entity, start_timestamp, end_timestamp, size, timestamps)
+                if recorder.handle_original_list(entity, original_list, start_timestamp):
+                    break
+
+        self.session.commit()
+
+    def run(self):
+        for recorder in self.recorders:
+            recorder.plan()
+
+        raising_exception = None
+        count = len(self.entities)
+        for index, entity in enumerate(self.entities):
+            self.logger.info(f'run to {index + 1}/{count}')
+            try:
+                self.record_entity(index, entity)
+            except Exception as e:
+                self.logger.exception("recording finance data for entity_id:{},error:{}".format(entity.id, e))
+                self.session.rollback()
+                raising_exception = e
+                break
+
+        for recorder in self.recorders:
+            recorder.on_finish()
+
+        if raising_exception:
+            raise raising_exception
+
+
+__all__ = ['ChinaStockFinanceRecorder']
+
+if __name__ == '__main__':
+    recorder = ChinaStockFinanceRecorder(codes=['000001'])
+    recorder.run()
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
-import requests
 
 from zvt.contract.api import df_to_db
 from zvt.contract.recorder import Recorder, TimeSeriesDataRecorder
@@ -8,6 +7,7 @@ from zvt.utils.time_utils import now_pd_timestamp
 from zvt.utils.utils import json_callback_param
 from zvt.api.quote import china_stock_code_to_id
 from zvt.domain import BlockStock, BlockCategory, Block
+from zvt.utils.http_utils import http_get
 
 
 class EastmoneyChinaBlockRecorder(Recorder):
@@ -23,7 +23,7 @@ class EastmoneyChinaBlockRecorder(Recorder):
 
     def run(self):
         for category, url in self.category_map_url.items():
-            resp = requests.get(url)
+            resp = http_get(url)
             results = json_callback_param(resp.text)
             the_list = []
             for result in results:
@@ -65,7 +65,7 @@ class EastmoneyChinaBlockStockRecorder(TimeSeriesDataRecorder):
                          close_minute)
 
     def record(self, entity, start, end, size, timestamps):
-        resp = requests.get(self.category_stocks_url.format(entity.code, '1'))
+        resp = http_get(self.category_stocks_url.format(entity.code, '1'))
         try:
             results = json_callback_param(resp.text)
             the_list = []
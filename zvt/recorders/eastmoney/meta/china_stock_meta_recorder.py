@@ -1,13 +1,12 @@
 # -*- coding: utf-8 -*-
 
-import requests
-
 from zvt.contract.recorder import Recorder
 from zvt.utils.time_utils import to_pd_timestamp
 from zvt.utils.utils import to_float, pct_to_float
 from zvt.contract.api import get_entities
 from zvt.domain.meta.stock_meta import StockDetail, Stock
 from zvt.recorders.exchange.china_stock_list_spider import ExchangeChinaStockListRecorder
+from zvt.utils.http_utils import http_post
 
 
 class EastmoneyChinaStockListRecorder(ExchangeChinaStockListRecorder):
@@ -46,7 +45,7 @@ class EastmoneyChinaStockDetailRecorder(Recorder):
 
             # 基本资料
             param = {"color": "w", "fc": fc, "SecurityCode": "SZ300059"}
-            resp = requests.post('https://emh5.eastmoney.com/api/GongSiGaiKuang/GetJiBenZiLiao', json=param)
+            resp = http_post('https://emh5.eastmoney.com/api/GongSiGaiKuang/GetJiBenZiLiao', json=param)
             resp.encoding = 'utf8'
 
             resp_json = resp.json()['Result']['JiBenZiLiao']
@@ -69,7 +68,7 @@ class EastmoneyChinaStockDetailRecorder(Recorder):
 
             # 发行相关
             param = {"color": "w", "fc": fc}
-            resp = requests.post('https://emh5.eastmoney.com/api/GongSiGaiKuang/GetFaXingXiangGuan', json=param)
+            resp = http_post('https://emh5.eastmoney.com/api/GongSiGaiKuang/GetFaXingXiangGuan', json=param)
             resp.encoding = 'utf8'
 
             resp_json = resp.json()['Result']['FaXingXiangGuan']
@@ -1,7 +1,5 @@
 # -*- coding: utf-8 -*-
 
-import requests
-
 from zvt.contract import IntervalLevel
 from zvt.contract.api import get_entities
 from zvt.contract.api import get_db_session
@@ -10,6 +8,7 @@ from zvt.utils.time_utils import to_pd_timestamp, now_time_str, TIME_FORMAT_DAY1
 from zvt.utils.utils import json_callback_param, to_float
 from zvt.api.quote import generate_kdata_id, get_kdata_schema
 from zvt.domain import Index, BlockCategory, Block
+from zvt.utils.http_utils import http_get
 
 
 def level_flag(level: IntervalLevel):
@@ -59,7 +58,7 @@ class ChinaStockKdataRecorder(FixedCycleDataRecorder):
         the_url = self.url.format("{}".format(entity.code), level_flag(self.level), size,
                                   now_time_str(fmt=TIME_FORMAT_DAY1))
 
-        resp = requests.get(the_url)
+        resp = http_get(the_url)
         results = json_callback_param(resp.text)
 
         kdatas = []
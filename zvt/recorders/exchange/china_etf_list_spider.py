@@ -5,7 +5,6 @@ import re
 
 import demjson
 import pandas as pd
-import requests
 
 from zvt.contract.api import df_to_db
 from zvt.contract.recorder import Recorder
@@ -13,6 +12,7 @@ from zvt.utils.time_utils import now_pd_timestamp
 from zvt.api.quote import china_stock_code_to_id
 from zvt.domain import EtfStock, BlockCategory, Etf
 from zvt.recorders.consts import DEFAULT_SH_ETF_LIST_HEADER
+from zvt.utils.http_utils import http_get
 
 
 class ChinaETFListSpider(Recorder):
@@ -25,7 +25,7 @@ class ChinaETFListSpider(Recorder):
     def run(self):
         # 抓取沪市 ETF 列表
         url = 'http://query.sse.com.cn/commonQuery.do?sqlId=COMMON_SSE_ZQPZ_ETFLB_L_NEW'
-        response = requests.get(url, headers=DEFAULT_SH_ETF_LIST_HEADER)
+        response = http_get(url, headers=DEFAULT_SH_ETF_LIST_HEADER)
         response_dict = demjson.decode(response.text)
 
         df = pd.DataFrame(response_dict.get('result', []))
@@ -38,7 +38,7 @@ class ChinaETFListSpider(Recorder):
 
         # 抓取深市 ETF 列表
         url = 'http://www.szse.cn/api/report/ShowReport?SHOWTYPE=xlsx&CATALOGID=1945'
-        response = requests.get(url)
+        response = http_get(url)
 
         df = pd.read_excel(io.BytesIO(response.content), dtype=str)
         self.persist_etf_list(df, exchange='sz')
@@ -85,7 +85,7 @@ class ChinaETFListSpider(Recorder):
 
         for _, etf in etf_df.iterrows():
             url = query_url.format(etf['ETF_TYPE'], etf['ETF_CLASS'])
-            response = requests.get(url, headers=DEFAULT_SH_ETF_LIST_HEADER)
+            response = http_get(url, headers=DEFAULT_SH_ETF_LIST_HEADER)
             response_dict = demjson.decode(response.text)
             response_df = pd.DataFrame(response_dict.get('result', []))
 
@@ -123,7 +123,7 @@ class ChinaETFListSpider(Recorder):
                 continue
 
             url = query_url.format(underlying_index)
-            response = requests.get(url)
+            response = http_get(url)
             response.encoding = 'gbk'
 
             try:
@@ -172,7 +172,7 @@ class ChinaETFListSpider(Recorder):
         type_df = pd.DataFrame()
         for etf_class in [1, 2]:
             url = query_url.format(etf_class)
-            response = requests.get(url, headers=DEFAULT_SH_ETF_LIST_HEADER)
+            response = http_get(url, headers=DEFAULT_SH_ETF_LIST_HEADER)
             response_dict = demjson.decode(response.text)
             response_df = pd.DataFrame(response_dict.get('result', []))
             response_df = response_df[['fundid1', 'etftype']]
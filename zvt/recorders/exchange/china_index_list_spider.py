@@ -11,6 +11,7 @@ from zvt.contract.recorder import Recorder
 from zvt.utils.time_utils import to_pd_timestamp, now_pd_timestamp
 from zvt.api.quote import china_stock_code_to_id
 from zvt.domain import IndexStock, Index
+from zvt.utils.http_utils import http_get
 
 
 class ChinaIndexListSpider(Recorder):
@@ -43,7 +44,7 @@ class ChinaIndexListSpider(Recorder):
         page_size = 50
         while True:
             query_url = url.format(page, page_size)
-            response = requests.get(query_url)
+            response = http_get(query_url)
             response_dict = demjson.decode(response.text)
             response_index_list = response_dict.get('list', [])
 
@@ -82,7 +83,7 @@ class ChinaIndexListSpider(Recorder):
             url = query_url.format(index_code)
 
             try:
-                response = requests.get(url)
+                response = http_get(url)
                 response.raise_for_status()
             except requests.HTTPError as error:
                 self.logger.error(f'{index["name"]} - {index_code} 成分股抓取错误 ({error})')
@@ -116,7 +117,7 @@ class ChinaIndexListSpider(Recorder):
         抓取深证指数列表
         """
         url = 'http://www.szse.cn/api/report/ShowReport?SHOWTYPE=xlsx&CATALOGID=1812_zs&TABKEY=tab1'
-        response = requests.get(url)
+        response = http_get(url)
         df = pd.read_excel(io.BytesIO(response.content), dtype='str')
 
         df.columns = ['code', 'name', 'timestamp', 'base_point', 'list_date']
@@ -139,7 +140,7 @@ class ChinaIndexListSpider(Recorder):
             index_code = index['code']
 
             url = query_url.format(index_code)
-            response = requests.get(url)
+            response = http_get(url)
 
             response_df = pd.read_excel(io.BytesIO(response.content), dtype='str')
 
@@ -167,7 +168,7 @@ class ChinaIndexListSpider(Recorder):
         抓取国证指数列表
         """
         url = 'http://www.cnindex.com.cn/zstx/jcxl/'
-        response = requests.get(url)
+        response = http_get(url)
         response.encoding = 'utf-8'
         dfs = pd.read_html(response.text)
 
@@ -209,7 +210,7 @@ class ChinaIndexListSpider(Recorder):
             url = query_url.format(index_code)
 
             try:
-                response = requests.get(url)
+                response = http_get(url)
                 response.raise_for_status()
             except requests.HTTPError as error:
                 self.logger.error(f'{index["name"]} - {index_code} 成分股抓取错误 ({error})')
@@ -3,13 +3,13 @@
 import io
 
 import pandas as pd
-import requests
 
 from zvt.contract.api import df_to_db
 from zvt.contract.recorder import Recorder
 from zvt.utils.time_utils import to_pd_timestamp
 from zvt.domain import Stock, StockDetail
 from zvt.recorders.consts import DEFAULT_SH_HEADER, DEFAULT_SZ_HEADER
+from zvt.utils.http_utils import http_get
 
 
 class ExchangeChinaStockListRecorder(Recorder):
@@ -19,12 +19,12 @@ class ExchangeChinaStockListRecorder(Recorder):
     def run(self):
         url = 'http://query.sse.com.cn/security/stock/downloadStockListFile.do?csrcCode=&stockCode=&areaName=&stockType=1'
 
-        resp = requests.get(url, headers=DEFAULT_SH_HEADER)
+        resp = http_get(url, headers=DEFAULT_SH_HEADER)
         self.download_stock_list(response=resp, exchange='sh')
 
         url = 'http://www.szse.cn/api/report/ShowReport?SHOWTYPE=xlsx&CATALOGID=1110&TABKEY=tab1&random=0.20932135244582617'
 
-        resp = requests.get(url, headers=DEFAULT_SZ_HEADER)
+        resp = http_get(url, headers=DEFAULT_SZ_HEADER)
         self.download_stock_list(response=resp, exchange='sz')
 
     def download_stock_list(self, response, exchange):
@@ -1,6 +1,5 @@
 import demjson
 import pandas as pd
-import requests
 
 from zvt.contract.recorder import TimestampsDataRecorder
 from zvt.utils.time_utils import to_time_str
@@ -8,6 +7,7 @@ from zvt.utils.utils import to_float
 from zvt.domain import Index
 from zvt.domain.misc import StockSummary
 from zvt.recorders.consts import DEFAULT_SH_SUMMARY_HEADER
+from zvt.utils.http_utils import http_get
 
 
 class StockSummaryRecorder(TimestampsDataRecorder):
@@ -35,7 +35,7 @@ class StockSummaryRecorder(TimestampsDataRecorder):
         for timestamp in timestamps:
             timestamp_str = to_time_str(timestamp)
             url = self.url.format(timestamp_str)
-            response = requests.get(url=url, headers=DEFAULT_SH_SUMMARY_HEADER)
+            response = http_get(url=url, headers=DEFAULT_SH_SUMMARY_HEADER)
 
             results = demjson.decode(response.text[response.text.index("(") + 1:response.text.index(")")])['result']
             result = [result for result in results if result['productType'] == '1']
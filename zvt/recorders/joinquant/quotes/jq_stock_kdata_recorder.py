@@ -2,12 +2,13 @@
 import argparse
 
 import pandas as pd
+from sqlalchemy import and_, func
 
 from jqdatapy.api import get_token, get_bars
 from zvt import init_log, zvt_env
 from zvt.api import get_kdata, AdjustType
 from zvt.api.quote import generate_kdata_id, get_kdata_schema
-from zvt.contract import IntervalLevel
+from zvt.contract import IntervalLevel, zvt_context
 from zvt.contract.api import df_to_db
 from zvt.contract.recorder import FixedCycleDataRecorder
 from zvt.domain import Stock, StockKdataCommon, Stock1dHfqKdata
@@ -62,20 +63,29 @@ class JqChinaStockKdataRecorder(FixedCycleDataRecorder):
     def recompute_qfq(self, entity, qfq_factor, last_timestamp):
         # 重新计算前复权数据
         if qfq_factor != 0:
-            kdatas = get_kdata(provider=self.provider, entity_id=entity.id, level=self.level.value,
-                               order=self.data_schema.timestamp.asc(),
-                               return_type='domain',
-                               session=self.session,
-                               filters=[self.data_schema.timestamp < last_timestamp])
-            if kdatas:
-                self.logger.info('recomputing {} qfq kdata,factor is:{}'.format(entity.code, qfq_factor))
-                for kdata in kdatas:
-                    kdata.open = round(kdata.open * qfq_factor, 2)
-                    kdata.close = round(kdata.close * qfq_factor, 2)
-                    kdata.high = round(kdata.high * qfq_factor, 2)
-                    kdata.low = round(kdata.low * qfq_factor, 2)
-                self.session.add_all(kdatas)
-                self.session.commit()
+            self.logger.info('recomputing {} qfq kdata,factor is:{}'.format(entity.code, qfq_factor))
+
+            storage = zvt_context.schema_map_storage.get(self.data_schema)
+            if storage:
+                df = self.data_schema.query_data(provider=self.provider, entity_id=entity.id, level=self.level,
+                                                 filters=[self.data_schema.timestamp < last_timestamp])
+                if pd_is_not_null(df):
+                    for col in ['open', 'close', 'high', 'low']:
+                        df[col] = (df[col] * qfq_factor).round(2)
+                    df_to_db(df=df, data_schema=self.data_schema, provider=self.provider, force_update=True)
+                return
+
+            # one UPDATE for all the history
+            stmt = self.data_schema.__table__.update().where(
+                and_(self.data_schema.entity_id == entity.id,
+                     self.data_schema.level == self.level.value,
+                     self.data_schema.timestamp < last_timestamp)).values(
+                open=func.round(self.data_schema.open * qfq_factor, 2),
+                close=func.round(self.data_schema.close * qfq_factor, 2),
+                high=func.round(self.data_schema.high * qfq_factor, 2),
+                low=func.round(self.data_schema.low * qfq_factor, 2))
+            self.session.execute(stmt)
+            self.session.commit()
 
     def record(self, entity, start, end, size, timestamps):
         if self.adjust_type == AdjustType.hfq:
@@ -2,7 +2,6 @@
 
 import demjson
 import pandas as pd
-import requests
 
 from zvt.contract import IntervalLevel
 from zvt.contract.recorder import FixedCycleDataRecorder
@@ -12,6 +11,7 @@ from zvt.api.quote import generate_kdata_id
 from zvt.api import get_kdata
 from zvt.domain import Etf, Index, Etf1dKdata
 from zvt.recorders.consts import EASTMONEY_ETF_NET_VALUE_HEADER
+from zvt.utils.http_utils import http_get
 
 
 class ChinaETFDayKdataRecorder(FixedCycleDataRecorder):
@@ -68,7 +68,7 @@ class ChinaETFDayKdataRecorder(FixedCycleDataRecorder):
         while True:
             url = query_url.format(security_item.code, page, to_time_str(start), to_time_str(end))
 
-            response = requests.get(url, headers=EASTMONEY_ETF_NET_VALUE_HEADER)
+            response = http_get(url, headers=EASTMONEY_ETF_NET_VALUE_HEADER)
             response_json = demjson.decode(response.text)
             response_df = pd.DataFrame(response_json['Data']['LSJZList'])
 
@@ -105,7 +105,7 @@ class ChinaETFDayKdataRecorder(FixedCycleDataRecorder):
 
         url = ChinaETFDayKdataRecorder.url.format(security_item.exchange, security_item.code, size)
 
-        response = requests.get(url)
+        response = http_get(url)
         response_json = demjson.decode(response.text)
 
         if response_json is None or len(response_json) == 0:
@@ -3,13 +3,13 @@
 import time
 
 import pandas as pd
-import requests
 
 from zvt.contract import IntervalLevel
 from zvt.contract.recorder import FixedCycleDataRecorder
 from zvt.utils.time_utils import get_year_quarters, is_same_date
 from zvt.api.quote import generate_kdata_id
 from zvt.domain import Index, Index1dKdata
+from zvt.utils.http_utils import http_get
 
 
 class ChinaIndexDayKdataRecorder(FixedCycleDataRecorder):
@@ -53,7 +53,7 @@ class ChinaIndexDayKdataRecorder(FixedCycleDataRecorder):
         result_df = pd.DataFrame()
         for year, quarter in quarters:
             query_url = self.url.format(security_item.code, year, quarter)
-            response = requests.get(query_url)
+            response = http_get(query_url)
             response.encoding = 'gbk'
 
             try:
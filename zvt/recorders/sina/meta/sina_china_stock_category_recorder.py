@@ -3,13 +3,13 @@ import json
 
 import demjson
 import pandas as pd
-import requests
 
 from zvt.contract.api import df_to_db
 from zvt.contract.recorder import Recorder, TimeSeriesDataRecorder
 from zvt.utils.time_utils import now_pd_timestamp
 from zvt.api.quote import china_stock_code_to_id
 from zvt.domain import BlockStock, BlockCategory, Block
+from zvt.utils.http_utils import http_get
 
 
 class SinaChinaBlockRecorder(Recorder):
@@ -26,7 +26,7 @@ class SinaChinaBlockRecorder(Recorder):
     def run(self):
         # get stock blocks from sina
         for category, url in self.category_map_url.items():
-            resp = requests.get(url)
+            resp = http_get(url)
             resp.encoding = 'GBK'
 
             tmp_str = resp.text
@@ -74,7 +74,7 @@ class SinaChinaBlockStockRecorder(TimeSeriesDataRecorder):
 
     def record(self, entity, start, end, size, timestamps):
         for page in range(1, 5):
-            resp = requests.get(self.category_stocks_url.format(page, entity.code))
+            resp = http_get(self.category_stocks_url.format(page, entity.code))
             try:
                 if resp.text == 'null' or resp.text is None:
                     break
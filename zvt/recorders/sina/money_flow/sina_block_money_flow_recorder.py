@@ -1,13 +1,12 @@
 # -*- coding: utf-8 -*-
-import time
-
-import requests
+import pandas as pd
 
 from zvt.contract import IntervalLevel
 from zvt.contract.recorder import FixedCycleDataRecorder
 from zvt.utils.time_utils import to_pd_timestamp
 from zvt.utils.utils import to_float
 from zvt.domain import BlockMoneyFlow, BlockCategory, Block
+from zvt.utils.http_utils import http_get
 
 
 # 实时资金流
@@ -50,7 +49,7 @@ class SinaBlockMoneyFlowRecorder(FixedCycleDataRecorder):
     def record(self, entity, start, end, size, timestamps):
         url = self.generate_url(category=entity.category, code=entity.code, number=size)
 
-        resp = requests.get(url)
+        resp = http_get(url)
 
         opendate = "opendate"
         avg_price = "avg_price"
@@ -63,13 +62,14 @@ class SinaBlockMoneyFlowRecorder(FixedCycleDataRecorder):
         r0x_ratio = 'r0x_ratio'
         cnt_r0x_ratio = 'cnt_r0x_ratio'
 
-        json_list = []
         try:
             json_list = eval(resp.text)
         except Exception as e:
             resp.encoding = 'GBK'
+            # the request is limited and retried by http_utils,no need to sleep here
             self.logger.error(resp.text)
-            time.sleep(60 * 5)
+            # nothing to record from the bad response
+            return None
 
         result_list = []
         for item in json_list:
@@ -85,7 +85,8 @@ class SinaBlockMoneyFlowRecorder(FixedCycleDataRecorder):
                 'net_main_inflow_rate': to_float(item['r0_ratio'])
             })
 
-        return result_list
+        # persisted by df_to_db
+        return pd.DataFrame(result_list)
 
 
 __all__ = ['SinaBlockMoneyFlowRecorder']
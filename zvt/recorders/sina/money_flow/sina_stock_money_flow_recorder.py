@@ -1,13 +1,12 @@
 # -*- coding: utf-8 -*-
-import time
-
-import requests
+import pandas as pd
 
 from zvt.contract import IntervalLevel
 from zvt.contract.recorder import FixedCycleDataRecorder
 from zvt.utils.time_utils import to_pd_timestamp, is_same_date, now_pd_timestamp
 from zvt.utils.utils import to_float
 from zvt.domain import StockMoneyFlow, Stock, StockTradeDay
+from zvt.utils.http_utils import http_get
 
 
 class SinaStockMoneyFlowRecorder(FixedCycleDataRecorder):
@@ -55,7 +54,7 @@ class SinaStockMoneyFlowRecorder(FixedCycleDataRecorder):
             'security_item': entity
         }
 
-        resp = requests.get(param['url'])
+        resp = http_get(param['url'])
         # {opendate:"2019-04-29",trade:"10.8700",changeratio:"-0.0431338",turnover:"74.924",netamount:"-2903349.8500",
         # ratioamount:"-0.155177",r0:"0.0000",r1:"2064153.0000",r2:"6485031.0000",r3:"10622169.2100",r0_net:"0.0000",
         # r1_net:"2064153.0000",r2_net:"-1463770.0000",r3_net:"-3503732.8500"}
@@ -74,14 +73,14 @@ class SinaStockMoneyFlowRecorder(FixedCycleDataRecorder):
         r2_net = 'r2_net'
         r3_net = 'r3_net'
 
-        json_list = []
-
         try:
             json_list = eval(resp.text)
         except Exception as e:
             resp.encoding = 'GBK'
+            # the request is limited and retried by http_utils,no need to sleep here
             self.logger.error(resp.text)
-            time.sleep(60 * 5)
+            # nothing to record from the bad response
+            return None
 
         result_list = []
         for item in json_list:
@@ -131,7 +130,8 @@ class SinaStockMoneyFlowRecorder(FixedCycleDataRecorder):
 
             result_list.append(result)
 
-        return result_list
+        # persisted by df_to_db
+        return pd.DataFrame(result_list)
 
 
 __all__ = ['SinaStockMoneyFlowRecorder']
@@ -2,11 +2,14 @@
 
 import logging
 import math
-from typing import List
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
 
 from zvt.api import get_kdata
 from zvt.api.business import get_trader_info
-from zvt.api.quote import decode_entity_id, get_kdata_schema
+from zvt.api.quote import decode_entity_id
 from zvt.contract import IntervalLevel, EntityMixin
 from zvt.contract.api import get_db_session
 from zvt.domain.trader_info import AccountStats, Position, Order, TraderInfo
@@ -42,6 +45,122 @@ account_stats_schema = AccountDayStatsSchema()
 position_schema = PositionSchema()
 
 
+class PriceOracle(object):
+    """
+    in-memory close price index of the entities,the kdata of [start_timestamp,end_timestamp] is loaded with one query
+    for the entities(per level) and the lookups never touch the db again except the top up in real time mode
+    """
+    logger = logging.getLogger(__name__)
+
+    def __init__(self,
+                 start_timestamp: Union[str, pd.Timestamp],
+                 end_timestamp: Union[str, pd.Timestamp] = None,
+                 provider: str = None,
+                 real_time: bool = False) -> None:
+        self.start_timestamp = to_pd_timestamp(start_timestamp)
+        self.end_timestamp = to_pd_timestamp(end_timestamp) if end_timestamp else None
+        self.provider = provider
+        self.real_time = real_time
+
+        # level -> {entity_id: (timestamps, closes)}
+        self.level_map_prices = {}
+
+    def query_prices(self, entity_ids, level, start_timestamp, end_timestamp):
+        try:
+            return get_kdata(provider=self.provider, entity_ids=entity_ids, level=level,
+                             columns=['entity_id', 'timestamp', 'close'], start_timestamp=start_timestamp,
+                             end_timestamp=end_timestamp, index=None)
+        except Exception as e:
+            self.logger.error(e)
+            raise WrongKdataError("could not get kdata")
+
+    def load(self, entity_ids: List[str], level: Union[IntervalLevel, str] = IntervalLevel.LEVEL_1DAY):
+        """
+        load the kdata of the entities which not loaded yet
+
+        :param entity_ids:
+        :param level:
+        """
+        level = IntervalLevel(level)
+        entity_map_prices = self.level_map_prices.setdefault(level, {})
+
+        entity_ids = [entity_id for entity_id in entity_ids if entity_id not in entity_map_prices]
+        if not entity_ids:
+            return
+
+        # kdata schema is decided by the entity type
+        entity_type_map_ids = {}
+        for entity_id in entity_ids:
+            entity_type, _, _ = decode_entity_id(entity_id)
+            entity_type_map_ids.setdefault(entity_type, []).append(entity_id)
+
+        for the_ids in entity_type_map_ids.values():
+            df = self.query_prices(entity_ids=the_ids, level=level, start_timestamp=self.start_timestamp,
+                                   end_timestamp=self.end_timestamp)
+            for entity_id in the_ids:
+                entity_map_prices[entity_id] = (np.array([], dtype='datetime64[ns]'), np.array([], dtype=float))
+
+            if pd_is_not_null(df):
+                df = df.sort_values(by=['entity_id', 'timestamp'])
+                for entity_id, entity_df in df.groupby('entity_id'):
+                    entity_map_prices[entity_id] = (entity_df['timestamp'].values.astype('datetime64[ns]'),
+                                                    entity_df['close'].values.astype(float))
+
+    def top_up(self, entity_id, level: IntervalLevel, timestamp: pd.Timestamp):
+        """
+        append the kdata after the latest loaded one,it's for real time mode
+
+        :param entity_id:
+        :param level:
+        :param timestamp:
+        """
+        timestamps, closes = self.level_map_prices[level][entity_id]
+        if len(timestamps) > 0:
+            start_timestamp = pd.Timestamp(timestamps[-1]) + pd.Timedelta(microseconds=1)
+        else:
+            start_timestamp = self.start_timestamp
+
+        df = self.query_prices(entity_ids=[entity_id], level=level, start_timestamp=start_timestamp,
+                               end_timestamp=timestamp)
+        if pd_is_not_null(df):
+            df = df.sort_values(by='timestamp')
+            self.level_map_prices[level][entity_id] = (
+                np.concatenate([timestamps, df['timestamp'].values.astype('datetime64[ns]')]),
+                np.concatenate([closes, df['close'].values.astype(float)]))
+
+    def _search(self, entity_id, timestamp, level):
+        level = IntervalLevel(level)
+        timestamp = to_pd_timestamp(timestamp)
+        self.load([entity_id], level=level)
+
+        timestamps, _ = self.level_map_prices[level][entity_id]
+        if self.real_time and (len(timestamps) == 0 or timestamps[-1] < timestamp.to_datetime64()):
+            self.top_up(entity_id, level=level, timestamp=timestamp)
+
+        timestamps, closes = self.level_map_prices[level][entity_id]
+        # index of the latest kdata <= timestamp
+        index = np.searchsorted(timestamps, timestamp.to_datetime64(), side='right') - 1
+        return timestamps, closes, index
+
+    def get_price(self, entity_id, timestamp, level=IntervalLevel.LEVEL_1DAY):
+        """
+        close price of the kdata at timestamp,None if not exist
+        """
+        timestamps, closes, index = self._search(entity_id, timestamp, level)
+        if index >= 0 and timestamps[index] == to_pd_timestamp(timestamp).to_datetime64():
+            return closes[index]
+        return None
+
+    def get_latest_price(self, entity_id, timestamp, level=IntervalLevel.LEVEL_1DAY):
+        """
+        close price of the latest kdata before or at timestamp,None if not exist
+        """
+        timestamps, closes, index = self._search(entity_id, timestamp, level)
+        if index >= 0:
+            return closes[index]
+        return None
+
+
 class AccountService(TradingListener):
     logger = logging.getLogger(__name__)
 
@@ -105,7 +224,10 @@ class SimAccountService(AccountService):
                  buy_cost=0.001,
                  sell_cost=0.001,
                  slippage=0.001,
-                 rich_mode=True):
+                 rich_mode=True,
+                 end_timestamp=None,
+                 entity_ids: List[str] = None,
+                 real_time=False):
         self.entity_schema = entity_schema
         self.base_capital = base_capital
         self.buy_cost = buy_cost
@@ -119,6 +241,14 @@ class SimAccountService(AccountService):
         self.level = level
         self.start_timestamp = timestamp
 
+        # the price for trading and closing,the kdata could be loaded with one query if know the entities
+        self.price_oracle = PriceOracle(start_timestamp=timestamp, end_timestamp=end_timestamp, provider=provider,
+                                        real_time=real_time)
+        if entity_ids:
+            self.price_oracle.load(entity_ids, level=level)
+            if level != IntervalLevel.LEVEL_1DAY:
+                self.price_oracle.load(entity_ids, level=IntervalLevel.LEVEL_1DAY)
+
         self.account: AccountStats = self.init_account()
 
     def input_money(self, money=1000000):
@@ -202,31 +332,14 @@ class SimAccountService(AccountService):
         order_type = AccountService.trading_signal_to_order_type(trading_signal.trading_signal_type)
         trading_level = trading_signal.trading_level.value
         if order_type:
-            try:
-                kdata = get_kdata(provider=self.provider, entity_id=entity_id, level=trading_level,
-                                  start_timestamp=happen_timestamp, end_timestamp=happen_timestamp,
-                                  limit=1)
-            except Exception as e:
-                self.logger.error(e)
-                raise WrongKdataError("could not get kdata")
-
-            if pd_is_not_null(kdata):
-                entity_type, _, _ = decode_entity_id(kdata['entity_id'][0])
-
-                the_price = kdata['close'][0]
-
-                if the_price:
-                    self.order(entity_id=entity_id, current_price=the_price,
-                               current_timestamp=happen_timestamp, order_pct=trading_signal.position_pct,
-                               order_money=trading_signal.order_money,
-                               order_type=order_type)
-                else:
-                    self.logger.warning(
-                        'ignore trading signal,wrong kdata,entity_id:{},timestamp:{},kdata:{}'.format(entity_id,
-                                                                                                      happen_timestamp,
-                                                                                                      kdata.to_dict(
-                                                                                                          orient='records')))
-
+            the_price = self.price_oracle.get_price(entity_id=entity_id, timestamp=happen_timestamp,
+                                                    level=trading_level)
+
+            if the_price:
+                self.order(entity_id=entity_id, current_price=the_price,
+                           current_timestamp=happen_timestamp, order_pct=trading_signal.position_pct,
+                           order_money=trading_signal.order_money,
+                           order_type=order_type)
             else:
                 self.logger.warning(
                     'ignore trading signal,could not get kdata,entity_id:{},timestamp:{}'.format(entity_id,
@@ -237,15 +350,11 @@ class SimAccountService(AccountService):
 
         self.account.value = 0
         self.account.all_value = 0
+        self.price_oracle.load([position.entity_id for position in self.account.positions],
+                               level=IntervalLevel.LEVEL_1DAY)
         for position in self.account.positions:
-            entity_type, _, _ = decode_entity_id(position.entity_id)
-            data_schema = get_kdata_schema(entity_type, level=IntervalLevel.LEVEL_1DAY)
-
-            kdata = get_kdata(provider=self.provider, level=IntervalLevel.LEVEL_1DAY, entity_id=position.entity_id,
-                              order=data_schema.timestamp.desc(),
-                              end_timestamp=timestamp, limit=1)
-
-            closing_price = kdata['close'][0]
+            closing_price = self.price_oracle.get_latest_price(entity_id=position.entity_id, timestamp=timestamp,
+                                                               level=IntervalLevel.LEVEL_1DAY)
 
             position.available_long = position.long_amount
             position.available_short = position.short_amount
@@ -260,7 +369,7 @@ class SimAccountService(AccountService):
                     self.account.value += position.value
             else:
                 self.logger.warning(
-                    'could not refresh close value for position:{},timestamp:{}'.format(position['entity_id'],
+                    'could not refresh close value for position:{},timestamp:{}'.format(position.entity_id,
                                                                                         timestamp))
 
         # remove the empty position
@@ -15,7 +15,7 @@ from zvt.drawer.drawer import Drawer
 from zvt.factors.target_selector import TargetSelector
 from zvt.trader import TradingSignal, TradingSignalType, TradingListener
 from zvt.trader.account import SimAccountService
-from zvt.utils.time_utils import to_pd_timestamp, now_pd_timestamp, to_time_str, is_same_date
+from zvt.utils.time_utils import to_pd_timestamp, now_pd_timestamp, is_same_date
 
 logger = logging.getLogger(__name__)
 
@@ -82,7 +82,10 @@ class Trader(object):
                                                  timestamp=self.start_timestamp,
                                                  provider=self.provider,
                                                  level=self.level,
-                                                 rich_mode=rich_mode)
+                                                 rich_mode=rich_mode,
+                                                 end_timestamp=self.end_timestamp,
+                                                 entity_ids=self.entity_ids,
+                                                 real_time=self.real_time)
 
         self.register_trading_signal_listener(self.account_service)
 
@@ -308,7 +311,7 @@ class Trader(object):
         return short_targets
 
     def in_trading_date(self, timestamp):
-        return to_time_str(timestamp) in self.trading_dates
+        return self.entity_schema.is_trading_date(timestamp)
 
     def on_time(self, timestamp):
         self.logger.debug(f'current timestamp:{timestamp}')
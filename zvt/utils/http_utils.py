@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from zvt import zvt_env
+
+logger = logging.getLogger(__name__)
+
+# the requests of eastmoney,sina and exchange recorders go through here.
+# the joinquant recorders call jqdatapy which uses its own requests session,they are not rate limited or
+# recorded/replayed by the fixture,the jq quota is limited by the daily query count of the account
+
+# requests per second of one host,could be set by "http_rate_limits" in config.json,e.g,{"emh5.eastmoney.com": 5}
+DEFAULT_RATE = 10
+
+# the status for retrying
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter(object):
+    """
+    token bucket,rate tokens are added per second and at most burst tokens are kept,
+    it's used for the requests of http_utils,the joinquant ones through jqdatapy are not limited
+    """
+
+    def __init__(self, rate: float, burst: int = None) -> None:
+        self.rate = rate
+        self.burst = burst if burst else max(1, int(rate))
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        take one token,wait until it's available
+        """
+        if not self.rate:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            # the token is reserved,the next caller waits longer
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class FixtureNotFoundError(requests.RequestException):
+    pass
+
+
+class FixtureAdapter(HTTPAdapter):
+    """
+    the transport for recording the responses to the fixture files or replaying them without network,
+    the fixture file is {fixture_path}/{host}/{sha1 of method,url and body}.json
+
+    only the requests of http_utils are covered,the joinquant ones through jqdatapy are not
+    """
+
+    def __init__(self, fixture_path: str, mode: str = 'replay', latency: float = 0, **kwargs) -> None:
+        assert mode in ('record', 'replay')
+        super().__init__(**kwargs)
+        self.fixture_path = fixture_path
+        self.mode = mode
+        self.latency = latency
+
+    def get_fixture_file(self, request) -> str:
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        key = hashlib.sha1(request.method.encode('utf-8') + request.url.encode('utf-8') + body).hexdigest()
+        host = urlparse(request.url).netloc.replace(':', '_')
+        return os.path.join(self.fixture_path, host, '{}.json'.format(key))
+
+    def send(self, request, **kwargs):
+        fixture_file = self.get_fixture_file(request)
+
+        if self.mode == 'replay':
+            if not os.path.exists(fixture_file):
+                raise FixtureNotFoundError('no fixture for {} {}'.format(request.method, request.url), request=request)
+            if self.latency:
+                time.sleep(self.latency)
+            with open(fixture_file) as f:
+                return self.to_response(request, json.load(f))
+
+        resp = super().send(request, **kwargs)
+        os.makedirs(os.path.dirname(fixture_file), exist_ok=True)
+        with open(fixture_file, 'w') as f:
+            json.dump(self.to_fixture(request, resp), f)
+        return resp
+
+    @staticmethod
+    def to_fixture(request, resp: requests.Response) -> dict:
+        # the content is decoded already
+        headers = {k: v for k, v in resp.headers.items() if k.lower() not in ('content-encoding', 'content-length',
+                                                                            'transfer-encoding')}
+        return {'method': request.method,
+                'url': request.url,
+                'status_code': resp.status_code,
+                'reason': resp.reason,
+                'headers': headers,
+                'encoding': resp.encoding,
+                'content': base64.b64encode(resp.content).decode('ascii')}
+
+    @staticmethod
+    def to_response(request, fixture: dict) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = fixture['status_code']
+        resp.reason = fixture['reason']
+        resp.headers = CaseInsensitiveDict(fixture['headers'])
+        resp.encoding = fixture['encoding']
+        resp._content = base64.b64decode(fixture['content'])
+        resp.url = fixture['url']
+        resp.request = request
+        return resp
+
+
+_lock = threading.Lock()
+# host -> RateLimiter
+_host_limiters = {}
+# requests.Session is not thread safe,one for every thread
+_local = threading.local()
+
+# (fixture_path,mode,latency),could be set by "http_fixture_path","http_fixture_mode","http_fixture_latency" in
+# config.json
+_fixture = None
+if zvt_env.get('http_fixture_path'):
+    _fixture = (zvt_env['http_fixture_path'], zvt_env.get('http_fixture_mode', 'replay'),
+                float(zvt_env.get('http_fixture_latency', 0)))
+
+
+def set_http_fixture(fixture_path: str = None, mode: str = 'replay', latency: float = 0):
+    """
+    record the responses of the http requests to fixture_path or replay them from it,e.g,benchmark and test the
+    recorders offline
+
+    :param fixture_path: None for using the network directly
+    :param mode: record or replay
+    :param latency: the seconds of every replayed request
+    """
+    global _fixture
+    if fixture_path:
+        assert mode in ('record', 'replay')
+        _fixture = (fixture_path, mode, latency)
+    else:
+        _fixture = None
+
+
+@contextmanager
+def http_fixture(fixture_path: str, mode: str = 'replay', latency: float = 0):
+    previous = _fixture
+    set_http_fixture(fixture_path=fixture_path, mode=mode, latency=latency)
+    try:
+        yield
+    finally:
+        if previous:
+            set_http_fixture(*previous)
+        else:
+            set_http_fixture(None)
+
+
+def set_rate_limit(host: str, rate: float, burst: int = None):
+    """
+    set the requests per second of the host,0 for no limit
+
+    :param host: e.g,emh5.eastmoney.com
+    :param rate:
+    :param burst:
+    """
+    with _lock:
+        _host_limiters[host] = RateLimiter(rate=rate, burst=burst)
+
+
+def get_rate_limiter(host: str) -> RateLimiter:
+    with _lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            rate = zvt_env.get('http_rate_limits', {}).get(host, DEFAULT_RATE)
+            limiter = RateLimiter(rate=rate)
+            _host_limiters[host] = limiter
+        return limiter
+
+
+def get_http_session() -> requests.Session:
+    """
+    the keep-alive session of current thread
+    """
+    session = getattr(_local, 'session', None)
+    # rebuild it if the fixture changed
+    if session is None or _local.fixture != _fixture:
+        session = requests.Session()
+        if _fixture:
+            fixture_path, mode, latency = _fixture
+            adapter = FixtureAdapter(fixture_path=fixture_path, mode=mode, latency=latency, pool_connections=20,
+                                     pool_maxsize=20)
+        else:
+            adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+        _local.fixture = _fixture
+    return session
+
+
+def http_request(method: str, url: str, retry: int = 3, backoff: float = 1, timeout: float = 30,
+                 **kwargs) -> requests.Response:
+    """
+    request with the pooled session,the rate limit of the host and retrying with jittered exponential backoff
+
+    :param method: GET,POST...
+    :param url:
+    :param retry: retry times for the connection error,timeout and the status in RETRY_STATUS
+    :param backoff: the base seconds of the backoff
+    :param timeout:
+    :param kwargs: the kwargs of requests
+    :return:
+    """
+    limiter = get_rate_limiter(urlparse(url).netloc)
+    # the replaying has its own latency
+    replaying = _fixture is not None and _fixture[1] == 'replay'
+
+    for i in range(retry + 1):
+        if not replaying:
+            limiter.acquire()
+        try:
+            resp = get_http_session().request(method, url, timeout=timeout, **kwargs)
+            if resp.status_code not in RETRY_STATUS or i == retry:
+                return resp
+            logger.warning('{} {} got status:{},retry:{}'.format(method, url, resp.status_code, i + 1))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if i == retry:
+                raise e
+            logger.warning('{} {} error:{},retry:{}'.format(method, url, e, i + 1))
+
+        time.sleep(backoff * (2 ** i) * random.uniform(0.5, 1.5))
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    return http_request('GET', url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    return http_request('POST', url, **kwargs)
+
+
+__all__ = ['RateLimiter', 'FixtureAdapter', 'FixtureNotFoundError', 'set_http_fixture', 'http_fixture',
+           'set_rate_limit', 'get_rate_limiter', 'get_http_session', 'http_request', 'http_get', 'http_post']